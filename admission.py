@@ -0,0 +1,192 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+from metrics import admission_active, admission_queue_depth, admission_shed, admission_wait_seconds
+
+
+class Overloaded(Exception):
+    """No slot could be obtained: the caller should answer 503 and retry after `retry_after` seconds."""
+
+    def __init__(self, limiter, reason, retry_after):
+        super().__init__(f"{limiter} overloaded ({reason}), retry after {retry_after}s")
+        self.limiter = limiter
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """
+    At most `limit` concurrent holders, then at most `queue_size` callers waiting
+    (first come, first served) up to `max_wait` seconds each for a slot.
+
+    Beyond that the caller is turned away at once with Overloaded, rather than
+    queuing behind work it would time out on anyway. A limit of 0 admits everyone.
+    Settings come from ADMISSION_<NAME>_CONCURRENCY, _QUEUE and _MAX_WAIT.
+    """
+
+    def __init__(self, name, limit=None, queue_size=None, max_wait=None, defaults=(8, 16, 10)):
+        self.name = name
+        self._limit = limit
+        self._queue_size = queue_size
+        self._max_wait = max_wait
+        self._defaults = defaults
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters = deque()
+        # Durée moyenne (glissante) d'occupation d'un créneau, pour estimer Retry-After
+        self._avg_hold = None
+        self.counters = {"admitted": 0, "queued": 0, "queue_full": 0, "timeout": 0}
+
+    def _setting(self, suffix, index, cast):
+        return cast(os.getenv(f"ADMISSION_{self.name.upper()}_{suffix}") or self._defaults[index])
+
+    @property
+    def limit(self):
+        if self._limit is None:
+            self._limit = self._setting("CONCURRENCY", 0, int)
+        return self._limit
+
+    @property
+    def queue_size(self):
+        if self._queue_size is None:
+            self._queue_size = self._setting("QUEUE", 1, int)
+        return self._queue_size
+
+    @property
+    def max_wait(self):
+        if self._max_wait is None:
+            self._max_wait = self._setting("MAX_WAIT", 2, float)
+        return self._max_wait
+
+    def _publish(self):
+        admission_active.labels(limiter=self.name).set(self._active)
+        admission_queue_depth.labels(limiter=self.name).set(len(self._waiters))
+
+    def retry_after(self) -> int:
+        """Seconds until the work ahead (running and queued) should be done, at least 1."""
+        with self._lock:
+            if not self._avg_hold or not self.limit:
+                return 1
+            return max(1, math.ceil(self._avg_hold * (len(self._waiters) + 1) / self.limit))
+
+    def record_shed(self, reason):
+        """Count a caller turned away for `reason`, here or by a queue of its own (the TTS pool)."""
+        with self._lock:
+            self.counters[reason] = self.counters.get(reason, 0) + 1
+        admission_shed.labels(limiter=self.name, reason=reason).inc()
+
+    def _reject(self, reason):
+        self.record_shed(reason)
+        raise Overloaded(self.name, reason, self.retry_after())
+
+    def saturated(self) -> bool:
+        """True when a new caller would be turned away right now."""
+        with self._lock:
+            return 0 < self.limit <= self._active and len(self._waiters) >= self.queue_size
+
+    def acquire(self) -> float:
+        """Wait for a slot and return the time it was granted; raise Overloaded if none comes in time."""
+        start = time.perf_counter()
+        with self._lock:
+            if self.limit <= 0 or (self._active < self.limit and not self._waiters):
+                self._active += 1
+                self.counters["admitted"] += 1
+                self._publish()
+                admission_wait_seconds.labels(limiter=self.name).observe(0)
+                return start
+            full = len(self._waiters) >= self.queue_size
+            if not full:
+                waiter = threading.Event()
+                self._waiters.append(waiter)
+                self.counters["queued"] += 1
+                self._publish()
+        if full:
+            self._reject("queue_full")
+
+        granted = waiter.wait(self.max_wait)
+        with self._lock:
+            # Le créneau a pu être cédé juste après l'expiration du délai : on le garde
+            if not granted and not waiter.is_set():
+                self._waiters.remove(waiter)
+                self._publish()
+                timed_out = True
+            else:
+                self.counters["admitted"] += 1
+                timed_out = False
+        if timed_out:
+            self._reject("timeout")
+        now = time.perf_counter()
+        admission_wait_seconds.labels(limiter=self.name).observe(now - start)
+        return now
+
+    def release(self, granted_at):
+        held = time.perf_counter() - granted_at
+        with self._lock:
+            self._avg_hold = held if self._avg_hold is None else 0.8 * self._avg_hold + 0.2 * held
+            # Le créneau passe directement au plus ancien en attente
+            if self._waiters:
+                self._waiters.popleft().set()
+            else:
+                self._active -= 1
+            self._publish()
+
+    @contextmanager
+    def slot(self):
+        granted_at = self.acquire()
+        try:
+            yield
+        finally:
+            self.release(granted_at)
+
+    @asynccontextmanager
+    async def aslot(self):
+        # L'attente d'un créneau bloque : hors de la boucle asyncio
+        lock = threading.Lock()
+        handoff = {"granted_at": None, "abandoned": False}
+
+        def acquire():
+            granted_at = self.acquire()
+            with lock:
+                # Appelant annulé pendant l'attente : personne ne rendra ce créneau, on le rend ici
+                if handoff["abandoned"]:
+                    self.release(granted_at)
+                else:
+                    handoff["granted_at"] = granted_at
+            return granted_at
+
+        try:
+            granted_at = await asyncio.to_thread(acquire)
+        except asyncio.CancelledError:
+            # Le thread ne s'interrompt pas : il rend le créneau s'il l'obtient plus tard, sinon c'est fait ici
+            with lock:
+                handoff["abandoned"] = True
+                granted_at = handoff["granted_at"]
+            if granted_at is not None:
+                self.release(granted_at)
+            raise
+        try:
+            yield
+        finally:
+            self.release(granted_at)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "queue_size": self.queue_size,
+                "max_wait": self.max_wait,
+                "active": self._active,
+                "waiting": len(self._waiters),
+                "avg_hold_ms": round(self._avg_hold * 1000, 1) if self._avg_hold is not None else None,
+                **self.counters,
+            }
+
+
+# Tours d'agent (boucle LLM + outils) et synthèses vocales, limités séparément
+llm_limiter = AdmissionLimiter("llm", defaults=(8, 16, 10))
+tts_limiter = AdmissionLimiter("tts", defaults=(2, 4, 2))
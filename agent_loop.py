@@ -0,0 +1,77 @@
+import asyncio
+import atexit
+import threading
+
+
+class BackgroundLoop:
+    """
+    One asyncio loop for the whole process, run forever by a daemon thread.
+
+    Flask runs every async view in an event loop of its own (asgiref), closed at
+    the end of the request. The async agent path runs here instead, so that the
+    HTTP clients, futures and tasks it creates outlive the request; they are
+    closed with the loop when the process exits.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._loop = None
+        self._lock = threading.Lock()
+        self._closers = []
+
+    @property
+    def loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True).start()
+            return self._loop
+
+    def running_here(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def submit(self, coroutine):
+        """Schedule `coroutine` on the loop and return its concurrent.futures.Future."""
+        # La tâche hérite du contexte de l'appelant (contextvars : timings, budget de recherche)
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    async def run(self, coroutine):
+        """Await `coroutine` on the loop from any other loop; cancelling the caller cancels it."""
+        if self.running_here():
+            return await coroutine
+        return await asyncio.wrap_future(self.submit(coroutine))
+
+    def call(self, coroutine, timeout=None):
+        """Run `coroutine` on the loop and wait for its result from synchronous code."""
+        return self.submit(coroutine).result(timeout)
+
+    def on_close(self, closer):
+        """Register a coroutine function awaited on the loop when it closes (e.g. a client's aclose)."""
+        with self._lock:
+            self._closers.append(closer)
+
+    async def _aclose(self):
+        for closer in self._closers:
+            try:
+                await closer()
+            except Exception as e:
+                print(f"Error: {e}")
+        self._closers.clear()
+
+    def close(self, timeout=5):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None or loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._aclose(), loop).result(timeout)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+
+
+# Tours d'agent asyncio (/receptionist/async) et tout ce qu'ils créent : clients httpx, futures partagées
+agent_loop = BackgroundLoop("agent-loop")
+atexit.register(agent_loop.close)
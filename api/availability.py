@@ -0,0 +1,139 @@
+import re
+
+from pydantic import BaseModel, Field
+from api.meal import fetch_meals, afetch_meals, MealDetail
+from api.reservation import fetch_reservations, afetch_reservations
+from api.restaurant import fetch_all_restaurants, afetch_all_restaurants, RestaurantDetail
+
+from langchain_core.tools import tool, ToolException
+
+# Créneaux d'ouverture par repas, en heures (début, fin)
+MEAL_WINDOWS = {
+    "breakfast": (7, 10),
+    "petit-déjeuner": (7, 10),
+    "petit déjeuner": (7, 10),
+    "lunch": (11, 15),
+    "déjeuner": (11, 15),
+    "dinner": (16, 23),
+    "dîner": (16, 23),
+    "diner": (16, 23),
+}
+
+_HOURS_RANGE = re.compile(r"(\d{1,2})\s*[:hH]\s*(\d{2})?\s*(?:-|–|à|to)\s*(\d{1,2})\s*[:hH]\s*(\d{2})?")
+
+class RestaurantAvailability(BaseModel):
+    restaurant_id: int = Field(description="The restaurant's unique identifier")
+    name: str = Field(description="The restaurant's name")
+    capacity: int = Field(description="The restaurant's capacity")
+    booked_guests: int = Field(description="The number of guests already booked for the date and meal")
+    remaining_seats: int = Field(description="The number of seats still free for the date and meal")
+    open_for_meal: bool = Field(description="Whether the restaurant is open during the meal's time window")
+    available: bool = Field(description="Whether the restaurant can host the requested number of guests")
+
+class Availability(BaseModel):
+    date: str = Field(description="The date checked (YYYY-MM-DD)")
+    meal: int = Field(description="The ID of the meal type checked")
+    meal_name: str | None = Field(description="The name of the meal type checked")
+    guests: int = Field(description="The number of guests requested")
+    restaurants: list[RestaurantAvailability] = Field(description="The availability of each restaurant")
+
+def meal_window(meal: MealDetail | None):
+    if meal is None:
+        return None
+    return MEAL_WINDOWS.get(meal.name.strip().lower())
+
+def is_open_for_meal(restaurant: RestaurantDetail, window) -> bool:
+    if not restaurant.is_active:
+        return False
+    if window is None:
+        return True
+
+    ranges = _HOURS_RANGE.findall(restaurant.opening_hours)
+    if not ranges:
+        # Horaires non structurés : on ne peut pas exclure le restaurant
+        return True
+
+    start, end = window
+    for open_h, open_m, close_h, close_m in ranges:
+        opens = int(open_h) + int(open_m or 0) / 60
+        closes = int(close_h) + int(close_m or 0) / 60
+        if closes <= opens:
+            closes += 24
+        if opens < end and closes > start:
+            return True
+    return False
+
+def _reservation_params(date, meal, restaurant):
+    params = {"date_from": date, "date_to": date, "meal": meal, "restaurant": restaurant}
+    return {k: v for k, v in params.items() if v is not None}
+
+def _summarize(date, meal, guests, restaurant, restaurants, meals, reservations) -> Availability:
+    meal_detail = next((m for m in meals if m.id == meal), None)
+    window = meal_window(meal_detail)
+
+    booked = {}
+    for reservation in reservations:
+        if reservation.date == date and reservation.meal == meal:
+            booked[reservation.restaurant] = booked.get(reservation.restaurant, 0) + reservation.number_of_guests
+
+    availabilities = []
+    for detail in restaurants:
+        if restaurant is not None and detail.id != restaurant:
+            continue
+        open_for_meal = is_open_for_meal(detail, window)
+        remaining = max(detail.capacity - booked.get(detail.id, 0), 0)
+        availabilities.append(RestaurantAvailability(
+            restaurant_id=detail.id,
+            name=detail.name,
+            capacity=detail.capacity,
+            booked_guests=booked.get(detail.id, 0),
+            remaining_seats=remaining,
+            open_for_meal=open_for_meal,
+            available=open_for_meal and remaining >= guests
+        ))
+
+    return Availability(
+        date=date,
+        meal=meal,
+        meal_name=meal_detail.name if meal_detail else None,
+        guests=guests,
+        restaurants=availabilities
+    )
+
+@tool
+def check_availability(date: str, meal: int, guests: int, restaurant: int | None = None) -> Availability:
+    """
+    Check which restaurants can host a reservation, in a single call.
+    Use it before creating or updating a reservation instead of summing guests yourself.
+    It lists every restaurant (or only the one given) with its remaining seats, computed from all existing reservations,
+    whether it is open for the meal (open_for_meal, never for an inactive one) and whether it can host the guests (available).
+    Only propose the restaurants marked available.
+
+    Args:
+        date (str): The date of the reservation (YYYY-MM-DD).
+        meal (int): The ID of the meal type.
+        guests (int): The number of guests for the reservation.
+        restaurant (int, optional): The ID of a restaurant, to check only this one.
+
+    Returns:
+        Availability: A Pydantic model containing, for each restaurant, the remaining seats and whether it is available.
+    """
+    try:
+        restaurants = fetch_all_restaurants()
+        meals = fetch_meals().results
+        reservations = fetch_reservations(_reservation_params(date, meal, restaurant))
+        return _summarize(date, meal, guests, restaurant, restaurants, meals, reservations)
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
+
+@tool("check_availability", description=check_availability.description)
+async def acheck_availability(date: str, meal: int, guests: int, restaurant: int | None = None) -> Availability:
+    try:
+        restaurants = await afetch_all_restaurants()
+        meals = (await afetch_meals()).results
+        reservations = await afetch_reservations(_reservation_params(date, meal, restaurant))
+        return _summarize(date, meal, guests, restaurant, restaurants, meals, reservations)
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
@@ -0,0 +1,138 @@
+import copy
+import os
+import threading
+import time
+
+from agent_loop import agent_loop
+
+
+class TTLCache:
+    """
+    In-process cache for slowly changing reference data.
+
+    Entries are kept for `ttl` seconds. Once an entry reaches `refresh_ahead` of
+    its TTL it is still served, but a background reload is started so that callers
+    rarely wait on the backend. Keys are tuples whose first element is a namespace
+    ("restaurants", "meals", ...), used for invalidation and stats.
+
+    Callers always get their own copy of the cached value, free to modify it.
+    """
+
+    def __init__(self, ttl=None, refresh_ahead=0.8):
+        self._ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self._entries = {}
+        self._refreshing = set()
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    @property
+    def ttl(self):
+        if self._ttl is None:
+            self._ttl = float(os.getenv("REFERENCE_CACHE_TTL") or "3600")
+        return self._ttl
+
+    def _count(self, key, name):
+        stats = self._stats.setdefault(key[0], {"hits": 0, "misses": 0, "refreshes": 0})
+        stats[name] += 1
+
+    def _lookup(self, key):
+        """Return (value, needs_refresh), or None when the entry is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._count(key, "misses")
+                return None
+
+            value, loaded_at = entry
+            age = time.monotonic() - loaded_at
+            if age >= self.ttl:
+                del self._entries[key]
+                self._count(key, "misses")
+                return None
+
+            self._count(key, "hits")
+            needs_refresh = age >= self.ttl * self.refresh_ahead and key not in self._refreshing
+            if needs_refresh:
+                self._refreshing.add(key)
+                self._count(key, "refreshes")
+            return value, needs_refresh
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._refreshing.discard(key)
+
+    def _refresh_failed(self, key, error):
+        print(f"Error: refresh of {key} failed: {error}")
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for `key`, calling `loader()` on a miss."""
+        found = self._lookup(key)
+        if found is not None:
+            value, needs_refresh = found
+            if needs_refresh:
+                threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+            return copy.deepcopy(value)
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Un seul chargement par clé, les autres appelants attendent le résultat
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                return copy.deepcopy(entry[0])
+            value = loader()
+            self._store(key, value)
+            return copy.deepcopy(value)
+
+    def _refresh(self, key, loader):
+        try:
+            self._store(key, loader())
+        except Exception as e:
+            self._refresh_failed(key, e)
+
+    async def aget_or_load(self, key, loader):
+        """Async variant of get_or_load, `loader` being a coroutine function; its refreshes run on agent_loop."""
+        found = self._lookup(key)
+        if found is not None:
+            value, needs_refresh = found
+            if needs_refresh:
+                # Sur la boucle partagée, qui survit à la requête (la boucle d'une vue Flask async est fermée à sa fin)
+                agent_loop.submit(self._arefresh(key, loader))
+            return copy.deepcopy(value)
+
+        value = await loader()
+        self._store(key, value)
+        return copy.deepcopy(value)
+
+    async def _arefresh(self, key, loader):
+        try:
+            self._store(key, await loader())
+        except Exception as e:
+            self._refresh_failed(key, e)
+
+    def invalidate(self, namespace=None):
+        """Drop every entry, or only those of one namespace."""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == namespace]:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            stats = {namespace: dict(counts) for namespace, counts in self._stats.items()}
+            for counts in stats.values():
+                total = counts["hits"] + counts["misses"]
+                counts["hit_rate"] = round(counts["hits"] / total, 3) if total else 0.0
+            return stats
+
+
+# Restaurants, repas et spas : données qui ne changent qu'environ une fois par jour
+reference_cache = TTLCache()
@@ -1,5 +1,8 @@
+import asyncio
 from pydantic import BaseModel, Field
-from api.api_client import ApiClient
+from api.api_client import get_api_client, get_async_api_client
+from api.paginator import fetch_all_pages, afetch_all_pages
+from api.client_index import ClientIndex
 
 from langchain_core.tools import tool, ToolException
 
@@ -16,20 +19,61 @@ class Client(BaseModel):
     previous: str | None = Field(description="The URL to the previous page")
     results: list[ClientDetail] = Field(description="The list of clients")
 
+class RoomAvailability(BaseModel):
+    room_number: str = Field(description="The room number checked")
+    available: bool = Field(description="Whether the room is free")
+    next_free_room: str | None = Field(description="The first free room at or after the one checked")
+
+# Index local des clients, tenu à jour par les outils d'écriture ci-dessous
+client_index = ClientIndex(
+    lambda: [ClientDetail(**c) for c in fetch_all_pages("clients")],
+    search=lambda term: [ClientDetail(**c) for c in fetch_all_pages("clients", {"search": term})]
+)
+
+# Requêtes et lecture des réponses, communes aux outils synchrones et asyncio
+ENDPOINT = "clients"
+
+def _client_list(results) -> Client:
+    return Client(count=len(results), next=None, previous=None, results=results)
+
+def _client_body(name, phone_number, room_number, special_requests):
+    return {
+        "name": name,
+        "phone_number": phone_number,
+        "room_number": room_number,
+        "special_requests": special_requests
+    }
+
+def _saved_client(result) -> ClientDetail:
+    client = ClientDetail(**result)
+    client_index.upsert(client)
+    return client
+
+def _deleted_client(client_id):
+    client_index.remove(client_id)
+    print(f"Client with ID {client_id} deleted successfully.")
+
+def _room_availability(room_number) -> RoomAvailability:
+    return RoomAvailability(
+        room_number=room_number,
+        available=client_index.is_room_free(room_number),
+        next_free_room=client_index.next_free_room(room_number)
+    )
+
 @tool
-def get_clients(page_number, search) -> Client:
+def get_clients(page_number, search, all_pages: bool = False) -> Client:
     """
     Search for clients.
+    To authenticate a client by name, phone number or room number, prefer find_client.
+    Set all_pages to get every matching client at once instead of a single page.
 
     Returns:
         Client: A Pydantic model containing client details.
     """
     try:
-        api_client = ApiClient()
-        endpoint = "clients"
-
-        result = api_client.get(endpoint, params={ "page": page_number, "search": search })
-        return Client(**result)
+        if all_pages:
+            return _client_list(fetch_all_pages(ENDPOINT, { "search": search }))
+        return Client(**get_api_client().get(ENDPOINT, params={ "page": page_number, "search": search }))
     except Exception as e:
         print(f"Error: {e}")
         raise ToolException(e)
@@ -47,11 +91,7 @@ def get_client_by_id(client_id: int) -> ClientDetail:
         ClientDetail: A Pydantic model containing client details.
     """
     try:
-        api_client = ApiClient()
-        endpoint = "clients"
-
-        result = api_client.get(f"{endpoint}/{client_id}")
-        return ClientDetail(**result)
+        return ClientDetail(**get_api_client().get(f"{ENDPOINT}/{client_id}"))
     except Exception as e:
         print(f"Error: {e}")
         raise ToolException(e)
@@ -61,7 +101,7 @@ def create_client(name: str, phone_number: str, room_number: str, special_reques
     """
     Create a new client.
     If the client don't give all informations, ask him to give it.
-    Ensure the room_number is not already taken (available by listing clients).
+    Ensure the room_number is not already taken (use find_free_room).
 
     Args:
         name (str): The client's name.
@@ -73,17 +113,7 @@ def create_client(name: str, phone_number: str, room_number: str, special_reques
         ClientDetail: A Pydantic model containing the created client details.
     """
     try:
-        api_client = ApiClient()
-        endpoint = "clients"
-
-        result = api_client.post(f"{endpoint}/", json=
-        {
-            "name": name,
-            "phone_number": phone_number,
-            "room_number": room_number,
-            "special_requests": special_requests
-        })
-        return ClientDetail(**result)
+        return _saved_client(get_api_client().post(f"{ENDPOINT}/", json=_client_body(name, phone_number, room_number, special_requests)))
     except Exception as e:
         print(f"Error: {e}")
         raise ToolException(e)
@@ -106,16 +136,7 @@ def update_client(client_id: int, name: str, phone_number: str, room_number: str
         ClientDetail: A Pydantic model containing the updated client details.
     """
     try:
-        api_client = ApiClient()
-        endpoint = "clients"
-
-        result = api_client.put(f"{endpoint}/{client_id}/", json={
-            "name": name,
-            "phone_number": phone_number,
-            "room_number": room_number,
-            "special_requests": special_requests
-        })
-        return ClientDetail(**result)
+        return _saved_client(get_api_client().put(f"{ENDPOINT}/{client_id}/", json=_client_body(name, phone_number, room_number, special_requests)))
     except Exception as e:
         print(f"Error: {e}")
         raise ToolException(e)
@@ -134,11 +155,109 @@ def delete_client(client_id: int) -> None:
         None
     """
     try:
-        api_client = ApiClient()
-        endpoint = "clients"
+        get_api_client().delete(f"{ENDPOINT}/{client_id}/")
+        _deleted_client(client_id)
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
+
+@tool
+def find_client(name: str | None = None, phone_number: str | None = None, room_number: str | None = None, fuzzy: bool = False) -> Client:
+    """
+    Find clients instantly by name, phone number and/or room number.
+    Use it to authenticate a client. Every criterion given must match.
+    Set fuzzy to also match misspelled or partial names.
+
+    Args:
+        name (str, optional): The client's name.
+        phone_number (str, optional): The client's phone number.
+        room_number (str, optional): The client's room number.
+        fuzzy (bool, optional): Tolerate typos and partial names.
+
+    Returns:
+        Client: A Pydantic model containing the matching clients.
+    """
+    try:
+        return _client_list(client_index.lookup(name, phone_number, room_number, fuzzy))
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
+
+@tool
+def find_free_room(room_number: str) -> RoomAvailability:
+    """
+    Check whether a room is free before giving it to a client.
+    If it is taken, the first free room after it is proposed.
+
+    Args:
+        room_number (str): The room number wanted.
+
+    Returns:
+        RoomAvailability: A Pydantic model telling whether the room is free and the next free room.
+    """
+    try:
+        return _room_availability(room_number)
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
+
+@tool("get_clients", description=get_clients.description)
+async def aget_clients(page_number, search, all_pages: bool = False) -> Client:
+    try:
+        if all_pages:
+            return _client_list(await afetch_all_pages(ENDPOINT, { "search": search }))
+        return Client(**await get_async_api_client().get(ENDPOINT, params={ "page": page_number, "search": search }))
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
+
+@tool("get_client_by_id", description=get_client_by_id.description)
+async def aget_client_by_id(client_id: int) -> ClientDetail:
+    try:
+        return ClientDetail(**await get_async_api_client().get(f"{ENDPOINT}/{client_id}"))
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
+
+@tool("create_client", description=create_client.description)
+async def acreate_client(name: str, phone_number: str, room_number: str, special_requests: str="") -> ClientDetail:
+    try:
+        return _saved_client(await get_async_api_client().post(f"{ENDPOINT}/", json=_client_body(name, phone_number, room_number, special_requests)))
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
 
-        api_client.delete(f"{endpoint}/{client_id}/")
-        print(f"Client with ID {client_id} deleted successfully.")
+@tool("update_client", description=update_client.description)
+async def aupdate_client(client_id: int, name: str, phone_number: str, room_number: str, special_requests: str="") -> ClientDetail:
+    try:
+        return _saved_client(await get_async_api_client().put(f"{ENDPOINT}/{client_id}/", json=_client_body(name, phone_number, room_number, special_requests)))
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
+
+@tool("delete_client", description=delete_client.description)
+async def adelete_client(client_id: int) -> None:
+    try:
+        await get_async_api_client().delete(f"{ENDPOINT}/{client_id}/")
+        _deleted_client(client_id)
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
+
+@tool("find_client", description=find_client.description)
+async def afind_client(name: str | None = None, phone_number: str | None = None, room_number: str | None = None, fuzzy: bool = False) -> Client:
+    try:
+        # Chargement de l'index et recherche de repli passent par le client HTTP synchrone
+        return _client_list(await asyncio.to_thread(client_index.lookup, name, phone_number, room_number, fuzzy))
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
+
+@tool("find_free_room", description=find_free_room.description)
+async def afind_free_room(room_number: str) -> RoomAvailability:
+    try:
+        await asyncio.to_thread(client_index.ensure_warm)
+        return _room_availability(room_number)
     except Exception as e:
         print(f"Error: {e}")
         raise ToolException(e)
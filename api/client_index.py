@@ -0,0 +1,189 @@
+import difflib
+import os
+import re
+import threading
+import time
+import unicodedata
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, strip accents and sort words, so that "Dupont Jean" matches "jean  dupont"."""
+    name = unicodedata.normalize("NFKD", name or "")
+    name = "".join(c for c in name if not unicodedata.combining(c)).lower()
+    return " ".join(sorted(re.findall(r"[a-z0-9]+", name)))
+
+def normalize_phone(phone_number: str) -> str:
+    digits = re.sub(r"\D", "", phone_number or "")
+    # +33 6 12 34 56 78 -> 0612345678
+    if digits.startswith("33") and len(digits) == 11:
+        digits = "0" + digits[2:]
+    return digits
+
+def normalize_room(room_number) -> str:
+    return str(room_number or "").strip().lower()
+
+
+class ClientIndex:
+    """
+    Local index of the hotel clients, keyed by normalized name, phone number and room number.
+
+    The index is warmed from the paginated API on first use and fully resynced
+    every `ttl` seconds; in between, the client tools keep it up to date by
+    calling upsert/remove with the backend's responses. A resync is built
+    aside and swapped in, so lookups keep using the previous index meanwhile.
+    A lookup that finds nobody asks the API (`search`) before giving up, for
+    clients created by another worker since the last resync.
+    """
+
+    def __init__(self, loader, search=None, ttl=None):
+        self._loader = loader
+        self._search = search
+        self._ttl = ttl
+        self._lock = threading.RLock()
+        # Un seul rechargement complet à la fois, sans bloquer les lectures
+        self._warm_lock = threading.Lock()
+        # Écritures reçues pendant un rechargement, rejouées sur le nouvel index
+        self._writes_during_warm = None
+        self._warmed_at = None
+        self._clients = {}
+        self._by_name = {}
+        self._by_phone = {}
+        self._by_room = {}
+
+    @property
+    def ttl(self):
+        if self._ttl is None:
+            self._ttl = float(os.getenv("CLIENT_INDEX_TTL") or "600")
+        return self._ttl
+
+    def _add(self, client):
+        self._clients[client.id] = client
+        self._by_name.setdefault(normalize_name(client.name), set()).add(client.id)
+        self._by_phone.setdefault(normalize_phone(client.phone_number), set()).add(client.id)
+        if client.room_number:
+            self._by_room.setdefault(normalize_room(client.room_number), set()).add(client.id)
+
+    def _fresh(self):
+        return self._warmed_at is not None and time.monotonic() - self._warmed_at < self.ttl
+
+    def _discard(self, client_id):
+        client = self._clients.pop(client_id, None)
+        if client is None:
+            return
+        for index, key in (
+            (self._by_name, normalize_name(client.name)),
+            (self._by_phone, normalize_phone(client.phone_number)),
+            (self._by_room, normalize_room(client.room_number)),
+        ):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(client_id)
+                if not ids:
+                    del index[key]
+
+    def _rebuild(self):
+        """Reload every client into a new index and swap it in; must hold _warm_lock."""
+        with self._lock:
+            self._writes_during_warm = []
+        try:
+            # Pagination complète hors du verrou : les recherches continuent sur l'ancien index
+            fresh = ClientIndex(self._loader)
+            for client in self._loader():
+                fresh._add(client)
+        except BaseException:
+            with self._lock:
+                self._writes_during_warm = None
+            raise
+        with self._lock:
+            for apply, arg in self._writes_during_warm:
+                apply(fresh, arg)
+            self._writes_during_warm = None
+            self._clients, self._by_name, self._by_phone, self._by_room = fresh._clients, fresh._by_name, fresh._by_phone, fresh._by_room
+            self._warmed_at = time.monotonic()
+
+    def warm(self):
+        with self._warm_lock:
+            self._rebuild()
+
+    def ensure_warm(self):
+        if self._fresh():
+            return
+        with self._warm_lock:
+            # Rechargé par un autre appel pendant l'attente
+            if not self._fresh():
+                self._rebuild()
+
+    def _upsert(self, client):
+        self._discard(client.id)
+        self._add(client)
+
+    def upsert(self, client):
+        with self._lock:
+            self._upsert(client)
+            if self._writes_during_warm is not None:
+                self._writes_during_warm.append((ClientIndex._upsert, client))
+
+    def remove(self, client_id):
+        with self._lock:
+            self._discard(client_id)
+            if self._writes_during_warm is not None:
+                self._writes_during_warm.append((ClientIndex._discard, client_id))
+
+    def lookup(self, name=None, phone_number=None, room_number=None, fuzzy=False, limit=5):
+        """Return the clients matching every criterion given, best name matches first."""
+        self.ensure_warm()
+        found = self._match(name, phone_number, room_number, fuzzy, limit)
+        term = phone_number or name
+        if found or not term or self._search is None:
+            return found
+
+        # Absent de l'index : peut-être créé depuis par un autre worker, requête filtrée à l'API
+        try:
+            clients = self._search(term)
+        except Exception as e:
+            print(f"Error: client search for {term} failed: {e}")
+            return found
+        for client in clients:
+            self.upsert(client)
+        return self._match(name, phone_number, room_number, fuzzy, limit) if clients else found
+
+    def _match(self, name, phone_number, room_number, fuzzy, limit):
+        with self._lock:
+            candidates = None
+            if phone_number:
+                candidates = set(self._by_phone.get(normalize_phone(phone_number), ()))
+            if room_number:
+                ids = self._by_room.get(normalize_room(room_number), set())
+                candidates = ids & candidates if candidates is not None else set(ids)
+
+            if name:
+                key = normalize_name(name)
+                names = [key] if key in self._by_name else []
+                if fuzzy:
+                    names += [k for k in self._by_name if key in k and k not in names]
+                    names += [k for k in difflib.get_close_matches(key, self._by_name, n=limit, cutoff=0.75) if k not in names]
+
+                ranked = [client_id for k in names for client_id in sorted(self._by_name[k])]
+                if candidates is not None:
+                    ranked = [client_id for client_id in ranked if client_id in candidates]
+            else:
+                ranked = sorted(candidates or ())
+
+            return [self._clients[client_id] for client_id in ranked[:limit]]
+
+    def is_room_free(self, room_number) -> bool:
+        self.ensure_warm()
+        with self._lock:
+            return normalize_room(room_number) not in self._by_room
+
+    def next_free_room(self, room_number, max_tries=100):
+        """First free room at or after `room_number`, by incrementing it, or None."""
+        self.ensure_warm()
+        if not str(room_number).strip().isdigit():
+            return room_number if self.is_room_free(room_number) else None
+        with self._lock:
+            room = int(room_number)
+            for candidate in range(room, room + max_tries):
+                if str(candidate) not in self._by_room:
+                    return str(candidate)
+        return None
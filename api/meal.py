@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from api.api_client import ApiClient
+from api.api_client import get_api_client, get_async_api_client
+from api.cache import reference_cache
 
 from langchain_core.tools import tool, ToolException
 
@@ -13,6 +14,18 @@ class Meal(BaseModel):
     previous: str | None = Field(description="The URL to the previous page")
     results: list[MealDetail] = Field(description="The list of meals")
 
+def fetch_meals() -> Meal:
+    def load():
+        return Meal(**get_api_client().get("meals"))
+
+    return reference_cache.get_or_load(("meals",), load)
+
+async def afetch_meals() -> Meal:
+    async def load():
+        return Meal(**await get_async_api_client().get("meals"))
+
+    return await reference_cache.aget_or_load(("meals",), load)
+
 @tool
 def get_meals() -> Meal:
     """
@@ -22,11 +35,15 @@ def get_meals() -> Meal:
         Meal: A Pydantic model containing meal details.
     """
     try:
-        api_client = ApiClient()
-        endpoint = "meals"
+        return fetch_meals()
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
 
-        result = api_client.get(endpoint)
-        return Meal(**result)
+@tool("get_meals", description=get_meals.description)
+async def aget_meals() -> Meal:
+    try:
+        return await afetch_meals()
     except Exception as e:
         print(f"Error: {e}")
         raise ToolException(e)
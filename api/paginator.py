@@ -0,0 +1,174 @@
+import asyncio
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import httpx
+import requests
+
+from api.api_client import get_api_client, get_async_api_client
+
+
+def _max_in_flight(max_in_flight):
+    return max_in_flight or int(os.getenv("API_MAX_IN_FLIGHT") or "4")
+
+def _page_count(first_page):
+    page_size = len(first_page["results"])
+    if not page_size or not first_page.get("next"):
+        return 1
+    return math.ceil(first_page["count"] / page_size)
+
+def _params(params, page_number):
+    return {**(params or {}), "page": page_number}
+
+def _missing_page(error) -> bool:
+    # Liste raccourcie entre la première page et les suivantes : la page n'existe plus
+    response = getattr(error, "response", None)
+    return response is not None and response.status_code == 404
+
+def _extend(results, pages):
+    """Add the pages' results in page order, up to the first missing page (None)."""
+    for page in pages:
+        if page is None:
+            break
+        results.extend(page["results"])
+    return results
+
+
+def _fetch_page(api_client, endpoint, params, page_number):
+    """A later page, or None when it no longer exists."""
+    try:
+        return api_client.get(endpoint, params=_params(params, page_number))
+    except requests.HTTPError as e:
+        if _missing_page(e):
+            return None
+        raise
+
+async def _afetch_page(api_client, endpoint, params, page_number):
+    try:
+        return await api_client.get(endpoint, params=_params(params, page_number))
+    except httpx.HTTPStatusError as e:
+        if _missing_page(e):
+            return None
+        raise
+
+
+def iter_pages(endpoint, params=None, max_in_flight=None):
+    """
+    Yield the results of every page of a paginated endpoint, page by page, as they arrive.
+
+    Page 1 gives `count` and the page size; the remaining pages are then fetched
+    concurrently with at most `max_in_flight` requests in flight. Pages after the
+    first one are yielded in completion order, not page order. A 404 on a later
+    page ends the iteration: the pages after it are no longer yielded.
+    """
+    api_client = get_api_client()
+    first_page = api_client.get(endpoint, params=_params(params, 1))
+    yield first_page["results"]
+
+    page_count = _page_count(first_page)
+    if page_count == 1:
+        return
+
+    last_page = page_count
+    with ThreadPoolExecutor(max_workers=_max_in_flight(max_in_flight)) as executor:
+        futures = {
+            executor.submit(_fetch_page, api_client, endpoint, params, page_number): page_number
+            for page_number in range(2, page_count + 1)
+        }
+        try:
+            for future in as_completed(futures):
+                page_number = futures[future]
+                if page_number > last_page:
+                    continue
+                page = future.result()
+                if page is None:
+                    # Les pages suivantes n'existent plus non plus
+                    last_page = page_number - 1
+                    for other, other_number in futures.items():
+                        if other_number > last_page:
+                            other.cancel()
+                    continue
+                yield page["results"]
+        finally:
+            # Itération abandonnée par l'appelant : les pages pas encore demandées ne le sont plus
+            for future in futures:
+                future.cancel()
+
+
+def fetch_all_pages(endpoint, params=None, max_in_flight=None) -> list:
+    """
+    Return the results of every page of a paginated endpoint, in page order.
+
+    Page 1 gives `count` and the page size; the remaining pages are then fetched
+    concurrently with at most `max_in_flight` (API_MAX_IN_FLIGHT) requests in
+    flight. A 404 on a later page (the list shrank meanwhile) ends the list there.
+    """
+    api_client = get_api_client()
+    first_page = api_client.get(endpoint, params=_params(params, 1))
+    results = list(first_page["results"])
+
+    page_count = _page_count(first_page)
+    if page_count == 1:
+        return results
+
+    with ThreadPoolExecutor(max_workers=_max_in_flight(max_in_flight)) as executor:
+        pages = executor.map(lambda page_number: _fetch_page(api_client, endpoint, params, page_number), range(2, page_count + 1))
+        return _extend(results, pages)
+
+
+async def aiter_pages(endpoint, params=None, max_in_flight=None):
+    """Async variant of iter_pages."""
+    api_client = get_async_api_client()
+    first_page = await api_client.get(endpoint, params=_params(params, 1))
+    yield first_page["results"]
+
+    page_count = _page_count(first_page)
+    if page_count == 1:
+        return
+
+    semaphore = asyncio.Semaphore(_max_in_flight(max_in_flight))
+
+    async def fetch(page_number):
+        async with semaphore:
+            return await _afetch_page(api_client, endpoint, params, page_number)
+
+    tasks = {asyncio.ensure_future(fetch(page_number)): page_number for page_number in range(2, page_count + 1)}
+    pending = set(tasks)
+    last_page = page_count
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=tasks.get):
+                if tasks[task] > last_page:
+                    continue
+                page = task.result()
+                if page is None:
+                    last_page = tasks[task] - 1
+                    for other in [other for other in pending if tasks[other] > last_page]:
+                        other.cancel()
+                        pending.discard(other)
+                    continue
+                yield page["results"]
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def afetch_all_pages(endpoint, params=None, max_in_flight=None) -> list:
+    """Async variant of fetch_all_pages."""
+    api_client = get_async_api_client()
+    first_page = await api_client.get(endpoint, params=_params(params, 1))
+    results = list(first_page["results"])
+
+    page_count = _page_count(first_page)
+    if page_count == 1:
+        return results
+
+    semaphore = asyncio.Semaphore(_max_in_flight(max_in_flight))
+
+    async def fetch(page_number):
+        async with semaphore:
+            return await _afetch_page(api_client, endpoint, params, page_number)
+
+    return _extend(results, await asyncio.gather(*(fetch(page_number) for page_number in range(2, page_count + 1))))
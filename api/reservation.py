@@ -1,5 +1,16 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as Date
+
 from pydantic import BaseModel, Field
-from api.api_client import ApiClient
+from api.api_client import get_api_client, get_async_api_client
+from api.client import client_index
+from api.client_index import normalize_name
+from api.meal import fetch_meals, afetch_meals
+from api.paginator import fetch_all_pages, afetch_all_pages
+from api.reservation_cache import reservation_cache
+from api.restaurant import fetch_all_restaurants, afetch_all_restaurants
+from keyed_locks import KeyedLocks
 
 from langchain_core.tools import tool, ToolException
 
@@ -12,16 +23,106 @@ class ReservationDetail(BaseModel):
     number_of_guests: int = Field(description="The number of guests for the reservation")
     special_requests: str | None = Field(description="Special requests for the reservation")
 
+class Booking(BaseModel):
+    booked: bool = Field(description="Whether the table was booked")
+    reservation: ReservationDetail | None = Field(default=None, description="The created reservation, or the existing one for a duplicate")
+    reason: str | None = Field(default=None, description="Why the booking was refused: invalid_date, client_not_found, ambiguous_client, restaurant_not_found, meal_not_found, closed, duplicate or full")
+    message: str | None = Field(default=None, description="Explanation of the refusal, to rephrase for the client")
+    client_id: int | None = Field(default=None, description="The ID of the client resolved from the name or phone number")
+    restaurant_id: int | None = Field(default=None, description="The ID of the restaurant resolved from its name")
+    meal_id: int | None = Field(default=None, description="The ID of the meal resolved from its name")
+    remaining_seats: int | None = Field(default=None, description="The seats left for the date and meal before this booking")
+
 class Reservation(BaseModel):
     count: int = Field(description="The total number of reservations")
     next: str | None = Field(description="The URL to the next page")
     previous: str | None = Field(description="The URL to the previous page")
     results: list[ReservationDetail] = Field(description="The list of reservations")
 
-def get_reservations(page_number=None, client_id=None, date_from=None, date_to=None, meal=None, restaurant=None) -> Reservation:
+def _reservation_filters(client_id=None, date_from=None, date_to=None, meal=None, restaurant=None):
+    params = {
+        "client": client_id,
+        "date_from": date_from,
+        "date_to": date_to,
+        "meal": meal,
+        "restaurant": restaurant
+    }
+    return {k: v for k, v in params.items() if v is not None}
+
+# Requêtes et lecture des réponses, communes aux outils synchrones et asyncio
+ENDPOINT = "reservations"
+
+def _reservation_list(results) -> Reservation:
+    return Reservation(count=len(results), next=None, previous=None, results=results)
+
+def _reservation_body(client, restaurant, date, meal, number_of_guests, special_requests):
+    return {
+        "client": client,
+        "restaurant": restaurant,
+        "date": date,
+        "meal": meal,
+        "number_of_guests": number_of_guests,
+        "special_requests": special_requests
+    }
+
+def _patch_body(**fields):
+    return {k: v for k, v in _reservation_body(**fields).items() if v is not None}
+
+def _saved_reservation(result) -> ReservationDetail:
+    reservation = ReservationDetail(**result)
+    reservation_cache.put(reservation)
+    return reservation
+
+def _deleted_reservation(reservation_id):
+    reservation_cache.remove(reservation_id)
+    print(f"Reservation with ID {reservation_id} deleted successfully.")
+
+def _cached_query(params, fresh):
+    """(cache key, cached reservations) of a query over every page."""
+    key = reservation_cache.query_key(params)
+    return key, reservation_cache.query(key) if key and not fresh else None
+
+def _stored_query(key, rows) -> list[ReservationDetail]:
+    results = [ReservationDetail(**r) for r in rows]
+    if key:
+        reservation_cache.store_query(key, results)
+    return results
+
+def fetch_reservations(params, fresh=False) -> list[ReservationDetail]:
+    """Every reservation matching `params`, served from the reservation cache when possible (never when `fresh`)."""
+    key, cached = _cached_query(params, fresh)
+    if cached is not None:
+        return cached
+    return _stored_query(key, fetch_all_pages(ENDPOINT, params))
+
+async def afetch_reservations(params, fresh=False) -> list[ReservationDetail]:
+    key, cached = _cached_query(params, fresh)
+    if cached is not None:
+        return cached
+    return _stored_query(key, await afetch_all_pages(ENDPOINT, params))
+
+def _cached_page(params, page_number):
+    """(cache key, cached first page) of a single page query."""
+    key = reservation_cache.query_key(params) if page_number in (None, 1) else None
+    cached = reservation_cache.query(key) if key else None
+    if cached is not None:
+        return key, _reservation_list(cached)
+    return key, None
+
+def _page_params(params, page_number):
+    return {**params, "page": page_number} if page_number is not None else params
+
+def _stored_page(key, result) -> Reservation:
+    reservation = Reservation(**result)
+    # Une première page sans suite contient toute la requête
+    if key and reservation.next is None:
+        reservation_cache.store_query(key, reservation.results)
+    return reservation
+
+def get_reservations(page_number=None, client_id=None, date_from=None, date_to=None, meal=None, restaurant=None, all_pages=False) -> Reservation:
     """
     Get all reservations.
-    You can sum up the number of guests for each reservation to get the total number of guests for a specific date and restaurant.
+    To know if a restaurant still has room for a date and meal, use check_availability instead of summing up the guests.
 
     Args:
         page_number (int, optional): The page number for pagination.
@@ -30,24 +131,20 @@ def get_reservations(page_number=None, client_id=None, date_from=None, date_to=N
         date_to (str, optional): Filter by end date (YYYY-MM-DD).
         meal (int, optional): Filter by meal type ID.
         restaurant (int, optional): Filter by restaurant ID.
+        all_pages (bool, optional): Return every matching reservation at once instead of a single page.
 
     Returns:
         Reservation: A Pydantic model containing reservation details.
     """
     try:
-        api_client = ApiClient()
-        endpoint = "reservations"
-
-        params = {
-            "page": page_number,
-            "client": client_id,
-            "date_from": date_from,
-            "date_to": date_to,
-            "meal": meal,
-            "restaurant": restaurant
-        }
-        result = api_client.get(endpoint, params={k: v for k, v in params.items() if v is not None})
-        return Reservation(**result)
+        params = _reservation_filters(client_id, date_from, date_to, meal, restaurant)
+        if all_pages:
+            return _reservation_list(fetch_reservations(params))
+
+        key, cached = _cached_page(params, page_number)
+        if cached is not None:
+            return cached
+        return _stored_page(key, get_api_client().get(ENDPOINT, params=_page_params(params, page_number)))
     except Exception as e:
         print(f"Error: {e}")
         raise ToolException(e)
@@ -64,11 +161,10 @@ def get_reservation_by_id(reservation_id: int) -> ReservationDetail:
         ReservationDetail: A Pydantic model containing reservation details.
     """
     try:
-        api_client = ApiClient()
-        endpoint = "reservations"
-
-        result = api_client.get(f"{endpoint}/{reservation_id}")
-        return ReservationDetail(**result)
+        cached = reservation_cache.get(reservation_id)
+        if cached is not None:
+            return cached
+        return _saved_reservation(get_api_client().get(f"{ENDPOINT}/{reservation_id}"))
     except Exception as e:
         print(f"Error: {e}")
         raise ToolException(e)
@@ -78,8 +174,9 @@ def create_reservation(client: int, restaurant: int, date: str, meal: int, numbe
     """
     Create a new reservation.
     Before that you need to get the client ID then the meal ID by searching it and the restaurant ID and check if the client already have a reservation in the same date and restaurant for the meal.
-    You need also to check and propose restaurant available for the meal (Breakfast: 7:00-10:00, Launch: 11:00-15:00, Dinner: 16:00-23:00).
-    And ensure the capacity of the restaurant is not exceeded for the date given.
+    Then call check_availability once: it tells for each restaurant whether it is open for the meal (Breakfast: 7:00-10:00, Lunch: 11:00-15:00, Dinner: 16:00-23:00)
+    and whether its capacity would be exceeded for the date given; only book a restaurant marked available.
+    To book from the client's name, restaurant name and meal name, prefer book_table which does all of this in one call.
 
     Args:
         client (int): The ID of the client making the reservation.
@@ -93,18 +190,9 @@ def create_reservation(client: int, restaurant: int, date: str, meal: int, numbe
         ReservationDetail: A Pydantic model containing the created reservation details.
     """
     try:
-        api_client = ApiClient()
-        endpoint = "reservations"
-
-        result = api_client.post(f"{endpoint}/", json={
-            "client": client,
-            "restaurant": restaurant,
-            "date": date,
-            "meal": meal,
-            "number_of_guests": number_of_guests,
-            "special_requests": special_requests
-        })
-        return ReservationDetail(**result)
+        return _saved_reservation(get_api_client().post(f"{ENDPOINT}/", json=_reservation_body(
+            client, restaurant, date, meal, number_of_guests, special_requests
+        )))
     except Exception as e:
         print(f"Error: {e}")
         raise ToolException(e)
@@ -128,18 +216,9 @@ def update_reservation(reservation_id: int, client: int, restaurant: int, date:
         ReservationDetail: A Pydantic model containing the updated reservation details.
     """
     try:
-        api_client = ApiClient()
-        endpoint = "reservations"
-
-        result = api_client.put(f"{endpoint}/{reservation_id}/", json={
-            "client": client,
-            "restaurant": restaurant,
-            "date": date,
-            "meal": meal,
-            "number_of_guests": number_of_guests,
-            "special_requests": special_requests
-        })
-        return ReservationDetail(**result)
+        return _saved_reservation(get_api_client().put(f"{ENDPOINT}/{reservation_id}/", json=_reservation_body(
+            client, restaurant, date, meal, number_of_guests, special_requests
+        )))
     except Exception as e:
         print(f"Error: {e}")
         raise ToolException(e)
@@ -162,19 +241,9 @@ def update_reservation_with_patch(reservation_id: int, client: int = None, resta
         ReservationDetail: A Pydantic model containing the updated reservation details.
     """
     try:
-        api_client = ApiClient()
-        endpoint = "reservations"
-
-        updated_data = {
-            "client": client,
-            "restaurant": restaurant,
-            "date": date,
-            "meal": meal,
-            "number_of_guests": number_of_guests,
-            "special_requests": special_requests
-        }
-        result = api_client.patch(f"{endpoint}/{reservation_id}/", json={k: v for k, v in updated_data.items() if v is not None})
-        return ReservationDetail(**result)
+        return _saved_reservation(get_api_client().patch(f"{ENDPOINT}/{reservation_id}/", json=_patch_body(
+            client=client, restaurant=restaurant, date=date, meal=meal, number_of_guests=number_of_guests, special_requests=special_requests
+        )))
     except Exception as e:
         print(f"Error: {e}")
         raise ToolException(e)
@@ -191,11 +260,233 @@ def delete_reservation(reservation_id: int) -> None:
         None
     """
     try:
-        api_client = ApiClient()
-        endpoint = "reservations"
+        get_api_client().delete(f"{ENDPOINT}/{reservation_id}/")
+        _deleted_reservation(reservation_id)
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
+
+@tool("get_reservations", description=get_reservations.__doc__)
+async def aget_reservations(page_number=None, client_id=None, date_from=None, date_to=None, meal=None, restaurant=None, all_pages=False) -> Reservation:
+    try:
+        params = _reservation_filters(client_id, date_from, date_to, meal, restaurant)
+        if all_pages:
+            return _reservation_list(await afetch_reservations(params))
+
+        key, cached = _cached_page(params, page_number)
+        if cached is not None:
+            return cached
+        return _stored_page(key, await get_async_api_client().get(ENDPOINT, params=_page_params(params, page_number)))
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
+
+@tool("get_reservation_by_id", description=get_reservation_by_id.description)
+async def aget_reservation_by_id(reservation_id: int) -> ReservationDetail:
+    try:
+        cached = reservation_cache.get(reservation_id)
+        if cached is not None:
+            return cached
+        return _saved_reservation(await get_async_api_client().get(f"{ENDPOINT}/{reservation_id}"))
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
+
+@tool("create_reservation", description=create_reservation.description)
+async def acreate_reservation(client: int, restaurant: int, date: str, meal: int, number_of_guests: int, special_requests: str="") -> ReservationDetail:
+    try:
+        return _saved_reservation(await get_async_api_client().post(f"{ENDPOINT}/", json=_reservation_body(
+            client, restaurant, date, meal, number_of_guests, special_requests
+        )))
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
+
+@tool("update_reservation", description=update_reservation.description)
+async def aupdate_reservation(reservation_id: int, client: int, restaurant: int, date: str, meal: int, number_of_guests: int, special_requests: str | None) -> ReservationDetail:
+    try:
+        return _saved_reservation(await get_async_api_client().put(f"{ENDPOINT}/{reservation_id}/", json=_reservation_body(
+            client, restaurant, date, meal, number_of_guests, special_requests
+        )))
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
+
+@tool("update_reservation_with_patch", description=update_reservation_with_patch.description)
+async def aupdate_reservation_with_patch(reservation_id: int, client: int = None, restaurant: int = None, date: str = None, meal: int = None, number_of_guests: int = None, special_requests: str = None) -> ReservationDetail:
+    try:
+        return _saved_reservation(await get_async_api_client().patch(f"{ENDPOINT}/{reservation_id}/", json=_patch_body(
+            client=client, restaurant=restaurant, date=date, meal=meal, number_of_guests=number_of_guests, special_requests=special_requests
+        )))
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
+
+@tool("delete_reservation", description=delete_reservation.description)
+async def adelete_reservation(reservation_id: int) -> None:
+    try:
+        await get_async_api_client().delete(f"{ENDPOINT}/{reservation_id}/")
+        _deleted_reservation(reservation_id)
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
+
+# Un verrou par (restaurant, date, repas), gardé le temps de vérifier puis de créer la réservation ;
+# supprimé dès que plus personne ne l'attend
+_booking_locks = KeyedLocks()
+
+def booking_lock(restaurant_id, date, meal_id):
+    return _booking_locks.hold((restaurant_id, date, meal_id))
+
+def abooking_lock(restaurant_id, date, meal_id):
+    # Même verrou que le chemin synchrone, attendu sans bloquer la boucle
+    return _booking_locks.ahold((restaurant_id, date, meal_id))
+
+def _refusal(reason, message, **ids) -> Booking:
+    return Booking(booked=False, reason=reason, message=message, **ids)
+
+def _match_name(name, items):
+    """Item whose name matches `name` exactly (accents, case and word order aside), else the only one containing it."""
+    key = normalize_name(name)
+    exact = [item for item in items if normalize_name(item.name) == key]
+    if exact:
+        return exact[0]
+    partial = [item for item in items if key and set(key.split()) <= set(normalize_name(item.name).split())]
+    return partial[0] if len(partial) == 1 else None
+
+def _resolve_booking(name, phone_number, restaurant_name, meal_name, date, restaurants, meals):
+    """Return (client, restaurant, meal, refusal), refusal being None when every name was resolved."""
+    # api.availability importe ce module : import local
+    from api.availability import MEAL_WINDOWS, meal_window
+
+    try:
+        Date.fromisoformat(date)
+    except ValueError:
+        return None, None, None, _refusal("invalid_date", f"{date} is not a date in the YYYY-MM-DD format.")
+
+    clients = client_index.lookup(name, phone_number)
+    if not clients and name:
+        # Nom approchant : jamais réservé d'office, le modèle fait confirmer le client puis rappelle avec le nom exact
+        candidates = client_index.lookup(name, phone_number, fuzzy=True)
+        if candidates:
+            names = ", ".join(f"{c.name} (room {c.room_number})" for c in candidates)
+            return None, None, None, _refusal(
+                "client_not_found",
+                f"No client is named exactly {name}. Close matches: {names}. Ask the client to confirm, then book again with the exact name."
+            )
+    if not clients:
+        return None, None, None, _refusal("client_not_found", "No client matches this name and phone number, create the client first.")
+    if len(clients) > 1:
+        names = ", ".join(f"{c.name} (room {c.room_number})" for c in clients)
+        return None, None, None, _refusal("ambiguous_client", f"Several clients match: {names}. Ask for the phone number.")
+    client = clients[0]
+
+    restaurant = _match_name(restaurant_name, [r for r in restaurants if r.is_active])
+    if restaurant is None:
+        names = ", ".join(r.name for r in restaurants if r.is_active)
+        return client, None, None, _refusal("restaurant_not_found", f"Unknown restaurant {restaurant_name}, the restaurants are: {names}.", client_id=client.id)
+
+    # "dîner" désigne le même repas que "Dinner" : même créneau horaire
+    meal = _match_name(meal_name, meals)
+    if meal is None:
+        window = MEAL_WINDOWS.get(meal_name.strip().lower())
+        meal = next((m for m in meals if window is not None and meal_window(m) == window), None)
+    if meal is None:
+        names = ", ".join(m.name for m in meals)
+        return client, restaurant, None, _refusal("meal_not_found", f"Unknown meal {meal_name}, the meals are: {names}.", client_id=client.id, restaurant_id=restaurant.id)
+
+    return client, restaurant, meal, None
+
+def _check_booking(client, restaurant, meal, date, guests, client_reservations, bucket):
+    """Refusal for a duplicate, a closed restaurant or a full one, else None; also returns the remaining seats."""
+    from api.availability import is_open_for_meal, meal_window
+
+    ids = dict(client_id=client.id, restaurant_id=restaurant.id, meal_id=meal.id)
+    remaining = restaurant.capacity - sum(r.number_of_guests for r in bucket if r.date == date and r.meal == meal.id)
+
+    duplicate = next((r for r in client_reservations if r.client == client.id and r.date == date and r.meal == meal.id), None)
+    if duplicate is not None:
+        refusal = _refusal("duplicate", f"{client.name} already has a reservation for this meal on {date} (ID {duplicate.id}).", remaining_seats=remaining, **ids)
+        refusal.reservation = duplicate
+        return refusal, remaining
+    if not is_open_for_meal(restaurant, meal_window(meal)):
+        return _refusal("closed", f"{restaurant.name} is not open for {meal.name} ({restaurant.opening_hours}).", remaining_seats=remaining, **ids), remaining
+    if remaining < guests:
+        return _refusal("full", f"{restaurant.name} only has {max(remaining, 0)} seats left for {meal.name} on {date}.", remaining_seats=max(remaining, 0), **ids), remaining
+    return None, remaining
+
+@tool
+def book_table(name: str, restaurant_name: str, meal_name: str, date: str, guests: int, phone_number: str | None = None, special_requests: str = "") -> Booking:
+    """
+    Book a table in one call, from the client's name (and phone number if known), the restaurant name, the meal name and the date.
+    It finds the client, restaurant and meal, checks that the client has no reservation for this meal on that date,
+    that the restaurant is open for the meal and has enough seats, then creates the reservation.
+    The checks read the backend directly (not the cache) and, within this server process, bookings for the same
+    restaurant, date and meal run one at a time; races with other workers still rely on the backend.
+    The client's name must match exactly; close matches are only listed in the message, to confirm with the client.
+    If booked is false, tell the client the message (reason: invalid_date, client_not_found, ambiguous_client, restaurant_not_found, meal_not_found, closed, duplicate or full).
+
+    Args:
+        name (str): The client's name.
+        restaurant_name (str): The restaurant's name.
+        meal_name (str): The meal's name (e.g. Breakfast, Lunch, Dinner).
+        date (str): The date of the reservation (YYYY-MM-DD).
+        guests (int): The number of guests for the reservation.
+        phone_number (str, optional): The client's phone number, to tell apart clients with the same name.
+        special_requests (str, optional): Special requests for the reservation.
+
+    Returns:
+        Booking: A Pydantic model containing the reservation, or the reason why it was refused.
+    """
+    try:
+        client, restaurant, meal, refusal = _resolve_booking(
+            name, phone_number, restaurant_name, meal_name, date, fetch_all_restaurants(), fetch_meals().results
+        )
+        if refusal is not None:
+            return refusal
+
+        # Vérification puis création sous le verrou du créneau, sur des données lues à l'instant (pas le cache)
+        with booking_lock(restaurant.id, date, meal.id):
+            # Doublon et capacité : deux requêtes indépendantes, lancées en même temps
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                client_reservations = executor.submit(fetch_reservations, _reservation_filters(client.id, date, date), True)
+                bucket = executor.submit(fetch_reservations, _reservation_filters(None, date, date, meal.id, restaurant.id), True)
+                refusal, remaining = _check_booking(client, restaurant, meal, date, guests, client_reservations.result(), bucket.result())
+            if refusal is not None:
+                return refusal
+
+            reservation = _saved_reservation(get_api_client().post(f"{ENDPOINT}/", json=_reservation_body(
+                client.id, restaurant.id, date, meal.id, guests, special_requests
+            )))
+        return Booking(booked=True, reservation=reservation, client_id=client.id, restaurant_id=restaurant.id, meal_id=meal.id, remaining_seats=remaining)
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
+
+@tool("book_table", description=book_table.description)
+async def abook_table(name: str, restaurant_name: str, meal_name: str, date: str, guests: int, phone_number: str | None = None, special_requests: str = "") -> Booking:
+    try:
+        restaurants, meals = await asyncio.gather(afetch_all_restaurants(), afetch_meals())
+        # La recherche du client (chargement de l'index, requête de repli) passe par le client HTTP synchrone
+        client, restaurant, meal, refusal = await asyncio.to_thread(
+            _resolve_booking, name, phone_number, restaurant_name, meal_name, date, restaurants, meals.results
+        )
+        if refusal is not None:
+            return refusal
+
+        async with abooking_lock(restaurant.id, date, meal.id):
+            client_reservations, bucket = await asyncio.gather(
+                afetch_reservations(_reservation_filters(client.id, date, date), fresh=True),
+                afetch_reservations(_reservation_filters(None, date, date, meal.id, restaurant.id), fresh=True)
+            )
+            refusal, remaining = _check_booking(client, restaurant, meal, date, guests, client_reservations, bucket)
+            if refusal is not None:
+                return refusal
 
-        api_client.delete(f"{endpoint}/{reservation_id}/")
-        print(f"Reservation with ID {reservation_id} deleted successfully.")
+            reservation = _saved_reservation(await get_async_api_client().post(f"{ENDPOINT}/", json=_reservation_body(
+                client.id, restaurant.id, date, meal.id, guests, special_requests
+            )))
+        return Booking(booked=True, reservation=reservation, client_id=client.id, restaurant_id=restaurant.id, meal_id=meal.id, remaining_seats=remaining)
     except Exception as e:
         print(f"Error: {e}")
         raise ToolException(e)
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Filtres d'une requête mise en cache : (restaurant, date, meal, client), None = pas de filtre
+FIELDS = ("restaurant", "date", "meal", "client")
+
+
+def _matches(key, reservation) -> bool:
+    return all(value is None or value == getattr(reservation, field) for field, value in zip(FIELDS, key))
+
+
+class ReservationCache:
+    """
+    Reservations seen by the tools, indexed by ID and by query filters, i.e.
+    (restaurant, date, meal) buckets and clients, served for up to `max_staleness` seconds.
+
+    Only complete result sets (every page of a single-date query) are kept for a
+    query. The write tools update the cache with the backend's responses: a
+    created or updated reservation is added to the buckets it now matches and
+    removed from the others, a deleted one is removed everywhere. Other buckets
+    are left untouched. Callers get copies, so the cached reservations cannot be
+    changed by a caller editing what it was served.
+    """
+
+    def __init__(self, max_staleness=None, max_queries=1000):
+        self._max_staleness = max_staleness
+        self.max_queries = max_queries
+        self._lock = threading.Lock()
+        # id -> (ReservationDetail, stocké à)
+        self._by_id = {}
+        # filtres -> ({id: None} ordonné, chargé à)
+        self._queries = OrderedDict()
+        self._stats = {"by_id": {"hits": 0, "misses": 0}, "queries": {"hits": 0, "misses": 0}, "write_through": 0}
+
+    @property
+    def max_staleness(self):
+        if self._max_staleness is None:
+            self._max_staleness = float(os.getenv("RESERVATION_CACHE_STALENESS") or "30")
+        return self._max_staleness
+
+    @staticmethod
+    def query_key(params):
+        """Cache key of a get_reservations query, or None when it cannot be served from the cache."""
+        date_from, date_to = params.get("date_from"), params.get("date_to")
+        # Plages de dates : non indexées
+        if date_from != date_to:
+            return None
+        try:
+            return (
+                int(params["restaurant"]) if params.get("restaurant") is not None else None,
+                str(date_from) if date_from is not None else None,
+                int(params["meal"]) if params.get("meal") is not None else None,
+                int(params["client"]) if params.get("client") is not None else None,
+            )
+        except (TypeError, ValueError):
+            return None
+
+    def _fresh(self, stored_at):
+        return time.monotonic() - stored_at <= self.max_staleness
+
+    def get(self, reservation_id):
+        with self._lock:
+            entry = self._by_id.get(reservation_id)
+            if entry is not None and self._fresh(entry[1]):
+                self._stats["by_id"]["hits"] += 1
+                return entry[0].model_copy()
+            self._stats["by_id"]["misses"] += 1
+            return None
+
+    def query(self, key):
+        """Return the cached reservations of a query, or None on a miss."""
+        with self._lock:
+            entry = self._queries.get(key)
+            if entry is not None and self._fresh(entry[1]):
+                ids, _ = entry
+                results = [self._by_id[i][0].model_copy() for i in ids if i in self._by_id]
+                if len(results) == len(ids):
+                    self._queries.move_to_end(key)
+                    self._stats["queries"]["hits"] += 1
+                    return results
+            self._queries.pop(key, None)
+            self._stats["queries"]["misses"] += 1
+            return None
+
+    def store_query(self, key, reservations):
+        now = time.monotonic()
+        with self._lock:
+            for reservation in reservations:
+                self._by_id[reservation.id] = (reservation, now)
+            self._queries[key] = (dict.fromkeys(r.id for r in reservations), now)
+            self._queries.move_to_end(key)
+            while len(self._queries) > self.max_queries:
+                self._queries.popitem(last=False)
+            self._prune(now)
+
+    def _prune(self, now):
+        # Réservations qui ne sont plus référencées et trop anciennes pour être servies
+        if len(self._by_id) <= self.max_queries * 10:
+            return
+        referenced = {i for ids, _ in self._queries.values() for i in ids}
+        for reservation_id in [i for i, (_, stored_at) in self._by_id.items()
+                               if i not in referenced and now - stored_at > self.max_staleness]:
+            del self._by_id[reservation_id]
+
+    def put(self, reservation):
+        """Write-through of a created or updated reservation."""
+        with self._lock:
+            self._by_id[reservation.id] = (reservation, time.monotonic())
+            for key, (ids, _) in self._queries.items():
+                if _matches(key, reservation):
+                    ids[reservation.id] = None
+                else:
+                    ids.pop(reservation.id, None)
+            self._stats["write_through"] += 1
+
+    def remove(self, reservation_id):
+        """Write-through of a deleted reservation."""
+        with self._lock:
+            self._by_id.pop(reservation_id, None)
+            for ids, _ in self._queries.values():
+                ids.pop(reservation_id, None)
+            self._stats["write_through"] += 1
+
+    def invalidate(self, restaurant=None, date=None, meal=None):
+        """Drop the queries overlapping a (restaurant, date, meal) bucket, or everything."""
+        with self._lock:
+            if restaurant is None and date is None and meal is None:
+                self._by_id.clear()
+                self._queries.clear()
+                return
+            bucket = (restaurant, date, meal)
+            for key in [key for key in self._queries
+                        if all(a is None or b is None or a == b for a, b in zip(key, bucket))]:
+                del self._queries[key]
+
+    def stats(self):
+        with self._lock:
+            stats = {name: dict(counts) if isinstance(counts, dict) else counts for name, counts in self._stats.items()}
+            stats.update(cached_reservations=len(self._by_id), cached_queries=len(self._queries))
+        for name in ("by_id", "queries"):
+            total = stats[name]["hits"] + stats[name]["misses"]
+            stats[name]["hit_rate"] = round(stats[name]["hits"] / total, 3) if total else 0.0
+        return stats
+
+
+reservation_cache = ReservationCache()
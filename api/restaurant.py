@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from api.api_client import ApiClient
+from api.api_client import get_api_client, get_async_api_client
+from api.cache import reference_cache
 
 from langchain_core.tools import tool, ToolException
 
@@ -18,6 +19,38 @@ class Restaurant(BaseModel):
     previous: str | None = Field(description="The URL to the previous page")
     results: list[RestaurantDetail] = Field(description="The list of restaurants")
 
+def fetch_restaurants(page_number: int = 1) -> Restaurant:
+    def load():
+        result = get_api_client().get("restaurants", params={"page": page_number})
+        return Restaurant(**result)
+
+    return reference_cache.get_or_load(("restaurants", page_number), load)
+
+async def afetch_restaurants(page_number: int = 1) -> Restaurant:
+    async def load():
+        result = await get_async_api_client().get("restaurants", params={"page": page_number})
+        return Restaurant(**result)
+
+    return await reference_cache.aget_or_load(("restaurants", page_number), load)
+
+def fetch_all_restaurants() -> list[RestaurantDetail]:
+    page_number, restaurants = 1, []
+    while True:
+        page = fetch_restaurants(page_number)
+        restaurants.extend(page.results)
+        if not page.next:
+            return restaurants
+        page_number += 1
+
+async def afetch_all_restaurants() -> list[RestaurantDetail]:
+    page_number, restaurants = 1, []
+    while True:
+        page = await afetch_restaurants(page_number)
+        restaurants.extend(page.results)
+        if not page.next:
+            return restaurants
+        page_number += 1
+
 @tool
 def get_restaurants(page_number: int = 1) -> Restaurant:
     """
@@ -32,11 +65,15 @@ def get_restaurants(page_number: int = 1) -> Restaurant:
         Restaurant: A Pydantic model containing restaurant details.
     """
     try:
-        api_client = ApiClient()
-        endpoint = "restaurants"
+        return fetch_restaurants(page_number)
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
 
-        result = api_client.get(endpoint, params={"page": page_number})
-        return Restaurant(**result)
+@tool("get_restaurants", description=get_restaurants.description)
+async def aget_restaurants(page_number: int = 1) -> Restaurant:
+    try:
+        return await afetch_restaurants(page_number)
     except Exception as e:
         print(f"Error: {e}")
         raise ToolException(e)
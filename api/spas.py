@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from api.api_client import ApiClient
+from api.api_client import get_api_client, get_async_api_client
+from api.cache import reference_cache
 from typing import List
 
 from langchain_core.tools import tool, ToolException
@@ -15,6 +16,18 @@ class Spa(BaseModel):
     created_at: str = Field(description="The creation timestamp of the spa")
     updated_at: str = Field(description="The last update timestamp of the spa")
 
+def fetch_spas() -> List[Spa]:
+    def load():
+        return [Spa(**spa) for spa in get_api_client().get("spas")]
+
+    return reference_cache.get_or_load(("spas",), load)
+
+async def afetch_spas() -> List[Spa]:
+    async def load():
+        return [Spa(**spa) for spa in await get_async_api_client().get("spas")]
+
+    return await reference_cache.aget_or_load(("spas",), load)
+
 @tool
 def get_spas() -> List[Spa]:
     """
@@ -24,11 +37,16 @@ def get_spas() -> List[Spa]:
         List[Spa]: A list of Pydantic model instances containing the details of spas.
     """
     try:
-        api_client = ApiClient()
-        endpoint = "spas"
+        # Spas déjà validés, servis depuis le cache de référence
+        return fetch_spas()
+    except Exception as e:
+        print(f"Error: {e}")
+        raise ToolException(e)
 
-        result = api_client.get(endpoint)
-        return [Spa(**spa) for spa in result]  # Convert each item in the list to a Spa instance
+@tool("get_spas", description=get_spas.description)
+async def aget_spas() -> List[Spa]:
+    try:
+        return await afetch_spas()
     except Exception as e:
         print(f"Error: {e}")
         raise ToolException(e)
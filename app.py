@@ -1,19 +1,307 @@
-from flask import Flask, jsonify, request, render_template, send_from_directory
-from bot import send_request
+# En premier : avec STARTUP_PROFILE=1, mesure le temps d'import de tout ce qui suit
+import startup
+import hmac
+import io
+import json
+import os
+import time
+from flask import Flask, Response, abort, g, jsonify, request, render_template, send_file, send_from_directory, stream_with_context, url_for
+from bot import send_request, asend_request, stream_request, speech_params, sessions
+from sessions import issue_session_token, session_from_token
+from tts import AUDIO_FORMATS, audio_format, stream_audio
+from tts_worker import tts_pool
+from audio_store import audio_store, speech_texts
+from asset_pipeline import asset_pipeline
+from api.api_client import get_api_client
+from api.cache import reference_cache
+from api.reservation_cache import reservation_cache
+from router import intent_router
+from admission import Overloaded, llm_limiter, tts_limiter
+from web_search import search_cache
+import metrics
 
-app = Flask(__name__)
+startup.print_import_profile()
+
+# /static et /assets sont servis par _send_asset, depuis le build du pipeline d'assets
+app = Flask(__name__, static_folder=None)
+
+startup.component("assets", asset_pipeline.build)
+if os.getenv("ASSET_PIPELINE", "1") != "0":
+    startup.warm_in_background(["assets"])
+
+ASSET_ROOTS = {'static': 'static', 'serve_assets': 'assets'}
+
+@app.before_request
+def start_timing():
+    g.start = time.perf_counter()
+    g.timings = metrics.start_request_timings()
+    metrics.http_in_flight.labels(route=request.endpoint or "unknown").inc()
+
+@app.after_request
+def record_timing(response):
+    route = request.endpoint or "unknown"
+    seconds = time.perf_counter() - g.start
+    metrics.http_in_flight.labels(route=route).dec()
+    metrics.http_seconds.labels(route=route, status=response.status_code).observe(seconds)
+    # Détail par étape (llm, tool, api, tts) ; pour les réponses streamées, seulement ce qui précède le premier octet
+    if metrics.server_timing_enabled():
+        stages = g.timings.header()
+        response.headers['Server-Timing'] = f"total;dur={seconds * 1000:.1f}" + (f", {stages}" if stages else "")
+    return response
+
+@app.errorhandler(Overloaded)
+def overloaded(e):
+    # Refus immédiat plutôt qu'une attente qui ferait expirer la requête de toute façon
+    response = jsonify(error=str(e), limiter=e.limiter, retry_after=e.retry_after)
+    response.status_code = 503
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def _assets():
+    if os.getenv("ASSET_PIPELINE", "1") == "0":
+        return None
+    return startup.components["assets"].get_nowait()
+
+@app.url_defaults
+def hashed_asset_urls(endpoint, values):
+    # url_for('static', ...) donne le nom haché, à mettre en cache pour toujours, dès que le build est prêt
+    pipeline = _assets() if endpoint in ASSET_ROOTS else None
+    if pipeline and 'filename' in values:
+        values['filename'] = pipeline.hashed_url(ASSET_ROOTS[endpoint], values['filename']) or values['filename']
+
+@app.context_processor
+def asset_manifest():
+    # Pour main.js : chemin d'origine -> URL hachée des modèles et animations
+    pipeline = _assets()
+    return dict(asset_manifest=pipeline.manifest() if pipeline else {})
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def _stream_requested():
+    # stream : synthèse à la volée par /receptionist/speech, file : un fichier audio par réponse,
+    # worker : idem mais synthétisé par le pool TTS, le texte est renvoyé sans l'attendre
+    return request.args.get('stream', '1' if os.getenv('TTS_MODE', 'stream') == 'stream' else '0') == '1'
+
+def _session_id():
+    """(session ID, signed token): the caller's session, or a new one if its token was not issued here."""
+    # En-tête pour les clients API, cookie pour le navigateur
+    token = request.headers.get('X-Session-Id') or request.cookies.get('session_id')
+    session_id = session_from_token(token)
+    if session_id is None:
+        token = issue_session_token()
+        session_id = session_from_token(token)
+    return session_id, token
+
+def _tts_ready():
+    # Démarre le chargement du TTS s'il n'a pas encore commencé
+    return startup.components["tts"].get_nowait() is not None
+
+def _reply_payload(reply, stream, token):
+    # TTS saturé : réponse texte seule, sans lien vers une synthèse qui serait refusée
+    if stream and _tts_ready() and not tts_limiter.saturated():
+        # Le texte reste côté serveur : l'URL ne porte que son ID
+        audio_url = url_for('stream_speech', speech_id=speech_texts.save(reply["text"]))
+    elif not stream and reply["audio_id"]:
+        audio_url = url_for('serve_audio', audio_id=reply["audio_id"], extension=audio_format())
+    else:
+        audio_url = None
+    # Job du pool TTS : à suivre jusqu'à ce que l'audio soit prêt
+    job = not stream and reply["audio_id"] and tts_pool.has_job(reply["audio_id"])
+    audio_status_url = url_for('audio_job_status', job_id=reply["audio_id"]) if job else None
+    return dict(text=reply["text"], audio_id=reply["audio_id"], audio_url=audio_url, audio_status_url=audio_status_url, session_id=token)
+
+def _reply(reply, stream, token):
+    response = jsonify(_reply_payload(reply, stream, token))
+    response.set_cookie('session_id', token, httponly=True, samesite='Lax')
+    return response
+
 @app.route('/receptionist', methods=['GET'])
 def chat_with_receptionist():
-    return send_request(request.args.get('message'))
+    stream = _stream_requested()
+    session_id, token = _session_id()
+    return _reply(send_request(request.args.get('message'), session_id, audio=not stream), stream, token)
+
+@app.route('/receptionist/async', methods=['GET'])
+async def chat_with_receptionist_async():
+    stream = _stream_requested()
+    session_id, token = _session_id()
+    return _reply(await asend_request(request.args.get('message'), session_id, audio=not stream), stream, token)
+
+@app.route('/backend', methods=['GET'])
+def backend_stats():
+    client = get_api_client()
+    return jsonify(connections=client.connection_stats(), coalescing=client.coalesce_stats())
+
+@app.route('/sessions', methods=['GET'])
+def sessions_stats():
+    return jsonify(sessions.stats())
+
+@app.route('/receptionist/events', methods=['GET'])
+def chat_with_receptionist_events():
+    stream = _stream_requested()
+    session_id, token = _session_id()
+    message = request.args.get('message')
+
+    # Server-Sent Events : outils en cours puis réponse token par token
+    def events():
+        try:
+            for event, data in stream_request(message, session_id, audio=not stream):
+                if event == 'done':
+                    data = _reply_payload(data, stream, token)
+                yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        except Overloaded as e:
+            # Les en-têtes sont déjà partis : le refus passe par un événement
+            yield f"event: error\ndata: {json.dumps(dict(error=str(e), retry_after=e.retry_after))}\n\n"
+
+    response = Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    response.set_cookie('session_id', token, httponly=True, samesite='Lax')
+    return response
+
+@app.route('/audio/<audio_id>.<extension>')
+def serve_audio(audio_id, extension):
+    if extension not in AUDIO_FORMATS:
+        abort(404)
+    audio = audio_store.get(audio_id, extension)
+    if audio is None:
+        # Job encore en cours dans le pool TTS : 202 et l'URL de son état, plutôt que de bloquer le worker web
+        status = tts_pool.status(audio_id)
+        if status is not None and status["status"] in ('queued', 'running'):
+            response = jsonify(status=status["status"], status_url=url_for('audio_job_status', job_id=audio_id))
+            response.status_code = 202
+            response.headers['Retry-After'] = '1'
+            response.headers['Cache-Control'] = 'no-store'
+            return response
+        abort(404)
+    # conditional : ETag et requêtes Range (le lecteur audio du navigateur en envoie)
+    mimetype = AUDIO_FORMATS[extension][2]
+    if isinstance(audio, bytes):
+        response = send_file(io.BytesIO(audio), mimetype=mimetype, conditional=True, etag=audio_id)
+    else:
+        response = send_file(audio, mimetype=mimetype, conditional=True, etag=audio_id)
+    # Chaque réponse a son propre ID : le contenu ne change jamais
+    response.headers['Cache-Control'] = f'private, max-age={int(audio_store.max_age)}, immutable'
+    return response
+
+@app.route('/audio/jobs/<job_id>', methods=['GET'])
+def audio_job_status(job_id):
+    status = tts_pool.status(job_id)
+    if status is None:
+        abort(404)
+    return jsonify(status)
+
+@app.route('/tts', methods=['GET'])
+def tts_stats():
+    return jsonify(tts_pool.stats())
+
+@app.route('/receptionist/speech/<speech_id>', methods=['GET'])
+def stream_speech(speech_id):
+    # Seules les réponses de l'agent sont synthétisées, jamais un texte fourni par l'appelant
+    reply = speech_texts.get(speech_id)
+    if reply is None:
+        abort(404)
+    if not _tts_ready():
+        return Response('TTS is warming up', status=503, headers={'Retry-After': '5'})
+    text, speed = speech_params(reply)
+    # Créneau TTS gardé jusqu'à la fin de l'envoi du flux (503 si la file est pleine)
+    granted_at = tts_limiter.acquire()
+    response = Response(
+        stream_with_context(stream_audio('fr', text, speed)),
+        mimetype='audio/wav',
+        headers={'Cache-Control': 'no-store'}
+    )
+    response.call_on_close(lambda: tts_limiter.release(granted_at))
+    return response
+
+@app.route('/admission', methods=['GET'])
+def admission_stats():
+    return jsonify(llm=llm_limiter.stats(), tts=tts_limiter.stats())
+
+@app.route('/ready', methods=['GET'])
+def readiness():
+    # Prêt dès que l'agent peut répondre en texte ; le TTS peut encore chauffer
+    status = startup.ready()
+    ready = status["components"]["agent"]["state"] == "warm"
+    return jsonify(ready=ready, **status), 200 if ready else 503
+
+@app.route('/router', methods=['GET'])
+def router_stats():
+    return jsonify(intent_router.stats())
+
+def _require_admin():
+    """403 unless the request carries ADMIN_TOKEN in X-Admin-Token (always, when no ADMIN_TOKEN is set)."""
+    expected = os.getenv('ADMIN_TOKEN') or ''
+    given = request.headers.get('X-Admin-Token') or ''
+    if not expected or not hmac.compare_digest(given.encode(), expected.encode()):
+        abort(403)
+
+@app.route('/cache/reference', methods=['GET', 'DELETE'])
+def reference_cache_stats():
+    if request.method == 'DELETE':
+        # Vider un cache coûte des appels à l'API pour tout le monde : réservé à l'exploitation
+        _require_admin()
+        reference_cache.invalidate(request.args.get('namespace'))
+    return jsonify(reference_cache.stats())
+
+@app.route('/cache/reservations', methods=['GET', 'DELETE'])
+def reservation_cache_stats():
+    if request.method == 'DELETE':
+        _require_admin()
+        reservation_cache.invalidate(
+            request.args.get('restaurant', type=int), request.args.get('date'), request.args.get('meal', type=int)
+        )
+    return jsonify(reservation_cache.stats())
+
+def _send_asset(root, filename):
+    pipeline = _assets()
+    found = pipeline.resolve(root, filename) if pipeline else None
+    if found is None:
+        # Pas (encore) dans le build : fichier d'origine, revalidé à chaque fois
+        return send_from_directory(root, filename, max_age=0)
+
+    entry, immutable = found
+    # Une requête Range porte sur le fichier non compressé
+    encoding = None if request.range else pipeline.negotiate(entry, request.accept_encodings)
+    response = send_file(
+        pipeline.path(entry, encoding),
+        mimetype=entry["mimetype"],
+        conditional=True,
+        etag=f'{entry["hash"]}-{encoding}' if encoding else entry["hash"],
+    )
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable' if immutable else 'no-cache'
+    return response
+
+@app.route('/static/<path:filename>', endpoint='static')
+def serve_static(filename):
+    return _send_asset('static', filename)
+
+@app.route('/cache/search', methods=['GET', 'DELETE'])
+def search_cache_stats():
+    if request.method == 'DELETE':
+        _require_admin()
+        search_cache.clear()
+    return jsonify(search_cache.stats())
 
 @app.route('/assets/<path:filename>')
 def serve_assets(filename):
-    return send_from_directory('assets', filename)
+    return _send_asset('assets', filename)
+
+@app.route('/assets', methods=['GET'])
+def asset_stats():
+    pipeline = _assets()
+    return jsonify(pipeline.stats() if pipeline else {"state": startup.components["assets"].state})
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,262 @@
+"""
+Content-hashed, precompressed copies of the front-end files.
+
+    python asset_pipeline.py      # build ahead of time (brotli at quality 11 is slow)
+
+Every file of `static/` and `assets/` is copied into ASSET_DIR under a name
+carrying the hash of its content (`assets/character.3f2a9c1b0d4e.glb`), so that
+it can be cached forever by the browser, next to its `.gz` and `.br` variants.
+CSS `url()` references are rewritten to the hashed names. Unchanged files are
+reused from the previous build, which is recorded in `manifest.json`.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shlex
+import subprocess
+import tempfile
+import threading
+import time
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+mimetypes.add_type("model/gltf-binary", ".glb")
+mimetypes.add_type("font/ttf", ".ttf")
+mimetypes.add_type("text/javascript", ".js")
+
+# Les PNG sont déjà compressés : une variante gzip/brotli n'y gagnerait rien
+COMPRESSIBLE = {".css", ".js", ".json", ".svg", ".ttf", ".glb", ".html", ".txt"}
+# Une variante n'est gardée que si elle fait gagner au moins 10 %
+MIN_SAVING = 0.1
+
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+_HASHED = re.compile(r"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{12})(?P<ext>\.[^./]+)$")
+
+
+def _hashed_name(path, digest):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{digest}{ext}"
+
+
+class AssetPipeline:
+    """Builds the hashed copies, then resolves request paths and encodings to files of the build."""
+
+    ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+    def __init__(self, roots=("static", "assets"), build_dir=None):
+        self.roots = roots
+        self._build_dir = build_dir
+        self._lock = threading.Lock()
+        # "assets/character.glb" -> entrée du manifeste
+        self.entries = {}
+        self._by_file = {}
+        self.build_seconds = None
+
+    @property
+    def build_dir(self):
+        if self._build_dir is None:
+            self._build_dir = os.getenv("ASSET_DIR") or "cache/assets"
+        return self._build_dir
+
+    @staticmethod
+    def brotli_quality():
+        return int(os.getenv("ASSET_BROTLI_QUALITY") or "11")
+
+    @staticmethod
+    def glb_command():
+        # Ex. "npx --yes @gltf-transform/cli meshopt {input} {output}"
+        return os.getenv("ASSET_GLB_COMMAND") or ""
+
+    def _manifest_path(self):
+        return os.path.join(self.build_dir, "manifest.json")
+
+    def _sources(self):
+        for root in self.roots:
+            for directory, _, files in os.walk(root):
+                for name in sorted(files):
+                    yield os.path.join(directory, name).replace(os.sep, "/")
+
+    def _write(self, relative, data):
+        path = os.path.join(self.build_dir, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(data)
+        os.replace(f"{path}.tmp", path)
+
+    def _optimize_glb(self, source):
+        """Run ASSET_GLB_COMMAND (mesh/animation compression) on a GLB; the original bytes if it fails."""
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, os.path.basename(source))
+            command = self.glb_command().format(input=shlex.quote(source), output=shlex.quote(output))
+            try:
+                subprocess.run(shlex.split(command), check=True, capture_output=True, timeout=600)
+                with open(output, "rb") as f:
+                    return f.read()
+            except Exception as e:
+                print(f"Error: GLB optimization of {source} failed: {e}")
+        with open(source, "rb") as f:
+            return f.read()
+
+    def _rewrite_css(self, logical, data, entries):
+        """Point the relative url() of a stylesheet to the hashed names."""
+        directory = os.path.dirname(logical)
+
+        def hashed(match):
+            quote, url = match.groups()
+            if url.startswith(("data:", "http:", "https:", "/", "#")):
+                return match.group(0)
+            target = os.path.normpath(os.path.join(directory, url)).replace(os.sep, "/")
+            entry = entries.get(target)
+            if entry is None:
+                return match.group(0)
+            return f"url({quote}{_hashed_name(url, entry['hash'])}{quote})"
+
+        return _CSS_URL.sub(hashed, data.decode("utf-8")).encode("utf-8")
+
+    def _compress(self, relative, data):
+        """Write the gzip/brotli variants worth keeping; their sizes by encoding."""
+        variants = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants["br"] = brotli.compress(data, quality=self.brotli_quality())
+        kept = {}
+        for encoding, compressed in variants.items():
+            if len(compressed) <= len(data) * (1 - MIN_SAVING):
+                self._write(relative + self.ENCODINGS[encoding], compressed)
+                kept[encoding] = len(compressed)
+        return kept
+
+    def _reusable(self, previous, stat):
+        if previous is None or previous["mtime"] != stat.st_mtime or previous["source_size"] != stat.st_size:
+            return False
+        # Build fait sans le module brotli : on recompresse
+        if previous["compressible"] and brotli is not None and not previous["brotli"]:
+            return False
+        files = [previous["file"]] + [previous["file"] + self.ENCODINGS[e] for e in previous["encodings"]]
+        return all(os.path.exists(os.path.join(self.build_dir, f)) for f in files)
+
+    def _build_one(self, logical, previous, entries):
+        stat = os.stat(logical)
+        ext = os.path.splitext(logical)[1].lower()
+        # Une feuille de style dépend des noms hachés des fichiers qu'elle cite : toujours refaite
+        if ext != ".css" and self._reusable(previous, stat):
+            return previous
+
+        if ext == ".glb" and self.glb_command():
+            data = self._optimize_glb(logical)
+        else:
+            with open(logical, "rb") as f:
+                data = f.read()
+        if ext == ".css":
+            data = self._rewrite_css(logical, data, entries)
+
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        relative = _hashed_name(logical, digest)
+        if previous is not None and previous["file"] == relative and self._reusable(previous, stat):
+            return previous
+        self._write(relative, data)
+        compressible = ext in COMPRESSIBLE
+        return {
+            "file": relative,
+            "hash": digest,
+            "mimetype": mimetypes.guess_type(logical)[0] or "application/octet-stream",
+            "mtime": stat.st_mtime,
+            "source_size": stat.st_size,
+            "size": len(data),
+            "compressible": compressible,
+            "brotli": brotli is not None,
+            "encodings": self._compress(relative, data) if compressible else {},
+        }
+
+    def build(self):
+        """Bring the build directory up to date with the sources and load its manifest."""
+        start = time.perf_counter()
+        try:
+            with open(self._manifest_path(), encoding="utf-8") as f:
+                previous = json.load(f)
+        except (FileNotFoundError, ValueError):
+            previous = {}
+
+        sources = list(self._sources())
+        entries = {}
+        # Les CSS en dernier, une fois connus les noms hachés des images et polices
+        for logical in sorted(sources, key=lambda path: path.endswith(".css")):
+            entries[logical] = self._build_one(logical, previous.get(logical), entries)
+
+        self._write("manifest.json", json.dumps(entries, indent=2).encode("utf-8"))
+        with self._lock:
+            self.entries = entries
+            self._by_file = {entry["file"]: logical for logical, entry in entries.items()}
+        self.build_seconds = time.perf_counter() - start
+        return self
+
+    def _fresh(self, logical):
+        # Fichier modifié depuis le build (développement) : servi tel quel, sans nom haché
+        entry = self.entries.get(logical)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(logical)
+        except FileNotFoundError:
+            return None
+        return entry if stat.st_mtime == entry["mtime"] and stat.st_size == entry["source_size"] else None
+
+    def hashed_url(self, root, filename):
+        """Hashed filename (relative to `root`) of an up to date file, or None."""
+        entry = self._fresh(f"{root}/{filename}")
+        return entry["file"][len(root) + 1:] if entry else None
+
+    def resolve(self, root, filename):
+        """
+        (entry, immutable) for a requested path, or None if the build does not have it.
+
+        A hashed name of the current build is immutable; the plain name, or the
+        hashed name of an older build, is served from the current one but must
+        be revalidated.
+        """
+        relative = f"{root}/{filename}"
+        logical = self._by_file.get(relative)
+        if logical is not None:
+            return self.entries[logical], True
+        match = _HASHED.match(relative)
+        if match:
+            relative = match.group("stem") + match.group("ext")
+        entry = self._fresh(relative)
+        return (entry, False) if entry else None
+
+    def negotiate(self, entry, accept_encodings):
+        """Best precompressed encoding accepted by the client (br, then gzip), or None."""
+        for encoding in self.ENCODINGS:
+            if encoding in entry["encodings"] and accept_encodings.quality(encoding) > 0:
+                return encoding
+        return None
+
+    def path(self, entry, encoding=None):
+        return os.path.abspath(os.path.join(self.build_dir, entry["file"] + (self.ENCODINGS[encoding] if encoding else "")))
+
+    def manifest(self):
+        """Plain path -> hashed URL of every up to date file, for the scripts of the page."""
+        return {logical: f"/{entry['file']}" for logical, entry in self.entries.items() if self._fresh(logical)}
+
+    def stats(self):
+        with self._lock:
+            entries = list(self.entries.values())
+        return {
+            "files": len(entries),
+            "bytes": sum(entry["size"] for entry in entries),
+            "gzip_bytes": sum(entry["encodings"].get("gzip", entry["size"]) for entry in entries),
+            "br_bytes": sum(entry["encodings"].get("br", entry["size"]) for entry in entries) if brotli else None,
+            "build_seconds": round(self.build_seconds, 2) if self.build_seconds is not None else None,
+        }
+
+
+asset_pipeline = AssetPipeline()
+
+
+if __name__ == "__main__":
+    print(json.dumps(asset_pipeline.build().stats(), indent=2))
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def split_sentences(text: str):
+    return [sentence for sentence in re.split(r"(?<=[.!?…])\s+", normalize_text(text)) if sentence]
+
+
+class AudioCache:
+    """
+    Content-addressed on-disk cache of synthesized audio.
+
+    Each entry is a float32 .npy file named after the sha256 of
+    (language, voice, speed, normalized text). Reading an entry refreshes its
+    mtime, and the least recently used files are evicted once the directory
+    grows beyond `max_bytes`.
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def directory(self):
+        if self._directory is None:
+            self._directory = os.getenv("TTS_CACHE_DIR") or "cache/tts"
+        os.makedirs(self._directory, exist_ok=True)
+        return self._directory
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is None:
+            self._max_bytes = int(float(os.getenv("TTS_CACHE_MAX_MB") or "200") * 1024 * 1024)
+        return self._max_bytes
+
+    @staticmethod
+    def key(langue, voice, speed, text):
+        raw = f"{langue}\0{voice}\0{float(speed)}\0{normalize_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            audio = np.load(path)
+            os.utime(path)
+        except (FileNotFoundError, ValueError, OSError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return audio
+
+    def put(self, key, audio):
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.asarray(audio, dtype=np.float32))
+
+        with self._lock:
+            # Entrée réécrite (deux synthèses concurrentes de la même phrase) : l'ancien fichier ne compte plus
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            if self._size is not None:
+                self._size += os.path.getsize(path) - replaced
+            if self._size is None or self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npy"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        size = sum(entry[1] for entry in entries)
+        for mtime, entry_size, name in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+                size -= entry_size
+            except FileNotFoundError:
+                pass
+        self._size = size
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "bytes": self._size,
+            }
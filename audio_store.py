@@ -0,0 +1,192 @@
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+_AUDIO_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class AudioStore:
+    """
+    Per-reply audio artifacts, each under its own random ID.
+
+    In "disk" mode the files live in `directory`, so that any worker sharing it
+    can serve them. In "memory" mode the bytes stay in the process and never
+    touch the disk (the reply must then be fetched from the same worker).
+    In both modes artifacts older than `max_age` seconds, or beyond `max_bytes`
+    in total (oldest first), are garbage collected.
+    """
+
+    def __init__(self, mode=None, directory=None, max_age=None, max_bytes=None, gc_interval=30):
+        self._mode = mode
+        self._directory = directory
+        self._max_age = max_age
+        self._max_bytes = max_bytes
+        self.gc_interval = gc_interval
+        self._lock = threading.Lock()
+        self._last_gc = 0.0
+        # mode mémoire : audio_id -> (created_at, extension, bytes)
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+
+    @property
+    def mode(self):
+        if self._mode is None:
+            self._mode = os.getenv("AUDIO_STORE") or "disk"
+        return self._mode
+
+    @property
+    def directory(self):
+        if self._directory is None:
+            # Chemin absolu : send_file résout les chemins relatifs depuis app.root_path, pas le répertoire courant
+            self._directory = os.path.abspath(os.getenv("AUDIO_STORE_DIR") or "cache/audio")
+            os.makedirs(self._directory, exist_ok=True)
+        return self._directory
+
+    @property
+    def max_age(self):
+        if self._max_age is None:
+            self._max_age = float(os.getenv("AUDIO_MAX_AGE") or "600")
+        return self._max_age
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is None:
+            self._max_bytes = int(float(os.getenv("AUDIO_MAX_MB") or "100") * 1024 * 1024)
+        return self._max_bytes
+
+    def save(self, data: bytes, extension="wav", audio_id=None) -> str:
+        audio_id = audio_id or uuid.uuid4().hex
+        if self.mode == "memory":
+            with self._lock:
+                self._memory[audio_id] = (time.time(), extension, data)
+                self._memory_bytes += len(data)
+                self._collect_memory()
+        else:
+            path = os.path.join(self.directory, f"{audio_id}.{extension}")
+            with open(f"{path}.tmp", "wb") as f:
+                f.write(data)
+            os.replace(f"{path}.tmp", path)
+            if time.monotonic() - self._last_gc > self.gc_interval:
+                self.gc()
+        return audio_id
+
+    def get(self, audio_id, extension="wav"):
+        """Return the bytes (memory mode) or the file path (disk mode) of an artifact, or None."""
+        if not _AUDIO_ID.match(audio_id):
+            return None
+
+        if self.mode == "memory":
+            with self._lock:
+                artifact = self._memory.get(audio_id)
+            if artifact is None or artifact[1] != extension or time.time() - artifact[0] > self.max_age:
+                return None
+            return artifact[2]
+
+        path = os.path.join(self.directory, f"{audio_id}.{extension}")
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                return None
+        except FileNotFoundError:
+            return None
+        return path
+
+    def _collect_memory(self):
+        # Rangés par date de création : on purge par l'avant
+        now = time.time()
+        while self._memory:
+            audio_id, (created_at, extension, data) = next(iter(self._memory.items()))
+            if now - created_at <= self.max_age and self._memory_bytes <= self.max_bytes:
+                break
+            del self._memory[audio_id]
+            self._memory_bytes -= len(data)
+
+    def gc(self):
+        if self.mode == "memory":
+            with self._lock:
+                self._collect_memory()
+            return
+
+        with self._lock:
+            self._last_gc = time.monotonic()
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                self._remove(entry.path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size = sum(entry[1] for entry in entries)
+        for mtime, entry_size, path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            self._remove(path)
+            size -= entry_size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def stats(self):
+        if self.mode == "memory":
+            with self._lock:
+                return {"mode": "memory", "artifacts": len(self._memory), "bytes": self._memory_bytes}
+        sizes = [entry.stat().st_size for entry in os.scandir(self.directory)]
+        return {"mode": "disk", "artifacts": len(sizes), "bytes": sum(sizes)}
+
+
+class SpeechTexts:
+    """
+    Reply texts waiting to be streamed by /receptionist/speech, each under its own random ID.
+
+    The route only takes such an ID, so it can only speak what the agent answered.
+    Texts are kept `max_age` seconds (AUDIO_MAX_AGE), at most `max_entries` of
+    them (oldest dropped first), in this process only.
+    """
+
+    def __init__(self, max_age=None, max_entries=1000):
+        self._max_age = max_age
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # speech_id -> (created_at, texte)
+        self._texts = OrderedDict()
+
+    @property
+    def max_age(self):
+        if self._max_age is None:
+            self._max_age = float(os.getenv("AUDIO_MAX_AGE") or "600")
+        return self._max_age
+
+    def save(self, text: str) -> str:
+        speech_id = uuid.uuid4().hex
+        with self._lock:
+            self._texts[speech_id] = (time.time(), text)
+            now = time.time()
+            while self._texts:
+                created_at, _ = next(iter(self._texts.values()))
+                if now - created_at <= self.max_age and len(self._texts) <= self.max_entries:
+                    break
+                self._texts.popitem(last=False)
+        return speech_id
+
+    def get(self, speech_id):
+        """The text saved under `speech_id`, or None if unknown or expired."""
+        with self._lock:
+            entry = self._texts.get(speech_id)
+        if entry is None or time.time() - entry[0] > self.max_age:
+            return None
+        return entry[1]
+
+
+audio_store = AudioStore()
+speech_texts = SpeechTexts()
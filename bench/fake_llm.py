@@ -0,0 +1,98 @@
+"""
+Scripted chat model replaying recorded tool-calling transcripts, so that the bot
+can run offline (LLM_PROVIDER=fake, FAKE_LLM_TRANSCRIPTS=bench/transcripts.json).
+
+A transcript is a guest message and the model's successive replies for that turn:
+
+    {"user": "Quels sont les repas ?", "steps": [
+        {"tool_calls": [{"name": "get_meals", "args": {}}]},
+        {"content": "Nous servons le petit-déjeuner, le déjeuner et le dîner."}
+    ]}
+
+The transcript is picked by the guest's message (exact, then by the most shared
+words), and the step by the number of model calls already made in the turn.
+"""
+import json
+import os
+import re
+import time
+import uuid
+from datetime import date, timedelta
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+def load_transcripts(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def _fill_dates(value):
+    """Replace {today} and {tomorrow} in the recorded arguments, so that transcripts stay valid."""
+    if isinstance(value, str):
+        today = date.today()
+        return value.replace("{today}", today.isoformat()).replace("{tomorrow}", (today + timedelta(days=1)).isoformat())
+    if isinstance(value, dict):
+        return {k: _fill_dates(v) for k, v in value.items()}
+    return value
+
+def _words(text):
+    return set(re.findall(r"\w+", text.lower()))
+
+
+class ScriptedChatModel(BaseChatModel):
+    transcripts: list
+    latency: float = 0.0
+    ms_per_token: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _transcript(self, message):
+        for transcript in self.transcripts:
+            if transcript["user"] == message:
+                return transcript
+        words = _words(message)
+        return max(self.transcripts, key=lambda t: len(words & _words(t["user"])))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        turn = []
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            turn.append(message)
+        user = message.content if isinstance(message, HumanMessage) else ""
+
+        steps = self._transcript(user)["steps"]
+        calls = sum(isinstance(m, AIMessage) for m in turn)
+        step = steps[min(calls, len(steps) - 1)]
+
+        content = step.get("content", "")
+        tool_calls = [
+            {"name": call["name"], "args": _fill_dates(call.get("args", {})), "id": f"call_{uuid.uuid4().hex[:12]}"}
+            for call in step.get("tool_calls", [])
+        ]
+        # Temps de réponse simulé : latence fixe plus un coût par token produit
+        time.sleep(self.latency + self.ms_per_token / 1000 * len(content.split()))
+
+        input_tokens = sum(len(str(m.content)) for m in messages) // 4
+        output_tokens = len(content) // 4 + 1
+        message = AIMessage(
+            content=content,
+            tool_calls=tool_calls,
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def scripted_model_from_env():
+    return ScriptedChatModel(
+        transcripts=load_transcripts(os.getenv("FAKE_LLM_TRANSCRIPTS") or os.path.join(os.path.dirname(__file__), "transcripts.json")),
+        latency=float(os.getenv("FAKE_LLM_LATENCY_MS") or "300") / 1000,
+        ms_per_token=float(os.getenv("FAKE_LLM_MS_PER_TOKEN") or "10"),
+    )
@@ -0,0 +1,152 @@
+"""
+Load driver for /receptionist: N concurrent guest sessions, each replaying the
+guest messages of the transcripts in order.
+
+    python bench/load.py --url http://127.0.0.1:5000 --sessions 20 --rounds 2 --mock-api http://127.0.0.1:8765
+
+Reports the latency percentiles of the text replies, the throughput, the backend
+calls per turn (read from the mock API's /_stats) and the time to fetch the audio.
+"""
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(int(round(p / 100 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+class LoadDriver:
+    def __init__(self, url, messages, audio=True, timeout=120):
+        self.url = url.rstrip("/")
+        self.messages = messages
+        self.audio = audio
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.audio_latencies = []
+        self.errors = []
+
+    def _turn(self, http, session_id, message):
+        """Send one guest message; return the session token to send with the next one."""
+        start = time.perf_counter()
+        response = http.get(f"{self.url}/receptionist", params={"message": message},
+                            headers={"X-Session-Id": session_id} if session_id else {}, timeout=self.timeout)
+        response.raise_for_status()
+        elapsed = time.perf_counter() - start
+        reply = response.json()
+
+        audio_elapsed = None
+        if self.audio and reply.get("audio_url"):
+            start = time.perf_counter()
+            audio = http.get(f"{self.url}{reply['audio_url']}", timeout=self.timeout)
+            # 202 : job encore dans le pool TTS ; on réessaie souvent (plutôt que Retry-After) pour mesurer quand l'audio est prêt
+            while audio.status_code == 202 and time.perf_counter() - start < self.timeout:
+                time.sleep(0.05)
+                audio = http.get(f"{self.url}{reply['audio_url']}", timeout=self.timeout)
+            audio.raise_for_status()
+            audio_elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.latencies.append(elapsed)
+            if audio_elapsed is not None:
+                self.audio_latencies.append(audio_elapsed)
+        return reply["session_id"]
+
+    def session(self, rounds):
+        # Le serveur attribue la session (jeton signé) à la première réponse
+        session_id = None
+        with requests.Session() as http:
+            for _ in range(rounds):
+                for message in self.messages:
+                    try:
+                        session_id = self._turn(http, session_id, message)
+                    except Exception as e:
+                        with self._lock:
+                            self.errors.append(str(e))
+
+    def run(self, sessions, rounds):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            for future in [executor.submit(self.session, rounds) for _ in range(sessions)]:
+                future.result()
+        return time.perf_counter() - start
+
+
+def backend_calls(mock_api, reset=False):
+    if not mock_api:
+        return None
+    response = requests.request("DELETE" if reset else "GET", f"{mock_api.rstrip('/')}/_stats", timeout=10)
+    return response.json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent guest sessions")
+    parser.add_argument("--rounds", type=int, default=1, help="times each session replays the messages")
+    parser.add_argument("--transcripts", default=os.path.join(os.path.dirname(__file__), "transcripts.json"))
+    parser.add_argument("--mock-api", default="http://127.0.0.1:8765", help="mock API root, '' if not used")
+    parser.add_argument("--no-audio", action="store_true", help="do not fetch the audio of the replies")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    with open(args.transcripts, encoding="utf-8") as f:
+        messages = [transcript["user"] for transcript in json.load(f)]
+
+    backend_calls(args.mock_api, reset=True)
+    driver = LoadDriver(args.url, messages, audio=not args.no_audio)
+    duration = driver.run(args.sessions, args.rounds)
+    calls = backend_calls(args.mock_api)
+
+    turns = len(driver.latencies)
+    report = {
+        "sessions": args.sessions,
+        "turns": turns,
+        "errors": len(driver.errors),
+        "duration_s": round(duration, 2),
+        "throughput_turns_per_s": round(turns / duration, 2) if duration else None,
+        "latency_ms": {
+            "p50": _ms(percentile(driver.latencies, 50)),
+            "p95": _ms(percentile(driver.latencies, 95)),
+            "p99": _ms(percentile(driver.latencies, 99)),
+            "mean": _ms(statistics.mean(driver.latencies)) if driver.latencies else None,
+        },
+        "audio_ms": {
+            "p50": _ms(percentile(driver.audio_latencies, 50)),
+            "p95": _ms(percentile(driver.audio_latencies, 95)),
+            "mean": _ms(statistics.mean(driver.audio_latencies)) if driver.audio_latencies else None,
+        },
+        "backend_calls": calls,
+        "backend_calls_per_turn": round(sum(calls.values()) / turns, 2) if calls is not None and turns else None,
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    latency, audio = report["latency_ms"], report["audio_ms"]
+    print(f"{turns} turns over {args.sessions} sessions in {report['duration_s']}s "
+          f"({report['throughput_turns_per_s']} turns/s, {report['errors']} errors)")
+    print(f"reply latency  p50 {latency['p50']} ms  p95 {latency['p95']} ms  p99 {latency['p99']} ms")
+    print(f"audio fetch    p50 {audio['p50']} ms  p95 {audio['p95']} ms")
+    if calls is not None:
+        print(f"backend calls  {report['backend_calls_per_turn']} per turn  {calls}")
+    for error in sorted(set(driver.errors))[:5]:
+        print(f"error: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Local stand-in for the hotel API (clients, reservations, restaurants, meals, spas).
+
+    python bench/mock_api.py --port 8765 --latency 50 --clients 500 --reservations 2000
+
+Point the bot at it with HOTEL_API_URL=http://127.0.0.1:8765/api.
+GET /_stats returns the number of requests served per endpoint, DELETE /_stats resets it.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+PAGE_SIZE = 10
+
+FIRST_NAMES = ["Jean", "Marie", "Pierre", "Sophie", "Luc", "Camille", "Paul", "Julie", "Hugo", "Emma"]
+LAST_NAMES = ["Dupont", "Martin", "Bernard", "Durand", "Petit", "Moreau", "Laurent", "Simon", "Michel", "Leroy"]
+
+
+def build_dataset(clients, reservations, days, seed=0):
+    rng = random.Random(seed)
+    data = {
+        "restaurants": [
+            {"id": 1, "name": "Le Panoramique", "description": "Cuisine gastronomique", "capacity": 40,
+             "opening_hours": "07:00-10:00, 12:00-14:30, 19:00-22:30", "location": "Dernier étage", "is_active": True},
+            {"id": 2, "name": "La Brasserie", "description": "Cuisine traditionnelle", "capacity": 60,
+             "opening_hours": "11:30-15:00, 18:30-23:00", "location": "Rez-de-chaussée", "is_active": True},
+            {"id": 3, "name": "Le Café du Circuit", "description": "Petits-déjeuners et snacks", "capacity": 25,
+             "opening_hours": "07:00-11:00", "location": "Hall", "is_active": True},
+        ],
+        "meals": [{"id": 1, "name": "Breakfast"}, {"id": 2, "name": "Lunch"}, {"id": 3, "name": "Dinner"}],
+        "spas": [
+            {"id": 1, "name": "Spa des 24 Heures", "description": "Soins et massages", "location": "Niveau -1",
+             "phone_number": "0243000000", "email": "spa@hotel.example", "opening_hours": "09:00-20:00",
+             "created_at": "2025-01-01T00:00:00Z", "updated_at": "2025-01-01T00:00:00Z"},
+        ],
+        "clients": [
+            {"id": i, "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+             "phone_number": f"06{i:08d}", "room_number": str(100 + i), "special_requests": ""}
+            for i in range(1, clients + 1)
+        ],
+    }
+    start = date.today()
+    data["reservations"] = [
+        {"id": i, "client": rng.randint(1, clients), "restaurant": rng.randint(1, 3),
+         "date": (start + timedelta(days=rng.randrange(days))).isoformat(), "meal": rng.randint(1, 3),
+         "number_of_guests": rng.randint(1, 6), "special_requests": ""}
+        for i in range(1, reservations + 1)
+    ]
+    return data
+
+
+# Filtres de l'API : paramètre -> (champ, comparaison)
+FILTERS = {
+    "client": ("client", lambda value, param: str(value) == param),
+    "restaurant": ("restaurant", lambda value, param: str(value) == param),
+    "meal": ("meal", lambda value, param: str(value) == param),
+    "date_from": ("date", lambda value, param: value >= param),
+    "date_to": ("date", lambda value, param: value <= param),
+}
+
+
+class MockHotelApi(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    data = {}
+    latency = 0.0
+    jitter = 0.0
+    stats = {}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _route(self):
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        if parts and parts[0] == "api":
+            parts = parts[1:]
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        return parts, query
+
+    def _count(self, resource):
+        with self.lock:
+            key = f"{self.command} {resource}"
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def _handle(self):
+        parts, query = self._route()
+        if parts == ["_stats"]:
+            with self.lock:
+                if self.command == "DELETE":
+                    self.stats.clear()
+                return self._send(200, dict(self.stats))
+
+        if not parts or parts[0] not in self.data:
+            return self._send(404, {"detail": "Not found."})
+        resource, items = parts[0], self.data[parts[0]]
+        self._count(resource)
+        if self.latency or self.jitter:
+            time.sleep(max(self.latency + random.uniform(-self.jitter, self.jitter), 0))
+
+        body = None
+        if self.command in ("POST", "PUT", "PATCH"):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+
+        with self.lock:
+            if len(parts) == 1:
+                if self.command == "POST":
+                    item = dict(body, id=max((i["id"] for i in items), default=0) + 1)
+                    items.append(item)
+                    return self._send(201, item)
+                return self._send(200, self._list(resource, items, query))
+
+            item = next((i for i in items if str(i["id"]) == parts[1]), None)
+            if item is None:
+                return self._send(404, {"detail": "Not found."})
+            if self.command == "DELETE":
+                items.remove(item)
+                return self._send(204)
+            if self.command in ("PUT", "PATCH"):
+                item.update(body)
+            return self._send(200, item)
+
+    def _list(self, resource, items, query):
+        if resource == "spas":
+            return items
+        for param, (field, matches) in FILTERS.items():
+            if param in query:
+                items = [i for i in items if matches(i[field], query[param])]
+        if query.get("search"):
+            search = query["search"].lower()
+            items = [i for i in items if search in i["name"].lower() or search in i["phone_number"]]
+
+        page = int(query.get("page") or 1)
+        results = items[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+        return {
+            "count": len(items),
+            "next": f"?page={page + 1}" if page * PAGE_SIZE < len(items) else None,
+            "previous": f"?page={page - 1}" if page > 1 else None,
+            "results": results,
+        }
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=50, help="added latency per request, in ms")
+    parser.add_argument("--jitter", type=float, default=10, help="random +/- jitter on the latency, in ms")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--reservations", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=30, help="reservations are spread over this many days from today")
+    args = parser.parse_args()
+
+    MockHotelApi.data = build_dataset(args.clients, args.reservations, args.days)
+    MockHotelApi.latency = args.latency / 1000
+    MockHotelApi.jitter = args.jitter / 1000
+    print(f"Mock hotel API on http://{args.host}:{args.port}/api "
+          f"({args.clients} clients, {args.reservations} reservations, {args.latency:g}±{args.jitter:g} ms)")
+    ThreadingHTTPServer((args.host, args.port), MockHotelApi).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,78 +1,174 @@
 import os
+import asyncio
+import json
+import logging
+import random
+import time
 from dotenv import load_dotenv
 from datetime import datetime
 
 # Import relevant functionality
-from langchain.chat_models import init_chat_model
-from langgraph.prebuilt import create_react_agent
 from langgraph.checkpoint.memory import MemorySaver
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain_core.tools import tool, ToolException
-from langchain_core.messages import SystemMessage, HumanMessage
-from langfuse.callback import CallbackHandler
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, ToolMessage
 
-from api.client import get_clients, get_client_by_id, create_client, update_client, delete_client
-from api.meal import get_meals
-from api.reservation import get_reservations, get_reservation_by_id, create_reservation, delete_reservation, update_reservation, update_reservation_with_patch
-from api.restaurant import get_restaurants
-from api.spas import get_spas
-from tts import generate_audio
-import uuid
+from api.availability import check_availability, acheck_availability
+from api.client import get_clients, get_client_by_id, create_client, update_client, delete_client, find_client, find_free_room
+from api.client import aget_clients, aget_client_by_id, acreate_client, aupdate_client, adelete_client, afind_client, afind_free_room
+from api.meal import get_meals, aget_meals
+from api.reservation import get_reservations, get_reservation_by_id, create_reservation, delete_reservation, update_reservation, update_reservation_with_patch, book_table
+from api.reservation import aget_reservations, aget_reservation_by_id, acreate_reservation, adelete_reservation, aupdate_reservation, aupdate_reservation_with_patch, abook_table
+from api.restaurant import get_restaurants, aget_restaurants
+from api.spas import get_spas, aget_spas
+from tts import audio_format, generate_audio, tts_engine
+from tts_worker import tts_pool, TTSQueueFull
+from admission import llm_limiter, tts_limiter, Overloaded
+from agent_loop import agent_loop
+from sessions import SessionStore, create_checkpointer
+from history import compacting_prompt, start_history_turn, turn_history_tokens
+from router import client_identified, intent_router
+from tool_limits import limit_tools, max_concurrency
+from metrics import metrics_callback
+from startup import component, warm_in_background
+from web_search import cached_search, start_search_turn
 
 
 load_dotenv()
 
-os.environ["MISTRAL_API_KEY"] = os.getenv("MISTRAL_API_KEY")
-os.environ["TAVILY_API_KEY"] = os.getenv("TAVILY_API_KEY")
+# Les briques lourdes (modèle, Tavily, Langfuse, graphe, TTS) sont construites à la demande
+# ou par le thread de préchauffage lancé en bas de ce module
 
-model = init_chat_model("mistral-large-latest", model_provider="mistralai")
-firstCall = True
+def _load_model():
+    if os.getenv("LLM_PROVIDER") == "fake":
+        # Banc de test hors ligne : le modèle rejoue des transcriptions enregistrées
+        from bench.fake_llm import scripted_model_from_env
+        return scripted_model_from_env()
+
+    from langchain.chat_models import init_chat_model
+    os.environ["MISTRAL_API_KEY"] = os.getenv("MISTRAL_API_KEY")
+    return init_chat_model("mistral-large-latest", model_provider="mistralai")
+
+def _load_search():
+    from langchain_community.tools.tavily_search import TavilySearchResults
+    if os.getenv("LLM_PROVIDER") == "fake":
+        os.environ["TAVILY_API_KEY"] = os.getenv("TAVILY_API_KEY") or "offline"
+    else:
+        os.environ["TAVILY_API_KEY"] = os.getenv("TAVILY_API_KEY")
+    # Résultats en cache par requête normalisée, délai et nombre de recherches par tour bornés
+    return cached_search(TavilySearchResults(
+        max_results=2
+    ))
+
+def _load_langfuse():
+    from langfuse.callback import CallbackHandler
+    return CallbackHandler(
+      secret_key=os.getenv("LANGFUSE_SECRET_KEY"),
+      public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
+      host="http://127.0.0.1:3000"
+    )
+
+model = component("model", _load_model)
+search = component("search", _load_search)
+langfuse = component("langfuse", _load_langfuse)
 
 # Tools
 
-search = TavilySearchResults(
-    max_results=2
-)
-
-tools = [
-    search,
-
-    create_client,
-    get_clients,
-    delete_client,
-    get_client_by_id,
-    update_client,
-
-    get_meals,
-
-    get_reservations,
-    get_reservation_by_id,
-    create_reservation,
-    delete_reservation,
-    update_reservation,
-    update_reservation_with_patch,
-
-    get_restaurants,
-
-    get_spas
-]
-
-# Config MemorySaver
-langfuse = CallbackHandler(
-  secret_key=os.getenv("LANGFUSE_SECRET_KEY"),
-  public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
-  host="http://127.0.0.1:3000"
-)
-memory = MemorySaver()
-config =  {
-    "configurable": {
-        "thread_id": str(uuid.uuid4())
-    },
-    "callbacks": [langfuse]
-}
+def _tools():
+    return [
+        search.get(),
+
+        create_client,
+        get_clients,
+        delete_client,
+        get_client_by_id,
+        update_client,
+        find_client,
+        find_free_room,
+
+        get_meals,
+
+        get_reservations,
+        get_reservation_by_id,
+        create_reservation,
+        delete_reservation,
+        update_reservation,
+        update_reservation_with_patch,
+        check_availability,
+        book_table,
+
+        get_restaurants,
+
+        get_spas
+    ]
+
+# Mêmes outils en version asyncio, pour ainvoke
+def _async_tools():
+    return [
+        search.get(),
+
+        acreate_client,
+        aget_clients,
+        adelete_client,
+        aget_client_by_id,
+        aupdate_client,
+        afind_client,
+        afind_free_room,
+
+        aget_meals,
+
+        aget_reservations,
+        aget_reservation_by_id,
+        acreate_reservation,
+        adelete_reservation,
+        aupdate_reservation,
+        aupdate_reservation_with_patch,
+        acheck_availability,
+        abook_table,
+
+        aget_restaurants,
+
+        aget_spas
+    ]
+
+# Config checkpointer : un thread LangGraph par session client
+memory = create_checkpointer()
+sessions = SessionStore(memory)
+
+def _config(session_id: str):
+    # Langfuse n'est branché qu'une fois chargé : les premiers tours ne l'attendent pas
+    tracer = langfuse.get_nowait()
+    return {
+        "configurable": {
+            "thread_id": session_id
+        },
+        "callbacks": [tracer, metrics_callback] if tracer else [metrics_callback],
+        "max_concurrency": max_concurrency()
+    }
 
 # Agent
-agent_executor = create_react_agent(model, tools, checkpointer=memory)
+# L'historique est compacté avant chaque appel au modèle (le checkpoint garde tout)
+# Les appels d'outils d'une même étape tournent en parallèle, chacun avec un délai maximum
+def _load_agent():
+    from langgraph.prebuilt import create_react_agent
+    return create_react_agent(model.get(), limit_tools(_tools()), checkpointer=memory, prompt=compacting_prompt)
+
+def _load_async_agent():
+    from langgraph.prebuilt import create_react_agent
+    return create_react_agent(model.get(), limit_tools(_async_tools()), checkpointer=memory, prompt=compacting_prompt)
+
+agent = component("agent", _load_agent)
+async_agent = component("async_agent", _load_async_agent)
+
+# Pipelines TTS chargées en arrière-plan plutôt qu'à la première réponse
+# (en mode worker, chaque processus du pool charge les siens)
+def _load_tts():
+    if os.getenv("TTS_MODE") == "worker":
+        return tts_pool.start()
+    tts_engine.warmup()
+    tts_engine.preload()
+    return tts_engine
+
+tts = component("tts", _load_tts)
+
 system_prompt = f"""
 You are a virtual receptionist for a hotel located in Le Mans.  
 Your mission is to assist guests by providing efficient service that adapts to their tone.
@@ -87,29 +183,222 @@ How to handle the client’s mood:
   - Don't process the request and response with an angry message.
 """
 
-def send_request(request: str):
+def _build_messages(request: str, session_id: str):
 
-    global firstCall
     messages = []
 
-    if firstCall:
+    if sessions.touch(session_id):
         messages.append(SystemMessage(content=system_prompt))
-        firstCall = False
 
     messages.append(HumanMessage(content=request))
+    return messages
 
-    response = agent_executor.invoke(
-        { "messages": messages },
-        config
-    )
+logger = logging.getLogger("receptionist")
+if not logger.handlers:
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+
+def _log_turn(session_id: str, messages, seconds: float):
+    # Une ligne JSON résumant le tour, pour une fraction des tours seulement (TURN_LOG_SAMPLE)
+    if random.random() >= float(os.getenv("TURN_LOG_SAMPLE") or "0.1"):
+        return
+    turn = []
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            break
+        turn.append(message)
+    logger.info(json.dumps({
+        "session_id": session_id,
+        "seconds": round(seconds, 3),
+        "history_messages": len(messages),
+        # Plus gros historique envoyé au modèle pendant le tour, avant et après compaction
+        **turn_history_tokens(),
+        "llm_calls": sum(isinstance(m, AIMessage) for m in turn),
+        "tools": [m.name for m in reversed(turn) if isinstance(m, ToolMessage)],
+        "tool_errors": sum(isinstance(m, ToolMessage) and m.status == "error" for m in turn),
+        "reply_chars": len(messages[-1].content) if messages else 0,
+    }))
 
-    print(response["messages"])
-    ret = response["messages"][-1].content
+def _record_turn(session_id: str, messages):
+    # Tokens consommés par les appels LLM de ce tour (depuis le dernier message client)
+    input_tokens = output_tokens = 0
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            break
+        if isinstance(message, AIMessage) and message.usage_metadata:
+            input_tokens += message.usage_metadata.get("input_tokens", 0)
+            output_tokens += message.usage_metadata.get("output_tokens", 0)
+    sessions.record_turn(session_id, input_tokens, output_tokens)
+
+def speech_params(ret: str):
     text_to_audio = ret.replace("*", "")
     speed = 1
     if(text_to_audio.startswith("[ANGRY]")):
         text_to_audio = text_to_audio.replace("[ANGRY]", "").strip()
         speed = 0.8
+    return text_to_audio, speed
+
+async def _async_agent():
+    # Tant que le graphe se construit, on l'attend hors de la boucle asyncio
+    if async_agent.state == "warm":
+        return async_agent.value
+    return await asyncio.to_thread(async_agent.get)
+
+def _speak(text_to_audio: str, speed):
+    """Return the ID of the reply's audio: synthesized here, or by the TTS pool in worker mode."""
+    # TTS pas encore chargé : réponse texte seule plutôt que d'attendre torch et Kokoro
+    if tts.get_nowait() is None:
+        return None
+    if os.getenv("TTS_MODE") != "worker":
+        # TTS saturé : réponse texte seule plutôt que d'attendre derrière les autres synthèses
+        try:
+            with tts_limiter.slot():
+                return generate_audio('fr', text_to_audio, speed)
+        except Overloaded as e:
+            print(f"Error: {e}")
+            return None
+    try:
+        # L'audio sera rangé sous l'ID du job une fois synthétisé
+        return tts_pool.submit('fr', text_to_audio, speed, audio_format())
+    except TTSQueueFull as e:
+        # Le pool a sa propre file bornée : on compte juste la réponse dégradée
+        tts_limiter.record_shed("queue_full")
+        print(f"Error: {e}")
+        return None
+
+def _route(request: str, session_id: str):
+    if os.getenv("INTENT_ROUTER", "1") == "0":
+        return None
+    # Réponse toute faite seulement une fois le client identifié par l'agent
+    messages = agent.get().get_state(_config(session_id)).values.get("messages", [])
+    return intent_router.route(request, identified=client_identified(messages))
+
+def send_request(request: str, session_id: str, audio: bool = True):
+    """Run one agent turn for a session and return the reply text and the ID of its audio artifact."""
+
+    ret = _route(request, session_id)
+    if ret is not None:
+        # Réponse directe : on l'ajoute quand même à l'historique de la session
+        agent.get().update_state(
+            _config(session_id),
+            { "messages": _build_messages(request, session_id) + [AIMessage(content=ret)] },
+            as_node="agent"
+        )
+    else:
+        # Overloaded si aucun créneau LLM ne se libère à temps (503 côté app)
+        with llm_limiter.slot():
+            start_search_turn()
+            start_history_turn()
+            start = time.perf_counter()
+            response = agent.get().invoke(
+                { "messages": _build_messages(request, session_id) },
+                _config(session_id)
+            )
+            seconds = time.perf_counter() - start
+        intent_router.record_agent_turn(seconds)
+
+        _log_turn(session_id, response["messages"], seconds)
+        _record_turn(session_id, response["messages"])
+        ret = response["messages"][-1].content
+    text_to_audio, speed = speech_params(ret)
+
+    # En mode streaming, l'audio est synthétisé par /receptionist/speech/<speech_id>
+    audio_id = _speak(text_to_audio, speed) if audio else None
+    return { "text": ret, "audio_id": audio_id }
+
+async def asend_request(request: str, session_id: str, audio: bool = True):
+    """Async variant of send_request, run on agent_loop whatever loop awaits it."""
+
+    # SqliteSaver n'a pas d'API asyncio : on garde le chemin synchrone dans un thread
+    if not isinstance(memory, MemorySaver):
+        return await asyncio.to_thread(send_request, request, session_id, audio)
+
+    # La boucle de la requête Flask est fermée à la fin de la vue : le tour tourne sur la boucle partagée
+    return await agent_loop.run(_asend_request(request, session_id, audio))
+
+async def _asend_request(request: str, session_id: str, audio: bool):
+    # Le routeur lit des données en cache, mais peut devoir les charger en HTTP synchrone
+    ret = await asyncio.to_thread(_route, request, session_id)
+    if ret is not None:
+        await (await _async_agent()).aupdate_state(
+            _config(session_id),
+            { "messages": _build_messages(request, session_id) + [AIMessage(content=ret)] },
+            as_node="agent"
+        )
+    else:
+        async with llm_limiter.aslot():
+            start_search_turn()
+            start_history_turn()
+            start = time.perf_counter()
+            response = await (await _async_agent()).ainvoke(
+                { "messages": _build_messages(request, session_id) },
+                _config(session_id)
+            )
+            seconds = time.perf_counter() - start
+        intent_router.record_agent_turn(seconds)
+
+        _log_turn(session_id, response["messages"], seconds)
+        _record_turn(session_id, response["messages"])
+        ret = response["messages"][-1].content
+    text_to_audio, speed = speech_params(ret)
+
+    # La synthèse reste bloquante (torch), on la sort de la boucle
+    audio_id = await asyncio.to_thread(_speak, text_to_audio, speed) if audio else None
+    return { "text": ret, "audio_id": audio_id }
+
+def stream_request(request: str, session_id: str, audio: bool = True):
+    """
+    Run one agent turn for a session, yielding (event, data) as it progresses:
+    "tool_start" / "tool_end" around each tool call, "token" for each piece of
+    the answer, then "done" with the same payload as send_request.
+    """
+
+    ret = _route(request, session_id)
+    if ret is not None:
+        agent.get().update_state(
+            _config(session_id),
+            { "messages": _build_messages(request, session_id) + [AIMessage(content=ret)] },
+            as_node="agent"
+        )
+        yield "token", ret
+    else:
+        config = _config(session_id)
+        # Le créneau est gardé jusqu'à la fin du flux (ou la fermeture du générateur)
+        with llm_limiter.slot():
+            start_search_turn()
+            start_history_turn()
+            start = time.perf_counter()
+            for mode, chunk in agent.get().stream(
+                { "messages": _build_messages(request, session_id) },
+                config,
+                stream_mode=["messages", "updates"]
+            ):
+                if mode == "messages":
+                    message, metadata = chunk
+                    # Morceaux du modèle (ou message entier si le modèle ne streame pas)
+                    if metadata.get("langgraph_node") == "agent" and isinstance(message, AIMessage) and isinstance(message.content, str) and message.content:
+                        yield "token", message.content
+                else:
+                    for node, update in chunk.items():
+                        for message in (update or {}).get("messages", []):
+                            if isinstance(message, AIMessage):
+                                for tool_call in message.tool_calls:
+                                    yield "tool_start", { "name": tool_call["name"], "args": tool_call["args"] }
+                            elif isinstance(message, ToolMessage):
+                                yield "tool_end", { "name": message.name, "status": message.status }
+            seconds = time.perf_counter() - start
+        intent_router.record_agent_turn(seconds)
+
+        messages = agent.get().get_state(config).values["messages"]
+        _log_turn(session_id, messages, seconds)
+        _record_turn(session_id, messages)
+        ret = messages[-1].content
+    text_to_audio, speed = speech_params(ret)
+
+    audio_id = _speak(text_to_audio, speed) if audio else None
+    yield "done", { "text": ret, "audio_id": audio_id }
 
-    generate_audio('fr', text_to_audio, speed)
-    return response["messages"][-1].content
\ No newline at end of file
+# Préchauffage : l'agent d'abord (réponses texte), le TTS en parallèle dans son propre thread
+warm_in_background(["model", "search", "agent", "async_agent", "langfuse"])
+if os.getenv("TTS_WARMUP", "1") != "0":
+    warm_in_background(["tts"])
@@ -0,0 +1,99 @@
+import contextvars
+import os
+import re
+
+from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
+
+from metrics import history_tokens
+
+
+def _env_int(name, default):
+    return int(os.getenv(name) or default)
+
+def approx_tokens(message) -> int:
+    """Rough token count (~4 characters per token), enough to enforce a budget."""
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    size = len(content)
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        size += len(tool_call["name"]) + len(str(tool_call["args"]))
+    return size // 4 + 4
+
+def count_tokens(messages) -> int:
+    return sum(approx_tokens(message) for message in messages)
+
+def summarize_tool_message(message: ToolMessage, max_chars: int) -> ToolMessage:
+    """Replace a long tool result by a short summary that keeps the IDs it mentioned."""
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    if len(content) <= max_chars:
+        return message
+
+    ids = list(dict.fromkeys(re.findall(r"\bid=(\d+)", content)))
+    summary = f"[{message.name or 'tool'} result compacted, {len(content)} chars"
+    if ids:
+        summary += f", ids: {', '.join(ids[:20])}"
+    summary += f"] {content[:max_chars]}…"
+    return ToolMessage(content=summary, tool_call_id=message.tool_call_id, name=message.name, id=message.id)
+
+def split_turns(messages):
+    """Split the history in (system messages, turns), a turn starting at each HumanMessage."""
+    system, turns = [], []
+    for message in messages:
+        if isinstance(message, SystemMessage) and not turns:
+            system.append(message)
+        elif isinstance(message, HumanMessage) or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return system, turns
+
+def compact_history(messages, max_turns=None, token_budget=None, tool_chars=None):
+    """
+    Return the messages to send to the model for this call.
+
+    Keeps the system prompt and the last `max_turns` turns, compacts the tool
+    results of every turn but the current one, then drops the oldest turns
+    until the history fits in `token_budget`. The current turn is never altered,
+    and turns are dropped whole so tool calls stay paired with their results.
+    """
+    max_turns = max_turns or _env_int("HISTORY_MAX_TURNS", "6")
+    token_budget = token_budget or _env_int("HISTORY_TOKEN_BUDGET", "6000")
+    tool_chars = tool_chars or _env_int("HISTORY_TOOL_CHARS", "300")
+
+    system, turns = split_turns(messages)
+    turns = turns[-max_turns:]
+    turns = [
+        [summarize_tool_message(m, tool_chars) if isinstance(m, ToolMessage) else m for m in turn]
+        for turn in turns[:-1]
+    ] + turns[-1:]
+
+    total = count_tokens(system) + sum(count_tokens(turn) for turn in turns)
+    while len(turns) > 1 and total > token_budget:
+        total -= count_tokens(turns.pop(0))
+
+    return system + [message for turn in turns for message in turn]
+
+# Tokens envoyés au modèle pendant le tour d'agent en cours (None hors d'un tour)
+_turn_tokens = contextvars.ContextVar("turn_tokens", default=None)
+
+def start_history_turn():
+    """Collect the history sizes of the model calls of the turn about to run (read with turn_history_tokens)."""
+    _turn_tokens.set({"model_calls": 0, "history_tokens": 0, "compacted_tokens": 0})
+
+def turn_history_tokens() -> dict:
+    """Model calls of the current turn, and the largest history they had before and after compaction."""
+    return dict(_turn_tokens.get() or {})
+
+def compacting_prompt(state):
+    """`prompt` hook for create_react_agent: compacts the history before each model call."""
+    messages = state["messages"]
+    compacted = compact_history(messages)
+    before, after = count_tokens(messages), count_tokens(compacted)
+    history_tokens.labels(stage="before").observe(before)
+    history_tokens.labels(stage="after").observe(after)
+    turn = _turn_tokens.get()
+    if turn is not None:
+        # Les appels au modèle d'un tour se suivent : pas de verrou
+        turn["model_calls"] += 1
+        turn["history_tokens"] = max(turn["history_tokens"], before)
+        turn["compacted_tokens"] = max(turn["compacted_tokens"], after)
+    return compacted
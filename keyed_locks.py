@@ -0,0 +1,98 @@
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+
+class _Waiter:
+    """A thread (event) or an asyncio task (future on its loop) queued for a key."""
+
+    def __init__(self, loop=None):
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+        self.granted = False
+
+    def grant(self) -> bool:
+        """Hand the lock over; False if the waiter can no longer take it (its loop is closed)."""
+        if self.loop is None:
+            self.event.set()
+        else:
+            try:
+                self.loop.call_soon_threadsafe(self._wake)
+            except RuntimeError:
+                return False
+        self.granted = True
+        return True
+
+    def _wake(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class KeyedLocks:
+    """
+    One lock per key, shared by threads and asyncio tasks on any loop, created on
+    first use and dropped as soon as nobody holds or waits for it.
+
+    A released lock goes straight to the oldest waiter. Async waiters await a
+    future woken by the releasing thread, so the loop is never blocked nor
+    polled; a task cancelled after the lock was handed to it gives it back.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # clé -> attentes, dans l'ordre d'arrivée ; présente tant que le verrou est pris
+        self._entries = {}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _take(self, key, waiter) -> bool:
+        """Take the lock if it is free (True), else queue `waiter`."""
+        with self._lock:
+            waiters = self._entries.get(key)
+            if waiters is None:
+                self._entries[key] = deque()
+                return True
+            waiters.append(waiter)
+            return False
+
+    def _release(self, key):
+        with self._lock:
+            waiters = self._entries[key]
+            while waiters:
+                if waiters.popleft().grant():
+                    return
+            del self._entries[key]
+
+    @contextmanager
+    def hold(self, key):
+        waiter = _Waiter()
+        if not self._take(key, waiter):
+            waiter.event.wait()
+        try:
+            yield
+        finally:
+            self._release(key)
+
+    @asynccontextmanager
+    async def ahold(self, key):
+        waiter = _Waiter(asyncio.get_running_loop())
+        if not self._take(key, waiter):
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                with self._lock:
+                    granted = waiter.granted
+                    if not granted:
+                        self._entries[key].remove(waiter)
+                # Verrou cédé juste avant l'annulation : on le passe au suivant
+                if granted:
+                    self._release(key)
+                raise
+        try:
+            yield
+        finally:
+            self._release(key)
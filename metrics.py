@@ -0,0 +1,271 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._children = {}
+        registry.append(self)
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._child()
+            return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            lines += child.render(self.name, self.label_names, key)
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+    @contextmanager
+    def track_inprogress(self):
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+    def render(self, name, label_names, key):
+        return [f"{name}{_labels(label_names, key)} {self.value:g}"]
+
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def render(self, name, label_names, key):
+        with self._lock:
+            lines = [
+                f"{name}_bucket{_labels(label_names, key, [('le', f'{bound:g}')])} {count}"
+                for bound, count in zip(self.buckets, self.counts)
+            ]
+            lines += [
+                f"{name}_bucket{_labels(label_names, key, [('le', '+Inf')])} {self.count}",
+                f"{name}_sum{_labels(label_names, key)} {self.sum:g}",
+                f"{name}_count{_labels(label_names, key)} {self.count}",
+            ]
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _child(self):
+        return _Value()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _child(self):
+        return _Value()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help, labels)
+
+    def _child(self):
+        return _HistogramValue(self.buckets)
+
+
+registry = []
+
+def render() -> str:
+    """Every metric in the Prometheus text exposition format."""
+    return "\n".join(line for metric in registry for line in metric.render()) + "\n"
+
+
+http_seconds = Histogram("receptionist_http_request_seconds", "HTTP requests served, by route and status", ("route", "status"))
+http_in_flight = Gauge("receptionist_http_requests_in_flight", "HTTP requests being served", ("route",))
+llm_seconds = Histogram("receptionist_llm_call_seconds", "LLM calls, by model and status", ("model", "status"))
+llm_tokens = Counter("receptionist_llm_tokens_total", "LLM tokens, by model and direction", ("model", "direction"))
+tool_seconds = Histogram("receptionist_tool_call_seconds", "Agent tool calls, by tool and status", ("tool", "status"))
+tools_in_flight = Gauge("receptionist_tool_calls_in_flight", "Agent tool calls running", ("tool",))
+api_seconds = Histogram("receptionist_api_request_seconds", "Hotel API requests, by method, endpoint and status", ("method", "endpoint", "status"))
+api_in_flight = Gauge("receptionist_api_requests_in_flight", "Hotel API requests waiting for a response", ("endpoint",))
+tts_load_seconds = Histogram("receptionist_tts_load_seconds", "TTS pipeline loads, by language", ("language",), buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120))
+tts_synthesis_seconds = Histogram("receptionist_tts_synthesis_seconds", "TTS synthesis of one text, by language", ("language",))
+tts_chars = Counter("receptionist_tts_synthesized_chars_total", "Characters synthesized, by language", ("language",))
+history_tokens = Histogram("receptionist_history_tokens", "History tokens per model call, before and after compaction", ("stage",), buckets=(250, 500, 1000, 2000, 4000, 6000, 8000, 12000, 16000, 32000))
+search_seconds = Histogram("receptionist_web_search_seconds", "Web searches sent over the network, by status", ("status",))
+search_cache_lookups = Counter("receptionist_web_search_cache_total", "Web search cache lookups, by result", ("result",))
+admission_active = Gauge("receptionist_admission_active", "Requests holding a slot, by limiter", ("limiter",))
+admission_queue_depth = Gauge("receptionist_admission_queue_depth", "Requests waiting for a slot, by limiter", ("limiter",))
+admission_wait_seconds = Histogram("receptionist_admission_wait_seconds", "Time waited for a slot, by limiter", ("limiter",))
+admission_shed = Counter("receptionist_admission_shed_total", "Requests turned away, by limiter and reason", ("limiter", "reason"))
+
+
+# Découpage du temps passé par la requête HTTP en cours, pour l'en-tête Server-Timing
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+
+    def add(self, stage, seconds):
+        with self._lock:
+            total, count = self.stages.get(stage, (0.0, 0))
+            self.stages[stage] = (total + seconds, count + 1)
+
+    def header(self):
+        """Server-Timing header value: total duration (ms) and number of calls per stage."""
+        with self._lock:
+            return ", ".join(
+                f'{stage};dur={total * 1000:.1f};desc="{count} call{"s" if count > 1 else ""}"'
+                for stage, (total, count) in self.stages.items()
+            )
+
+def start_request_timings():
+    timings = RequestTimings()
+    _request_timings.set(timings)
+    return timings
+
+def record_stage(stage, seconds):
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+def server_timing_enabled():
+    return os.getenv("SERVER_TIMING", "1") != "0"
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """LangChain callbacks feeding the LLM and tool metrics (and the Server-Timing stages)."""
+
+    run_inline = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs = {}
+
+    def _start(self, run_id, kind, name):
+        with self._lock:
+            self._runs[run_id] = (kind, name, time.perf_counter())
+
+    def _end(self, run_id, status):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return None
+        kind, name, start = run
+        seconds = time.perf_counter() - start
+        if kind == "llm":
+            llm_seconds.labels(model=name, status=status).observe(seconds)
+        elif kind == "tool":
+            tool_seconds.labels(tool=name, status=status).observe(seconds)
+            tools_in_flight.labels(tool=name).dec()
+        record_stage(kind, seconds)
+        return name
+
+    def _model_name(self, serialized, kwargs):
+        params = kwargs.get("invocation_params") or {}
+        return params.get("model") or params.get("model_name") or (serialized or {}).get("name") or "unknown"
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, "llm", self._model_name(serialized, kwargs))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, "llm", self._model_name(serialized, kwargs))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        model = self._end(run_id, "ok")
+        if model is None:
+            return
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                llm_tokens.labels(model=model, direction="input").inc(usage.get("input_tokens", 0))
+                llm_tokens.labels(model=model, direction="output").inc(usage.get("output_tokens", 0))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "error")
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        with self._lock:
+            parent = self._runs.get(parent_run_id)
+        # L'outil appelé par l'enveloppe de tool_limits porte le même nom : compté une fois
+        if parent is not None and parent[0] == "tool":
+            return
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        tools_in_flight.labels(tool=name).inc()
+        self._start(run_id, "tool", name)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        status = getattr(output, "status", "success")
+        self._end(run_id, "error" if status == "error" else "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "error")
+
+
+metrics_callback = MetricsCallbackHandler()
@@ -0,0 +1,178 @@
+import re
+import threading
+import time
+import unicodedata
+
+from langchain_core.messages import ToolMessage
+
+from api.meal import fetch_meals
+from api.restaurant import fetch_all_restaurants
+from api.spas import fetch_spas
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+def _has(words, *keywords):
+    return any(keyword in words for keyword in keywords)
+
+# Mots qui signalent une demande à traiter par l'agent (écriture, identité, humeur...)
+AGENT_ONLY = (
+    "reserv", "book", "annul", "cancel", "modifi", "chang", "supprim", "delete", "chambre", "room",
+    "client", "nom ", "name", "tabl", "personne", "people", "guest", "meteo", "weather", "!",
+)
+
+# Signes d'humeur : l'agent doit adapter son ton (voir le prompt système), le routeur n'en a qu'un
+MOOD_CUES = (
+    "?!", "!!", "...", "nul", "honte", "inadmissible", "inacceptable", "scandal", "ridicule", "idiot", "stupid",
+    "incompetent", "debile", "merde", "putain", "bordel", "marre", "furieux", "enerv", "agace", "degoutant",
+    "horrible", "lamentable", "pathetique", "useless", "unacceptable", "ridiculous", "terrible", "worst", "angry",
+    "annoyed", "damn", "shit", "fuck", "wtf",
+)
+
+# Résultat d'un de ces outils désignant un seul client : le client de la session est identifié
+IDENTIFYING_TOOLS = {"find_client", "get_clients", "get_client_by_id", "create_client", "update_client"}
+
+def _shouting(message: str) -> bool:
+    letters = [c for c in message if c.isalpha()]
+    return len(letters) >= 8 and sum(c.isupper() for c in letters) / len(letters) > 0.6
+
+def client_identified(messages) -> bool:
+    """True once a tool call of the conversation returned exactly one client."""
+    for message in messages:
+        if isinstance(message, ToolMessage) and message.name in IDENTIFYING_TOOLS and message.status != "error":
+            content = message.content if isinstance(message.content, str) else ""
+            # Liste de clients (count=...) ou client seul (id=...), tels que rendus par le ToolNode
+            if content.startswith("count=1 ") or content.startswith("id="):
+                return True
+    return False
+
+ENGLISH = ("what", "when", "which", "the", "is", "are", "open", "hours", "phone", "number", "meals", "please")
+
+TEMPLATES = {
+    "restaurant_hours": {
+        "fr": "Voici les horaires de nos restaurants :\n{lines}",
+        "en": "Here are the opening hours of our restaurants:\n{lines}",
+    },
+    "spa_phone": {
+        "fr": "Vous pouvez joindre le spa aux coordonnées suivantes :\n{lines}",
+        "en": "You can reach the spa here:\n{lines}",
+    },
+    "spa_hours": {
+        "fr": "Voici les horaires du spa :\n{lines}",
+        "en": "Here are the spa opening hours:\n{lines}",
+    },
+    "meals": {
+        "fr": "Nous proposons les services suivants : {lines}.",
+        "en": "We serve the following meals: {lines}.",
+    },
+}
+
+
+class IntentRouter:
+    """
+    Answers simple information requests (restaurant hours, spa contact and hours,
+    list of meals) from the cached reference data, without calling the LLM.
+
+    Anything that is not clearly one of these intents returns None, and the
+    message goes to the agent as before. So do messages carrying mood cues, and
+    every message of a session whose client is not identified yet: the agent
+    handles the tone and the authentication, the canned replies do neither.
+    """
+
+    def __init__(self, max_length=160):
+        self.max_length = max_length
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.fallbacks = 0
+        self.router_seconds = 0.0
+        self.agent_seconds = 0.0
+        self.agent_turns = 0
+
+    def classify(self, message: str):
+        text = _normalize(message)
+        if not text or len(text) > self.max_length or _has(text, *AGENT_ONLY):
+            return None
+        if _has(text, *MOOD_CUES) or _shouting(message):
+            return None
+        words = set(re.findall(r"[a-z]+", text))
+
+        hours = _has(text, "heure", "horaire", "ouvert", "ouvre", "ferme", "hour", "open", "close", "quand", "when")
+        phone = _has(text, "telephone", "numero", "phone", "number", "appeler", "call", "joindre", "contact")
+        intents = []
+        if _has(text, "restaurant", "resto") and hours:
+            intents.append("restaurant_hours")
+        if "spa" in words and phone:
+            intents.append("spa_phone")
+        if "spa" in words and hours and not phone:
+            intents.append("spa_hours")
+        if _has(words, "repas", "meal", "meals", "services") and not _has(text, "restaurant", "spa"):
+            intents.append("meals")
+
+        # Plusieurs intentions possibles : on laisse l'agent trancher
+        return intents[0] if len(intents) == 1 else None
+
+    @staticmethod
+    def language(message: str) -> str:
+        words = re.findall(r"[a-z]+", _normalize(message))
+        return "en" if sum(word in ENGLISH for word in words) >= 2 else "fr"
+
+    def _lines(self, intent, message):
+        if intent == "restaurant_hours":
+            restaurants = [r for r in fetch_all_restaurants() if r.is_active]
+            named = [r for r in restaurants if _normalize(r.name) in _normalize(message)]
+            return "\n".join(f"- {r.name} : {r.opening_hours}" for r in (named or restaurants))
+        if intent == "spa_phone":
+            return "\n".join(f"- {s.name} : {s.phone_number} ({s.email})" for s in fetch_spas())
+        if intent == "spa_hours":
+            return "\n".join(f"- {s.name} : {s.opening_hours}" for s in fetch_spas())
+        if intent == "meals":
+            return ", ".join(m.name for m in fetch_meals().results)
+
+    def route(self, message: str, identified: bool = True):
+        """
+        Return a ready-made reply, or None when the agent should handle the message
+        (always when the session's client is not `identified`).
+        """
+        start = time.perf_counter()
+        intent = self.classify(message) if identified else None
+        reply = None
+        if intent is not None:
+            try:
+                lines = self._lines(intent, message)
+                if lines:
+                    reply = TEMPLATES[intent][self.language(message)].format(lines=lines)
+            except Exception as e:
+                print(f"Error: {e}")
+
+        with self._lock:
+            if reply is None:
+                self.fallbacks += 1
+            else:
+                self.hits[intent] = self.hits.get(intent, 0) + 1
+                self.router_seconds += time.perf_counter() - start
+        return reply
+
+    def record_agent_turn(self, seconds):
+        with self._lock:
+            self.agent_seconds += seconds
+            self.agent_turns += 1
+
+    def stats(self):
+        with self._lock:
+            hits = sum(self.hits.values())
+            total = hits + self.fallbacks
+            agent_avg = self.agent_seconds / self.agent_turns if self.agent_turns else None
+            router_avg = self.router_seconds / hits if hits else None
+            return {
+                "hits": dict(self.hits),
+                "fallbacks": self.fallbacks,
+                "hit_rate": round(hits / total, 3) if total else 0.0,
+                "avg_router_ms": round(router_avg * 1000, 2) if router_avg is not None else None,
+                "avg_agent_ms": round(agent_avg * 1000, 1) if agent_avg is not None else None,
+                "estimated_saved_seconds": round(hits * (agent_avg - router_avg), 2) if agent_avg is not None and hits else 0.0,
+            }
+
+
+intent_router = IntentRouter()
@@ -0,0 +1,201 @@
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from langgraph.checkpoint.memory import MemorySaver
+
+
+def create_checkpointer(path=None):
+    """SqliteSaver on SESSION_DB when set (shared by every worker), MemorySaver otherwise."""
+    path = path or os.getenv("SESSION_DB")
+    if not path:
+        return MemorySaver()
+
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    checkpointer = SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+    checkpointer.setup()
+    return checkpointer
+
+
+_secret = None
+
+def _session_secret():
+    # Sans SESSION_SECRET, une clé par processus : les jetons ne valent alors que pour ce worker
+    global _secret
+    if _secret is None:
+        _secret = (os.getenv("SESSION_SECRET") or secrets.token_hex(32)).encode("utf-8")
+    return _secret
+
+def _signature(session_id):
+    return hmac.new(_session_secret(), session_id.encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+
+def issue_session_token():
+    """A new session ID, returned as the signed token the client must send back."""
+    session_id = uuid.uuid4().hex
+    return f"{session_id}.{_signature(session_id)}"
+
+def session_from_token(token):
+    """The session ID of a token issued by this server, or None for anything else."""
+    session_id, _, signature = (token or "").partition(".")
+    if len(session_id) != 32 or not hmac.compare_digest(signature, _signature(session_id)):
+        return None
+    return session_id
+
+
+class SessionStore:
+    """
+    Tracks guest sessions (one LangGraph thread each) and evicts idle ones.
+
+    Sessions idle for more than `idle_ttl` seconds, and the least recently used
+    ones beyond `max_sessions`, are dropped together with their checkpoints.
+    With a MemorySaver the bookkeeping stays in process; with a SqliteSaver it
+    lives in a `sessions` table of the same database so that workers agree.
+    """
+
+    def __init__(self, checkpointer, max_sessions=None, idle_ttl=None, evict_interval=30):
+        self.checkpointer = checkpointer
+        self._max_sessions = max_sessions
+        self._idle_ttl = idle_ttl
+        self.evict_interval = evict_interval
+        self._lock = threading.Lock()
+        self._last_eviction = 0.0
+        self._sessions = OrderedDict()
+
+        self._conn = None
+        if not isinstance(checkpointer, MemorySaver):
+            database = checkpointer.conn.execute("PRAGMA database_list").fetchone()[2]
+            self._conn = sqlite3.connect(database, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    last_seen REAL NOT NULL,
+                    turns INTEGER NOT NULL DEFAULT 0,
+                    input_tokens INTEGER NOT NULL DEFAULT 0,
+                    output_tokens INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            self._conn.commit()
+
+    @property
+    def max_sessions(self):
+        if self._max_sessions is None:
+            self._max_sessions = int(os.getenv("SESSION_MAX") or "1000")
+        return self._max_sessions
+
+    @property
+    def idle_ttl(self):
+        if self._idle_ttl is None:
+            self._idle_ttl = float(os.getenv("SESSION_IDLE_TTL") or "3600")
+        return self._idle_ttl
+
+    def touch(self, session_id) -> bool:
+        """Mark the session as active; return True when it is a new one."""
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                new = session_id not in self._sessions
+                if new:
+                    self._sessions[session_id] = {"created_at": now, "turns": 0, "input_tokens": 0, "output_tokens": 0}
+                self._sessions[session_id]["last_seen"] = now
+                self._sessions.move_to_end(session_id)
+            else:
+                new = self._conn.execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)).fetchone() is None
+                self._conn.execute(
+                    "INSERT INTO sessions (session_id, created_at, last_seen) VALUES (?, ?, ?) "
+                    "ON CONFLICT(session_id) DO UPDATE SET last_seen = excluded.last_seen",
+                    (session_id, now, now)
+                )
+                self._conn.commit()
+
+        if now - self._last_eviction > self.evict_interval:
+            self.evict()
+        return new
+
+    def record_turn(self, session_id, input_tokens, output_tokens):
+        with self._lock:
+            if self._conn is None:
+                session = self._sessions.get(session_id)
+                if session is not None:
+                    session["turns"] += 1
+                    session["input_tokens"] += input_tokens
+                    session["output_tokens"] += output_tokens
+            else:
+                self._conn.execute(
+                    "UPDATE sessions SET turns = turns + 1, input_tokens = input_tokens + ?, output_tokens = output_tokens + ? "
+                    "WHERE session_id = ?",
+                    (input_tokens, output_tokens, session_id)
+                )
+                self._conn.commit()
+
+    def _delete_checkpoints(self, session_id):
+        if self._conn is None:
+            self.checkpointer.storage.pop(session_id, None)
+            for key in [key for key in self.checkpointer.writes if key[0] == session_id]:
+                self.checkpointer.writes.pop(key, None)
+        else:
+            self._conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM writes WHERE thread_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def evict(self):
+        now = time.time()
+        with self._lock:
+            self._last_eviction = now
+            if self._conn is None:
+                expired = [sid for sid, s in self._sessions.items() if now - s["last_seen"] > self.idle_ttl]
+                overflow = len(self._sessions) - len(expired) - self.max_sessions
+                if overflow > 0:
+                    expired += [sid for sid in self._sessions if sid not in expired][:overflow]
+                for session_id in expired:
+                    del self._sessions[session_id]
+                    self._delete_checkpoints(session_id)
+            else:
+                expired = [row[0] for row in self._conn.execute(
+                    "SELECT session_id FROM sessions WHERE last_seen < ?", (now - self.idle_ttl,)
+                )]
+                expired += [row[0] for row in self._conn.execute(
+                    "SELECT session_id FROM sessions WHERE last_seen >= ? ORDER BY last_seen DESC LIMIT -1 OFFSET ?",
+                    (now - self.idle_ttl, self.max_sessions)
+                )]
+                for session_id in expired:
+                    self._delete_checkpoints(session_id)
+                self._conn.commit()
+        return len(expired)
+
+    def _checkpoint_bytes(self, session_id):
+        if self._conn is None:
+            size = 0
+            for checkpoints in self.checkpointer.storage.get(session_id, {}).values():
+                for (checkpoint, metadata, parent) in checkpoints.values():
+                    size += len(checkpoint[1]) + len(metadata[1])
+            return size
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints WHERE thread_id = ?",
+            (session_id,)
+        ).fetchone()
+        return row[0]
+
+    def stats(self):
+        """Totals over the live sessions (never their IDs, which give access to the conversations)."""
+        with self._lock:
+            if self._conn is None:
+                session_ids = list(self._sessions)
+                totals = {
+                    name: sum(s[name] for s in self._sessions.values())
+                    for name in ("turns", "input_tokens", "output_tokens")
+                }
+            else:
+                session_ids = [row[0] for row in self._conn.execute("SELECT session_id FROM sessions")]
+                turns, input_tokens, output_tokens = self._conn.execute(
+                    "SELECT COALESCE(SUM(turns), 0), COALESCE(SUM(input_tokens), 0), COALESCE(SUM(output_tokens), 0) FROM sessions"
+                ).fetchone()
+                totals = {"turns": turns, "input_tokens": input_tokens, "output_tokens": output_tokens}
+            checkpoint_bytes = sum(self._checkpoint_bytes(session_id) for session_id in session_ids)
+        return {"count": len(session_ids), **totals, "checkpoint_bytes": checkpoint_bytes}
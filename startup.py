@@ -0,0 +1,151 @@
+import builtins
+import os
+import sys
+import threading
+import time
+
+_boot_started = time.perf_counter()
+
+
+class Component:
+    """
+    A heavy subsystem built on first use, or ahead of time by a warm-up thread.
+
+    get_nowait() starts at most one warm-up thread at a time, and after a failed
+    load waits `retry_cooldown` seconds (STARTUP_RETRY_COOLDOWN) before the next one.
+    """
+
+    def __init__(self, name, loader, retry_cooldown=None):
+        self.name = name
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._retry_cooldown = retry_cooldown
+        self._failed_at = None
+        self.state = "cold"
+        self.value = None
+        self.error = None
+        self.load_seconds = None
+
+    @property
+    def retry_cooldown(self):
+        if self._retry_cooldown is None:
+            self._retry_cooldown = float(os.getenv("STARTUP_RETRY_COOLDOWN") or "30")
+        return self._retry_cooldown
+
+    def get(self):
+        """Return the component, building it (or waiting for the warm-up thread) if needed."""
+        if self.state != "warm":
+            self.warm()
+        return self.value
+
+    def warm(self):
+        """Build the component unless it is already built; True if this call built it."""
+        with self._lock:
+            if self.state == "warm":
+                return False
+            self.state = "loading"
+            start = time.perf_counter()
+            try:
+                self.value = self._loader()
+            except Exception as e:
+                self.state, self.error = "failed", str(e)
+                self._failed_at = time.monotonic()
+                raise
+            self.load_seconds = time.perf_counter() - start
+            self.state, self.error = "warm", None
+            return True
+
+    def get_nowait(self):
+        """Return the component if it is warm; otherwise start warming it in the background and return None."""
+        if self.state == "warm":
+            return self.value
+        with self._start_lock:
+            # "loading" avant le démarrage du thread : une rafale de requêtes n'en lance qu'un
+            if self.state == "cold" or (self.state == "failed" and time.monotonic() - self._failed_at >= self.retry_cooldown):
+                self.state = "loading"
+                threading.Thread(target=_warm_component, args=(self,), name="warmup", daemon=True).start()
+        return None
+
+    def status(self):
+        return {
+            "state": self.state,
+            "load_seconds": round(self.load_seconds, 2) if self.load_seconds is not None else None,
+            "error": self.error,
+        }
+
+
+components = {}
+
+def component(name, loader):
+    components[name] = Component(name, loader)
+    return components[name]
+
+def _warm_component(component):
+    try:
+        if component.warm():
+            print(f"Startup: {component.name} warm in {component.load_seconds:.2f}s")
+    except Exception as e:
+        print(f"Error: {component.name} failed to load: {e}")
+
+def _warm(names):
+    for name in names:
+        _warm_component(components[name])
+
+def warm_in_background(names):
+    """Build the given components one after the other in a daemon thread."""
+    thread = threading.Thread(target=_warm, args=(list(names),), name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+def ready():
+    return {
+        "uptime_seconds": round(time.perf_counter() - _boot_started, 2),
+        "components": {name: c.status() for name, c in components.items()},
+        **({"import_profile": import_profile()} if _import_seconds is not None else {}),
+    }
+
+
+# STARTUP_PROFILE=1 : temps d'import par paquet de premier niveau (temps propre, hors sous-paquets tiers)
+_import_seconds = None
+_import_stack = threading.local()
+_original_import = builtins.__import__
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    package = name.partition(".")[0] if level == 0 else None
+    if package is None or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    stack = _import_stack.__dict__.setdefault("frames", [])
+    stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        children = stack.pop()
+        _import_seconds[package] = _import_seconds.get(package, 0.0) + elapsed - children
+        if stack:
+            stack[-1] += elapsed
+
+def profile_imports():
+    global _import_seconds
+    if _import_seconds is None:
+        _import_seconds = {}
+        builtins.__import__ = _timed_import
+
+def import_profile(limit=15):
+    """The packages that took the longest to import, in seconds."""
+    slowest = sorted(_import_seconds.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return {package: round(seconds, 3) for package, seconds in slowest}
+
+def print_import_profile():
+    if _import_seconds is None:
+        return
+    print(f"Startup: imports done {time.perf_counter() - _boot_started:.2f}s after boot")
+    for package, seconds in import_profile().items():
+        print(f"  {package:<30} {seconds * 1000:8.1f} ms")
+
+
+if os.getenv("STARTUP_PROFILE") == "1":
+    profile_imports()
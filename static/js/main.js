@@ -1,5 +1,11 @@
 import * as THREE from 'three';
 import { GLTFLoader } from 'three/examples/jsm/loaders/GLTFLoader.js';
+import { MeshoptDecoder } from 'three/examples/jsm/libs/meshopt_decoder.module.js';
+
+// URL hachée d'un asset (voir asset_pipeline.py), ou son chemin d'origine tant que le build n'est pas prêt
+function assetUrl(path) {
+    return (window.ASSET_MANIFEST || {})[path] || path;
+}
 
 // Initialisation de la scène
 const scene = new THREE.Scene();
@@ -24,6 +30,8 @@ scene.add(directionalLight);
 
 // Gestion du chargement du modèle et animations
 const loader = new GLTFLoader();
+// GLB compressés avec EXT_meshopt_compression (ASSET_GLB_COMMAND)
+loader.setMeshoptDecoder(MeshoptDecoder);
 let model, mixer, currentAction;
 
 const animationsTalk = [
@@ -54,7 +62,7 @@ var newAction;
 // Charger et appliquer une animation
 async function loadAnimation(animationPath) {
     return new Promise((resolve, reject) => {
-        loader.load(animationPath, (gltf) => {
+        loader.load(assetUrl(animationPath), (gltf) => {
             console.log(`Animation ${animationPath} chargée avec succès`);
 
             const animation = gltf.animations[0];
@@ -151,7 +159,7 @@ async function changeAnimation(task) {
 window.changeAnimation = changeAnimation;
 
 // Charger le modèle principal (character.glb)
-loader.load('assets/character.glb', (gltf) => {
+loader.load(assetUrl('assets/character.glb'), (gltf) => {
     model = gltf.scene;
     model.scale.set(2, 2, 2);
     model.position.set(-0.1, -2.3, 0);
@@ -0,0 +1,57 @@
+import os
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "bench")]
+
+
+@pytest.fixture
+def mock_api(monkeypatch):
+    """bench/mock_api.py served on a free local port, with HOTEL_API_URL pointing to it."""
+    from mock_api import MockHotelApi, build_dataset
+
+    MockHotelApi.data = build_dataset(clients=30, reservations=0, days=30)
+    MockHotelApi.latency = MockHotelApi.jitter = 0.0
+    MockHotelApi.stats = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockHotelApi)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("HOTEL_API_URL", f"http://127.0.0.1:{server.server_port}/api")
+    yield MockHotelApi
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def wait_for():
+    """Poll `condition` until it is true or `timeout` seconds have passed; return its last value."""
+
+    def wait(condition, timeout=2):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    return wait
+
+
+@pytest.fixture
+def hotel_api(mock_api, monkeypatch):
+    """mock_api, with the shared API clients and the client index rebuilt against it."""
+    import api.api_client as api_client
+    from agent_loop import agent_loop
+    from api import client, reservation
+    from api.client_index import ClientIndex
+
+    monkeypatch.setattr(api_client, "_shared_client", None)
+    monkeypatch.setattr(api_client, "_shared_async_client", None)
+    index = ClientIndex(client.client_index._loader, search=client.client_index._search)
+    monkeypatch.setattr(client, "client_index", index)
+    monkeypatch.setattr(reservation, "client_index", index)
+    yield mock_api
+    agent_loop.call(api_client._close_async_client(), timeout=5)
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionLimiter, Overloaded
+
+
+def hold(limiter, seconds, order=None, label=None):
+    def run():
+        with limiter.slot():
+            if order is not None:
+                order.append(label)
+            time.sleep(seconds)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_freed_slot_goes_to_the_oldest_waiter(wait_for):
+    limiter = AdmissionLimiter("test", limit=1, queue_size=4, max_wait=2)
+    order = []
+    threads = [hold(limiter, 0.1, order, "first")]
+    assert wait_for(lambda: limiter.stats()["active"] == 1)
+    for label in ("second", "third"):
+        threads.append(hold(limiter, 0.01, order, label))
+        assert wait_for(lambda: limiter.stats()["waiting"] == len(threads) - 1)
+    for thread in threads:
+        thread.join()
+    assert order == ["first", "second", "third"]
+    assert limiter.stats()["active"] == 0 and limiter.stats()["admitted"] == 3
+
+
+def test_full_queue_turns_callers_away_at_once(wait_for):
+    limiter = AdmissionLimiter("test", limit=1, queue_size=1, max_wait=2)
+    threads = [hold(limiter, 0.2)]
+    assert wait_for(lambda: limiter.stats()["active"] == 1)
+    threads.append(hold(limiter, 0))
+    assert wait_for(lambda: limiter.stats()["waiting"] == 1)
+    assert limiter.saturated()
+    start = time.perf_counter()
+    with pytest.raises(Overloaded) as overloaded:
+        limiter.acquire()
+    assert time.perf_counter() - start < 0.1
+    assert overloaded.value.reason == "queue_full"
+    for thread in threads:
+        thread.join()
+    assert limiter.stats()["queue_full"] == 1
+
+
+def test_waiter_gives_up_after_max_wait(wait_for):
+    limiter = AdmissionLimiter("test", limit=1, queue_size=1, max_wait=0.05)
+    thread = hold(limiter, 0.3)
+    assert wait_for(lambda: limiter.stats()["active"] == 1)
+    with pytest.raises(Overloaded) as overloaded:
+        limiter.acquire()
+    assert overloaded.value.reason == "timeout"
+    assert limiter.stats()["waiting"] == 0
+    thread.join()
+
+
+def test_limit_zero_admits_everyone():
+    limiter = AdmissionLimiter("test", limit=0, queue_size=0, max_wait=0)
+    granted = [limiter.acquire() for _ in range(20)]
+    assert limiter.stats()["active"] == 20 and not limiter.saturated()
+    for granted_at in granted:
+        limiter.release(granted_at)
+
+
+def test_cancelled_async_waiter_gives_its_slot_back(wait_for):
+    limiter = AdmissionLimiter("test", limit=1, queue_size=2, max_wait=2)
+    holder = hold(limiter, 0.2)
+    assert wait_for(lambda: limiter.stats()["active"] == 1)
+
+    async def use_slot():
+        async with limiter.aslot():
+            pass
+
+    async def cancel_while_queued():
+        task = asyncio.create_task(use_slot())
+        while limiter.stats()["waiting"] == 0:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_while_queued())
+    holder.join()
+    assert wait_for(lambda: limiter.stats()["active"] == 0)
+    assert limiter.stats()["waiting"] == 0
@@ -0,0 +1,94 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from api.api_client import ApiClient, SingleFlight
+
+
+class FlakyApi(BaseHTTPRequestHandler):
+    """Answers 503 to the first `failures` requests, then 200."""
+
+    protocol_version = "HTTP/1.1"
+    failures = 0
+    calls = []
+
+    def log_message(self, *args):
+        pass
+
+    def _handle(self):
+        type(self).calls.append(self.command)
+        failing = len(self.calls) <= self.failures
+        payload = b'{"detail": "unavailable"}' if failing else b'{"id": 1}'
+        self.send_response(503 if failing else 200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = _handle
+
+
+@pytest.fixture
+def flaky_api(monkeypatch):
+    FlakyApi.failures, FlakyApi.calls = 2, []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyApi)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("HOTEL_API_URL", f"http://127.0.0.1:{server.server_port}/api")
+    yield FlakyApi
+    server.shutdown()
+    server.server_close()
+
+
+def test_idempotent_request_is_retried_on_5xx(flaky_api):
+    assert ApiClient(retries=3, retry_backoff=0).get("clients/1") == {"id": 1}
+    assert flaky_api.calls == ["GET", "GET", "GET"]
+
+
+def test_post_is_not_retried(flaky_api):
+    with pytest.raises(requests.HTTPError):
+        ApiClient(retries=3, retry_backoff=0).post("clients/", json={"name": "Jean Dupont"})
+    assert flaky_api.calls == ["POST"]
+
+
+def test_concurrent_identical_gets_share_one_request(mock_api):
+    client = ApiClient()
+    mock_api.latency = 0.1
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.get("clients/1"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert mock_api.stats["GET clients"] == 1
+    assert len(results) == 5 and all(result == results[0] for result in results)
+    assert client.coalesce_stats()["clients"]["coalesced"] == 4
+
+
+def test_callers_get_their_own_copy(mock_api):
+    client = ApiClient()
+    client.single_flight = SingleFlight(micro_ttl=60)
+    client.get("clients/1")["name"] = "changed"
+    assert client.get("clients/1")["name"] != "changed"
+    assert mock_api.stats["GET clients"] == 1
+
+
+def test_write_drops_micro_cached_reads(mock_api):
+    client = ApiClient()
+    client.single_flight = SingleFlight(micro_ttl=60)
+    client.get("clients/1")
+    client.patch("clients/1", json={"room_number": "999"})
+    assert client.get("clients/1")["room_number"] == "999"
+    assert mock_api.stats["GET clients"] == 2
+
+
+
+def test_micro_cache_stays_under_its_cap():
+    flight = SingleFlight(micro_ttl=60, max_entries=3)
+    for page in range(10):
+        flight.do("clients", {"page": page}, lambda page=page: {"page": page})
+    assert len(flight._recent) == 3
+    # Les plus récentes restent servies sans nouvel appel
+    assert flight.do("clients", {"page": 9}, lambda: {"page": "reloaded"}) == {"page": 9}
+    assert flight.do("clients", {"page": 0}, lambda: {"page": "reloaded"}) == {"page": "reloaded"}
@@ -0,0 +1,100 @@
+import gzip
+import os
+
+import pytest
+from werkzeug.http import parse_accept_header
+
+import asset_pipeline
+from asset_pipeline import AssetPipeline
+
+CSS = b"body { background: url('imgs/background.png'); }\n" + b"/* padding */\n" * 50
+SCRIPT = b"console.log('receptionist');\n" * 200
+IMAGE = os.urandom(2048)
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+@pytest.fixture
+def sources(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write("static/style.css", CSS)
+    write("static/imgs/background.png", IMAGE)
+    write("assets/app.js", SCRIPT)
+    return tmp_path
+
+
+def build():
+    return AssetPipeline(build_dir="build").build()
+
+
+def test_files_are_named_after_their_content(sources):
+    pipeline = build()
+    entry = pipeline.entries["assets/app.js"]
+    assert entry["file"] == f"assets/app.{entry['hash']}.js"
+    assert pipeline.hashed_url("assets", "app.js") == f"app.{entry['hash']}.js"
+    with open(pipeline.path(entry), "rb") as f:
+        assert f.read() == SCRIPT
+
+    write("assets/app.js", SCRIPT + b"// v2\n")
+    assert build().entries["assets/app.js"]["hash"] != entry["hash"]
+
+
+def test_stylesheet_points_to_the_hashed_images(sources):
+    pipeline = build()
+    image = pipeline.entries["static/imgs/background.png"]
+    with open(pipeline.path(pipeline.entries["static/style.css"]), "rb") as f:
+        assert f"url('imgs/background.{image['hash']}.png')".encode() in f.read()
+
+
+def test_only_compressible_files_get_variants(sources):
+    pipeline = build()
+    script = pipeline.entries["assets/app.js"]
+    assert set(script["encodings"]) == ({"gzip", "br"} if asset_pipeline.brotli else {"gzip"})
+    with open(pipeline.path(script, "gzip"), "rb") as f:
+        assert gzip.decompress(f.read()) == SCRIPT
+    assert pipeline.entries["static/imgs/background.png"]["encodings"] == {}
+
+
+def test_unchanged_files_are_reused_by_the_next_build(sources):
+    first = build().entries["assets/app.js"]
+    built = os.path.join("build", first["file"])
+    os.utime(built, (0, 0))
+    assert build().entries["assets/app.js"] == first
+    assert os.path.getmtime(built) == 0
+
+
+def test_hashed_names_are_immutable_plain_and_old_names_revalidated(sources):
+    pipeline = build()
+    entry = pipeline.entries["assets/app.js"]
+    assert pipeline.resolve("assets", f"app.{entry['hash']}.js") == (entry, True)
+    assert pipeline.resolve("assets", "app.js") == (entry, False)
+    assert pipeline.resolve("assets", "app.000000000000.js") == (entry, False)
+    assert pipeline.resolve("assets", "missing.js") is None
+
+
+def test_file_changed_since_the_build_is_not_served_from_it(sources):
+    pipeline = build()
+    write("assets/app.js", b"console.log('edited');\n")
+    assert pipeline.resolve("assets", "app.js") is None
+    assert pipeline.hashed_url("assets", "app.js") is None
+    assert "assets/app.js" not in pipeline.manifest()
+
+
+@pytest.mark.parametrize("accept, encoding", [
+    ("gzip, deflate, br", "br"),
+    ("gzip", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("identity", None),
+    ("", None),
+])
+def test_best_accepted_encoding_is_served(accept, encoding):
+    entry = {"encodings": {"br": 10, "gzip": 12}}
+    assert AssetPipeline().negotiate(entry, parse_accept_header(accept)) == encoding
+
+
+def test_encoding_without_a_variant_is_not_served():
+    assert AssetPipeline().negotiate({"encodings": {"gzip": 12}}, parse_accept_header("br")) is None
@@ -0,0 +1,30 @@
+import os
+
+from flask import Flask, send_file
+
+from audio_store import AudioStore
+
+
+def test_relative_directory_is_served_from_any_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("AUDIO_STORE_DIR", "cache/audio")
+    store = AudioStore(mode="disk")
+    audio_id = store.save(b"RIFF", "wav")
+    path = store.get(audio_id, "wav")
+    assert os.path.isabs(path) and path.startswith(str(tmp_path))
+
+    # send_file résout un chemin relatif depuis app.root_path (le dépôt), pas depuis le répertoire courant
+    app = Flask(__name__)
+    app.add_url_rule("/audio", "audio", lambda: send_file(store.get(audio_id, "wav"), mimetype="audio/wav"))
+    with app.test_client() as client:
+        response = client.get("/audio")
+        assert response.status_code == 200 and response.data == b"RIFF"
+
+
+def test_unknown_or_expired_audio_is_not_found(tmp_path):
+    store = AudioStore(mode="disk", directory=str(tmp_path), max_age=60)
+    assert store.get("not-an-id") is None
+    assert store.get("0" * 32) is None
+    audio_id = store.save(b"RIFF")
+    os.utime(store.get(audio_id), (0, 0))
+    assert store.get(audio_id) is None
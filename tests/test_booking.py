@@ -0,0 +1,100 @@
+import asyncio
+import threading
+
+from agent_loop import agent_loop
+from api.client import ClientDetail
+from api.meal import MealDetail
+from api.reservation import ReservationDetail, _booking_locks, _check_booking, _resolve_booking, abook_table, book_table, fetch_reservations
+from api.restaurant import RestaurantDetail
+
+DATE = "2026-12-07"
+
+CLIENT = ClientDetail(id=1, name="Jean Dupont", phone_number="0600000001", room_number="101", special_requests="")
+DINNER = MealDetail(id=3, name="Dinner")
+BREAKFAST = MealDetail(id=1, name="Breakfast")
+BRASSERIE = RestaurantDetail(
+    id=2, name="La Brasserie", description="", capacity=10,
+    opening_hours="11:30-15:00, 18:30-23:00", location="", is_active=True,
+)
+
+
+def reservation(id, client, guests, meal=DINNER, date=DATE):
+    return ReservationDetail(id=id, client=client, restaurant=BRASSERIE.id, date=date, meal=meal.id, number_of_guests=guests, special_requests="")
+
+
+def test_free_seats_are_booked():
+    refusal, remaining = _check_booking(CLIENT, BRASSERIE, DINNER, DATE, 4, [], [reservation(7, 2, 6)])
+    assert refusal is None
+    assert remaining == 4
+
+
+def test_existing_reservation_for_the_meal_is_a_duplicate():
+    existing = reservation(7, CLIENT.id, 2)
+    refusal, _ = _check_booking(CLIENT, BRASSERIE, DINNER, DATE, 2, [existing], [existing])
+    assert refusal.reason == "duplicate"
+    assert refusal.reservation == existing
+
+
+def test_closed_restaurant_is_refused():
+    refusal, _ = _check_booking(CLIENT, BRASSERIE, BREAKFAST, DATE, 2, [], [])
+    assert refusal.reason == "closed"
+
+
+def test_full_restaurant_is_refused_with_the_seats_left():
+    bucket = [reservation(7, 2, 6), reservation(8, 3, 3), reservation(9, 4, 5, date="2026-12-08")]
+    refusal, remaining = _check_booking(CLIENT, BRASSERIE, DINNER, DATE, 2, [], bucket)
+    assert refusal.reason == "full"
+    assert refusal.remaining_seats == remaining == 1
+
+
+def test_overbooked_meal_reports_no_seats_left():
+    refusal, _ = _check_booking(CLIENT, BRASSERIE, DINNER, DATE, 1, [], [reservation(7, 2, 12)])
+    assert refusal.remaining_seats == 0
+
+
+def test_invalid_date_is_refused_before_any_lookup():
+    *_, refusal = _resolve_booking("Jean Dupont", None, "La Brasserie", "Dinner", "07/12/2026", [BRASSERIE], [DINNER])
+    assert refusal.reason == "invalid_date"
+
+
+def unique_names(hotel_api):
+    names = [c["name"] for c in hotel_api.data["clients"]]
+    return [name for name in dict.fromkeys(names) if names.count(name) == 1]
+
+
+def booking(name, guests=6):
+    return dict(name=name, restaurant_name="Le Panoramique", meal_name="Dinner", date=DATE, guests=guests)
+
+
+def test_concurrent_bookings_never_overbook_a_meal(hotel_api):
+    # Le Panoramique : 40 places, 12 demandes de 6 couverts en même temps, moitié sync, moitié asyncio
+    hotel_api.latency = 0.01
+    names = unique_names(hotel_api)[:12]
+    assert len(names) == 12
+    results = []
+
+    def book(name):
+        results.append(book_table.invoke(booking(name)))
+
+    async def abook_all():
+        return await asyncio.gather(*[abook_table.ainvoke(booking(name)) for name in names[6:]])
+
+    threads = [threading.Thread(target=book, args=(name,)) for name in names[:6]]
+    for thread in threads:
+        thread.start()
+    results += agent_loop.call(abook_all(), timeout=30)
+    for thread in threads:
+        thread.join()
+
+    assert sorted(r.reason or "booked" for r in results) == ["booked"] * 6 + ["full"] * 6
+    seats = sum(r.number_of_guests for r in fetch_reservations({"date_from": DATE, "date_to": DATE, "restaurant": 1, "meal": 3}, fresh=True))
+    assert seats == 36
+    assert len(_booking_locks) == 0
+
+
+def test_close_name_is_never_booked(hotel_api):
+    name = unique_names(hotel_api)[0]
+    result = book_table.invoke(booking(name[:-1] + "x", guests=2))
+    assert (result.booked, result.reason) == (False, "client_not_found")
+    assert name in result.message
+    assert "POST reservations" not in hotel_api.stats
@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from pydantic import BaseModel
+
+from agent_loop import agent_loop
+from api import meal, restaurant
+from api.availability import acheck_availability, check_availability
+from api.cache import TTLCache
+from api.meal import get_meals
+
+
+class Item(BaseModel):
+    name: str
+
+
+def counting_loader(values):
+    calls = []
+
+    def load():
+        calls.append(time.monotonic())
+        return [Item(name=values[min(len(calls), len(values)) - 1])]
+
+    return load, calls
+
+
+def test_hit_after_first_load():
+    cache = TTLCache(ttl=60)
+    load, calls = counting_loader(["a"])
+    assert cache.get_or_load(("meals",), load)[0].name == "a"
+    assert cache.get_or_load(("meals",), load)[0].name == "a"
+    assert len(calls) == 1
+    assert cache.stats()["meals"] == {"hits": 1, "misses": 1, "refreshes": 0, "hit_rate": 0.5}
+
+
+def test_expired_entry_is_reloaded():
+    cache = TTLCache(ttl=0.05, refresh_ahead=1)
+    load, calls = counting_loader(["a", "b"])
+    cache.get_or_load(("meals",), load)
+    time.sleep(0.06)
+    assert cache.get_or_load(("meals",), load)[0].name == "b"
+    assert len(calls) == 2
+
+
+def test_refresh_ahead_serves_the_old_value_then_the_new_one(wait_for):
+    cache = TTLCache(ttl=0.2, refresh_ahead=0.25)
+    load, calls = counting_loader(["a", "b"])
+    cache.get_or_load(("spas",), load)
+    time.sleep(0.06)
+    assert cache.get_or_load(("spas",), load)[0].name == "a"
+    assert wait_for(lambda: cache.get_or_load(("spas",), load)[0].name == "b")
+    assert len(calls) == 2
+    assert cache.stats()["spas"]["refreshes"] == 1
+
+
+def test_callers_get_copies():
+    cache = TTLCache(ttl=60)
+    load, _ = counting_loader(["a"])
+    cache.get_or_load(("meals",), load)[0].name = "changed"
+    assert cache.get_or_load(("meals",), load)[0].name == "a"
+
+
+def test_concurrent_misses_load_once():
+    cache = TTLCache(ttl=60)
+    load, calls = counting_loader(["a"])
+
+    def slow_load():
+        time.sleep(0.05)
+        return load()
+
+    threads = [threading.Thread(target=cache.get_or_load, args=(("meals",), slow_load)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+
+
+def test_async_refresh_outlives_the_calling_loop(wait_for):
+    cache = TTLCache(ttl=0.2, refresh_ahead=0.25)
+    calls = []
+
+    async def load():
+        await asyncio.sleep(0.02)
+        calls.append(1)
+        return [Item(name=f"v{len(calls)}")]
+
+    asyncio.run(cache.aget_or_load(("restaurants", 1), load))
+    time.sleep(0.06)
+    # La boucle de cet appel est fermée dès son retour, avant la fin du rechargement
+    assert asyncio.run(cache.aget_or_load(("restaurants", 1), load))[0].name == "v1"
+    assert wait_for(lambda: len(calls) == 2)
+    assert asyncio.run(cache.aget_or_load(("restaurants", 1), load))[0].name == "v2"
+
+
+def test_invalidate_one_namespace():
+    cache = TTLCache(ttl=60)
+    meals, meal_calls = counting_loader(["a"])
+    spas, spa_calls = counting_loader(["s"])
+    cache.get_or_load(("meals",), meals)
+    cache.get_or_load(("spas",), spas)
+    cache.invalidate("meals")
+    cache.get_or_load(("meals",), meals)
+    cache.get_or_load(("spas",), spas)
+    assert (len(meal_calls), len(spa_calls)) == (2, 1)
+
+
+@pytest.fixture
+def reference_cache(hotel_api, monkeypatch):
+    """A short-lived reference cache under the meal and restaurant tools, in front of mock_api."""
+    cache = TTLCache(ttl=0.4, refresh_ahead=0.5)
+    monkeypatch.setattr(meal, "reference_cache", cache)
+    monkeypatch.setattr(restaurant, "reference_cache", cache)
+    return cache
+
+
+def test_get_meals_is_served_from_the_cache_then_refreshed_ahead(hotel_api, reference_cache, wait_for):
+    assert get_meals.invoke({}).results[2].name == "Dinner"
+    get_meals.invoke({})
+    assert hotel_api.stats["GET meals"] == 1
+
+    hotel_api.data["meals"][2]["name"] = "Supper"
+    time.sleep(0.25)
+    # Passé refresh_ahead : l'ancienne valeur tout de suite, le rechargement en arrière-plan
+    assert get_meals.invoke({}).results[2].name == "Dinner"
+    assert wait_for(lambda: hotel_api.stats["GET meals"] == 2)
+    assert wait_for(lambda: get_meals.invoke({}).results[2].name == "Supper")
+    assert reference_cache.stats()["meals"]["refreshes"] == 1
+
+
+def test_check_availability_reads_reference_data_from_the_cache(hotel_api, reference_cache, wait_for):
+    def capacity(availability):
+        return {r.name: r.capacity for r in availability.restaurants}["Le Panoramique"]
+
+    args = {"date": "2026-12-07", "meal": 3, "guests": 2}
+    assert capacity(check_availability.invoke(args)) == 40
+    assert capacity(agent_loop.call(acheck_availability.ainvoke(args), timeout=5)) == 40
+    assert (hotel_api.stats["GET restaurants"], hotel_api.stats["GET meals"]) == (1, 1)
+
+    hotel_api.data["restaurants"][0]["capacity"] = 50
+    time.sleep(0.25)
+    # Rechargement anticipé lancé depuis le chemin asyncio, sur la boucle partagée
+    assert capacity(agent_loop.call(acheck_availability.ainvoke(args), timeout=5)) == 40
+    assert wait_for(lambda: hotel_api.stats["GET restaurants"] == 2)
+    assert wait_for(lambda: capacity(check_availability.invoke(args)) == 50)
@@ -0,0 +1,121 @@
+import threading
+import time
+
+from api.client import ClientDetail
+from api.client_index import ClientIndex, normalize_name, normalize_phone
+
+
+def client(id, name, phone_number, room_number):
+    return ClientDetail(id=id, name=name, phone_number=phone_number, room_number=room_number, special_requests="")
+
+
+CLIENTS = [
+    client(1, "Jean Dupont", "0612345678", "101"),
+    client(2, "Hélène Martin", "0700000002", "102"),
+    client(3, "Jean Dupont", "0600000003", "103"),
+]
+
+
+def loader(clients=CLIENTS, calls=None):
+    def load():
+        if calls is not None:
+            calls.append(1)
+        return list(clients)
+
+    return load
+
+
+def ids(clients):
+    return [c.id for c in clients]
+
+
+def test_names_and_phones_are_normalized():
+    assert normalize_name("Dupont  Jean") == normalize_name("jean dupont")
+    assert normalize_name("Hélène") == "helene"
+    assert normalize_phone("+33 6 12 34 56 78") == normalize_phone("06.12.34.56.78") == "0612345678"
+
+
+def test_exact_lookups_by_name_phone_and_room():
+    index = ClientIndex(loader(), ttl=60)
+    assert ids(index.lookup("dupont jean")) == [1, 3]
+    assert ids(index.lookup("Jean Dupont", phone_number="+33 6 12 34 56 78")) == [1]
+    assert ids(index.lookup(room_number="103")) == [3]
+    assert ids(index.lookup("helene martin")) == [2]
+    assert index.lookup("Jean Dupond") == []
+
+
+def test_close_names_only_with_fuzzy():
+    index = ClientIndex(loader(), ttl=60)
+    assert ids(index.lookup("Helene Martinn", fuzzy=True)) == [2]
+    assert ids(index.lookup("Martin", fuzzy=True)) == [2]
+
+
+def test_writes_go_through_to_the_index():
+    index = ClientIndex(loader(), ttl=60)
+    index.lookup("Jean Dupont")
+    index.upsert(client(4, "Paul Simon", "0600000004", "104"))
+    index.upsert(client(2, "Hélène Martin", "0700000002", "110"))
+    index.remove(3)
+    assert ids(index.lookup("Paul Simon")) == [4]
+    assert ids(index.lookup("Jean Dupont")) == [1]
+    assert index.is_room_free("102") and not index.is_room_free("110")
+    assert index.next_free_room("101") == "102"
+
+
+def test_miss_asks_the_api_and_keeps_the_answer():
+    searches = []
+    remote = client(5, "Marie Leroy", "0600000005", "105")
+
+    def search(term):
+        searches.append(term)
+        return [remote] if term == "Marie Leroy" else []
+
+    index = ClientIndex(loader(), search=search, ttl=60)
+    assert ids(index.lookup("Marie Leroy")) == [5]
+    assert ids(index.lookup("Marie Leroy")) == [5]
+    assert index.lookup("Nobody") == []
+    assert searches == ["Marie Leroy", "Nobody"]
+
+
+def test_failed_search_answers_from_the_index():
+    def search(term):
+        raise ConnectionError("API down")
+
+    assert ClientIndex(loader(), search=search, ttl=60).lookup("Marie Leroy") == []
+
+
+def test_index_is_resynced_after_its_ttl():
+    calls = []
+    index = ClientIndex(loader(calls=calls), ttl=0.05)
+    index.lookup("Jean Dupont")
+    index.lookup("Jean Dupont")
+    time.sleep(0.06)
+    index.lookup("Jean Dupont")
+    assert len(calls) == 2
+
+
+def test_lookups_use_the_old_index_during_a_resync_and_writes_are_replayed():
+    loading, release = threading.Event(), threading.Event()
+    stale = {"value": False}
+
+    def load():
+        if stale["value"]:
+            loading.set()
+            release.wait(2)
+        return list(CLIENTS)
+
+    index = ClientIndex(load, ttl=60)
+    index.lookup("Jean Dupont")
+    stale["value"] = True
+    resync = threading.Thread(target=index.warm)
+    resync.start()
+    assert loading.wait(2)
+
+    start = time.perf_counter()
+    assert ids(index.lookup("Jean Dupont")) == [1, 3]
+    assert time.perf_counter() - start < 0.5
+    # Écrit pendant le rechargement, absent de la liste chargée : rejoué sur le nouvel index
+    index.upsert(client(6, "Luc Bernard", "0600000006", "106"))
+    release.set()
+    resync.join()
+    assert ids(index.lookup("Luc Bernard")) == [6]
@@ -0,0 +1,68 @@
+import contextvars
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from history import compact_history, compacting_prompt, count_tokens, start_history_turn, turn_history_tokens
+
+
+def turn(index, tool_output="ok"):
+    call = {"name": "get_reservations", "args": {"page": index}, "id": f"call-{index}"}
+    return [
+        HumanMessage(content=f"question {index}"),
+        AIMessage(content="", tool_calls=[call]),
+        ToolMessage(content=tool_output, tool_call_id=f"call-{index}", name="get_reservations"),
+        AIMessage(content=f"answer {index}"),
+    ]
+
+
+def history(turns, tool_output="ok"):
+    return [SystemMessage(content="You are the receptionist.")] + [m for i in range(turns) for m in turn(i, tool_output)]
+
+
+def questions(messages):
+    return [m.content for m in messages if isinstance(m, HumanMessage)]
+
+
+def test_keeps_the_system_prompt_and_the_last_turns():
+    compacted = compact_history(history(10), max_turns=3, token_budget=10_000, tool_chars=300)
+    assert isinstance(compacted[0], SystemMessage)
+    assert questions(compacted) == ["question 7", "question 8", "question 9"]
+
+
+def test_old_tool_outputs_are_summarized_but_not_the_current_turn():
+    long_output = "id=42 " + "x" * 2000
+    compacted = compact_history(history(3, long_output), max_turns=6, token_budget=100_000, tool_chars=100)
+    tool_messages = [m for m in compacted if isinstance(m, ToolMessage)]
+    assert all(m.content.startswith("[get_reservations result compacted") and "ids: 42" in m.content for m in tool_messages[:-1])
+    assert tool_messages[-1].content == long_output
+    # Chaque appel d'outil garde son résultat
+    assert [m.tool_call_id for m in tool_messages] == ["call-0", "call-1", "call-2"]
+
+
+def test_oldest_turns_are_dropped_to_fit_the_budget():
+    messages = history(6, "y" * 400)
+    compacted = compact_history(messages, max_turns=6, token_budget=300, tool_chars=300)
+    assert count_tokens(compacted) <= 300 < count_tokens(messages)
+    assert questions(compacted)[-1] == "question 5"
+    assert len(questions(compacted)) < 6
+
+
+def test_current_turn_is_kept_even_over_budget():
+    compacted = compact_history(history(2, "z" * 4000), max_turns=6, token_budget=10, tool_chars=300)
+    assert questions(compacted) == ["question 1"]
+    assert isinstance(compacted[0], SystemMessage)
+
+
+def test_turn_records_history_sizes_before_and_after_compaction(monkeypatch):
+    monkeypatch.setenv("HISTORY_MAX_TURNS", "2")
+    messages = history(5)
+
+    def run_turn():
+        start_history_turn()
+        compacted = compacting_prompt({"messages": messages})
+        compacting_prompt({"messages": messages[:5]})
+        return compacted, turn_history_tokens()
+
+    compacted, tokens = contextvars.copy_context().run(run_turn)
+    assert tokens == {"model_calls": 2, "history_tokens": count_tokens(messages), "compacted_tokens": count_tokens(compacted)}
+    assert turn_history_tokens() == {}
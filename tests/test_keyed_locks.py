@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from keyed_locks import KeyedLocks
+
+
+def test_one_holder_per_key_and_lock_dropped_after_use():
+    locks = KeyedLocks()
+    inside, overlaps = [], []
+
+    def work(key):
+        with locks.hold(key):
+            if key in inside:
+                overlaps.append(key)
+            inside.append(key)
+            time.sleep(0.01)
+            inside.remove(key)
+
+    threads = [threading.Thread(target=work, args=(i % 2,)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert overlaps == []
+    assert len(locks) == 0
+
+
+def test_released_lock_goes_to_the_oldest_waiter(wait_for):
+    locks = KeyedLocks()
+    order = []
+    release = threading.Event()
+
+    def holder():
+        with locks.hold("k"):
+            release.wait()
+
+    def waiter(label):
+        with locks.hold("k"):
+            order.append(label)
+
+    threads = [threading.Thread(target=holder)]
+    threads[0].start()
+    for label in ("first", "second", "third"):
+        threads.append(threading.Thread(target=waiter, args=(label,)))
+        threads[-1].start()
+        assert wait_for(lambda: len(locks._entries["k"]) == len(threads) - 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert order == ["first", "second", "third"]
+
+
+def test_async_waiter_is_woken_by_a_thread_release():
+    locks = KeyedLocks()
+    holding = threading.Event()
+
+    def holder():
+        with locks.hold("k"):
+            holding.set()
+            time.sleep(0.1)
+
+    async def wait_turn():
+        start = time.perf_counter()
+        async with locks.ahold("k"):
+            return time.perf_counter() - start
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    holding.wait()
+    assert 0.05 < asyncio.run(wait_turn()) < 0.5
+    thread.join()
+    assert len(locks) == 0
+
+
+@pytest.mark.parametrize("handed_over", [False, True])
+def test_cancelled_async_waiter_does_not_keep_the_lock(handed_over):
+    locks = KeyedLocks()
+
+    async def use_lock():
+        async with locks.ahold("k"):
+            pass
+
+    async def scenario():
+        held = locks.ahold("k")
+        await held.__aenter__()
+        waiting = asyncio.create_task(use_lock())
+        await asyncio.sleep(0.01)
+        if handed_over:
+            # Verrou cédé à la tâche, annulée avant d'avoir pu reprendre la main
+            await held.__aexit__(None, None, None)
+            waiting.cancel()
+        else:
+            waiting.cancel()
+            await asyncio.sleep(0)
+            await held.__aexit__(None, None, None)
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    asyncio.run(scenario())
+    assert len(locks) == 0
@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+import requests
+
+from api import paginator
+
+PAGE_SIZE = 2
+
+
+def http_error(error_class, status):
+    if error_class is requests.HTTPError:
+        response = requests.Response()
+        response.status_code = status
+        return requests.HTTPError(str(status), response=response)
+    request = httpx.Request("GET", "http://api/items")
+    return httpx.HTTPStatusError(str(status), request=request, response=httpx.Response(status, request=request))
+
+
+class FakeApi:
+    """Pages of PAGE_SIZE numbers; `delays` per page number, `missing` pages answer 404, `broken` ones 500."""
+
+    def __init__(self, pages, delays=None, missing=(), broken=()):
+        self.pages = pages
+        self.delays = delays or {}
+        self.errors = {**{page: 404 for page in missing}, **{page: 500 for page in broken}}
+
+    def _page(self, page_number):
+        if page_number in self.errors:
+            return self.errors[page_number]
+        start = (page_number - 1) * PAGE_SIZE
+        return {
+            "count": self.pages * PAGE_SIZE,
+            "next": "more" if page_number < self.pages else None,
+            "results": list(range(start, start + PAGE_SIZE)),
+        }
+
+    def get(self, endpoint, params=None):
+        time.sleep(self.delays.get(params["page"], 0))
+        page = self._page(params["page"])
+        if isinstance(page, int):
+            raise http_error(requests.HTTPError, page)
+        return page
+
+
+class FakeAsyncApi(FakeApi):
+    async def get(self, endpoint, params=None):
+        await asyncio.sleep(self.delays.get(params["page"], 0))
+        page = self._page(params["page"])
+        if isinstance(page, int):
+            raise http_error(httpx.HTTPStatusError, page)
+        return page
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    def install(api):
+        monkeypatch.setattr(paginator, "get_api_client", lambda: api)
+        monkeypatch.setattr(paginator, "get_async_api_client", lambda: api)
+        return api
+
+    return install
+
+
+def assert_slow_page_last(arrivals):
+    # Page 1 d'abord, puis les pages rapides (dans un ordre quelconque), la lente (page 2) en dernier
+    pages = [results for results, _ in arrivals]
+    assert pages[0] == [0, 1] and sorted(pages[1:3]) == [[4, 5], [6, 7]] and pages[3] == [2, 3]
+    assert all(seconds < 0.3 for _, seconds in arrivals[:3])
+    assert arrivals[3][1] >= 0.5
+
+
+def test_pages_are_yielded_before_the_slowest_one_arrives(fake_api):
+    fake_api(FakeApi(pages=4, delays={2: 0.5}))
+    start = time.perf_counter()
+    arrivals = [(results, time.perf_counter() - start) for results in paginator.iter_pages("items")]
+    assert_slow_page_last(arrivals)
+
+
+def test_async_pages_are_yielded_before_the_slowest_one_arrives(fake_api):
+    fake_api(FakeAsyncApi(pages=4, delays={2: 0.5}))
+
+    async def collect():
+        start = time.perf_counter()
+        return [(results, time.perf_counter() - start) async for results in paginator.aiter_pages("items")]
+
+    assert_slow_page_last(asyncio.run(collect()))
+
+
+def test_late_404_ends_the_iteration(fake_api):
+    fake_api(FakeApi(pages=5, delays={4: 0.1, 5: 0.1}, missing={3}))
+    assert list(paginator.iter_pages("items", max_in_flight=4)) == [[0, 1], [2, 3]]
+
+
+def test_async_late_404_ends_the_iteration(fake_api):
+    fake_api(FakeAsyncApi(pages=5, delays={4: 0.1, 5: 0.1}, missing={3}))
+
+    async def collect():
+        return [results async for results in paginator.aiter_pages("items")]
+
+    assert asyncio.run(collect()) == [[0, 1], [2, 3]]
+
+
+def test_fetch_all_pages_keeps_page_order_and_stops_at_a_late_404(fake_api):
+    fake_api(FakeApi(pages=4, delays={2: 0.1}))
+    assert paginator.fetch_all_pages("items") == list(range(8))
+    fake_api(FakeApi(pages=4, missing={3}))
+    assert paginator.fetch_all_pages("items") == [0, 1, 2, 3]
+
+
+def test_other_errors_still_raise(fake_api):
+    fake_api(FakeApi(pages=3, broken={2}))
+    with pytest.raises(requests.HTTPError):
+        list(paginator.iter_pages("items"))
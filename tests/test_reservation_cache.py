@@ -0,0 +1,47 @@
+import time
+
+from api.reservation import ReservationDetail
+from api.reservation_cache import ReservationCache
+
+DATE = "2026-12-07"
+DINNER = (1, DATE, 3, None)
+
+
+def reservation(id, guests=2, restaurant=1, meal=3, date=DATE):
+    return ReservationDetail(id=id, client=id, restaurant=restaurant, date=date, meal=meal, number_of_guests=guests, special_requests="")
+
+
+def test_query_key_only_for_single_dates():
+    assert ReservationCache.query_key({"restaurant": "1", "date_from": DATE, "date_to": DATE, "meal": 3}) == DINNER
+    assert ReservationCache.query_key({"date_from": DATE, "date_to": "2026-12-08"}) is None
+
+
+def test_stored_query_is_served_until_stale():
+    cache = ReservationCache(max_staleness=0.05)
+    cache.store_query(DINNER, [reservation(1), reservation(2)])
+    assert [r.id for r in cache.query(DINNER)] == [1, 2]
+    assert cache.get(2).id == 2
+    time.sleep(0.06)
+    assert cache.query(DINNER) is None and cache.get(2) is None
+
+
+def test_writes_update_the_buckets_they_match():
+    cache = ReservationCache(max_staleness=60)
+    lunch = (1, DATE, 2, None)
+    cache.store_query(DINNER, [reservation(1)])
+    cache.store_query(lunch, [])
+    cache.put(reservation(1, meal=2))
+    cache.put(reservation(2))
+    assert [r.id for r in cache.query(DINNER)] == [2]
+    assert [r.id for r in cache.query(lunch)] == [1]
+    cache.remove(2)
+    assert cache.query(DINNER) == []
+
+
+def test_callers_get_copies():
+    cache = ReservationCache(max_staleness=60)
+    cache.store_query(DINNER, [reservation(1)])
+    cache.query(DINNER)[0].number_of_guests = 40
+    cache.get(1).number_of_guests = 40
+    assert cache.get(1).number_of_guests == 2
+    assert cache.query(DINNER)[0].number_of_guests == 2
@@ -0,0 +1,89 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+import router
+from api.client import Client, ClientDetail
+from api.meal import Meal, MealDetail
+from api.restaurant import RestaurantDetail
+from api.spas import Spa
+from router import IntentRouter, client_identified
+
+RESTAURANTS = [
+    RestaurantDetail(id=1, name="Le Panoramique", description="", capacity=40, opening_hours="19:00-22:30", location="", is_active=True),
+    RestaurantDetail(id=2, name="La Brasserie", description="", capacity=60, opening_hours="11:30-15:00", location="", is_active=True),
+    RestaurantDetail(id=3, name="Le Vieux Bar", description="", capacity=20, opening_hours="18:00-01:00", location="", is_active=False),
+]
+SPAS = [Spa(id=1, name="Spa des 24 Heures", description="", location="", phone_number="0243000000", email="spa@hotel.example",
+            opening_hours="09:00-20:00", created_at="", updated_at="")]
+MEALS = Meal(count=2, next=None, previous=None, results=[MealDetail(id=1, name="Breakfast"), MealDetail(id=3, name="Dinner")])
+CLIENT = ClientDetail(id=7, name="Jean Dupont", phone_number="0600000007", room_number="107", special_requests="")
+
+
+@pytest.fixture(autouse=True)
+def reference_data(monkeypatch):
+    monkeypatch.setattr(router, "fetch_all_restaurants", lambda: RESTAURANTS)
+    monkeypatch.setattr(router, "fetch_spas", lambda: SPAS)
+    monkeypatch.setattr(router, "fetch_meals", lambda: MEALS)
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("Quels sont les horaires des restaurants ?", "restaurant_hours"),
+    ("When is the restaurant open?", "restaurant_hours"),
+    ("Quel est le numéro de téléphone du spa ?", "spa_phone"),
+    ("À quelle heure ouvre le spa ?", "spa_hours"),
+    ("Quels repas servez-vous ?", "meals"),
+])
+def test_simple_requests_are_classified(message, intent):
+    assert IntentRouter().classify(message) == intent
+
+
+@pytest.mark.parametrize("message", [
+    "Je voudrais réserver une table au restaurant ce soir",
+    "Pouvez-vous annuler ma réservation ?",
+    "Quel temps fait-il au Mans ?",
+    "Le spa et le restaurant ouvrent à quelle heure ?",
+    "Les horaires du restaurant, c'est inadmissible ?!",
+    "QUELS SONT LES HORAIRES DU RESTAURANT",
+    "Bonjour",
+])
+def test_writes_moods_and_unclear_requests_go_to_the_agent(message):
+    assert IntentRouter().classify(message) is None
+
+
+def test_reply_uses_the_reference_data_in_the_guest_language():
+    intent_router = IntentRouter()
+    french = intent_router.route("Horaires du restaurant Le Panoramique ?")
+    assert french.startswith("Voici les horaires") and "Le Panoramique : 19:00-22:30" in french
+    assert "La Brasserie" not in french
+    english = intent_router.route("What are the restaurant opening hours?")
+    assert english.startswith("Here are the opening hours") and "La Brasserie" in english and "Le Vieux Bar" not in english
+    assert "0243000000" in intent_router.route("Quel est le numéro du spa ?")
+    assert intent_router.route("Quels repas servez-vous ?") == "Nous proposons les services suivants : Breakfast, Dinner."
+
+
+def test_unidentified_session_always_goes_to_the_agent():
+    intent_router = IntentRouter()
+    assert intent_router.route("Quels repas servez-vous ?", identified=False) is None
+    assert intent_router.stats()["fallbacks"] == 1 and intent_router.stats()["hits"] == {}
+
+
+def test_failed_data_load_falls_back_to_the_agent(monkeypatch):
+    def down():
+        raise ConnectionError("API down")
+
+    monkeypatch.setattr(router, "fetch_meals", down)
+    assert IntentRouter().route("Quels repas servez-vous ?") is None
+
+
+def tool_result(name, content, status="success"):
+    return ToolMessage(content=content, tool_call_id="call-1", name=name, status=status)
+
+
+def test_client_is_identified_by_a_single_client_result():
+    conversation = [HumanMessage(content="Je suis Jean Dupont"), AIMessage(content="")]
+    assert not client_identified(conversation)
+    assert not client_identified(conversation + [tool_result("get_clients", str(Client(count=2, next=None, previous=None, results=[CLIENT, CLIENT])))])
+    assert not client_identified(conversation + [tool_result("find_client", "error", status="error")])
+    assert not client_identified(conversation + [tool_result("get_meals", str(CLIENT))])
+    assert client_identified(conversation + [tool_result("get_clients", str(Client(count=1, next=None, previous=None, results=[CLIENT])))])
+    assert client_identified(conversation + [tool_result("get_client_by_id", str(CLIENT))])
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.memory import MemorySaver
+
+from sessions import SessionStore, create_checkpointer, issue_session_token, session_from_token
+
+
+def config(session_id):
+    return {"configurable": {"thread_id": session_id, "checkpoint_ns": ""}}
+
+
+def start_session(store, session_id):
+    store.touch(session_id)
+    store.checkpointer.put(config(session_id), empty_checkpoint(), {}, {})
+
+
+def has_checkpoint(store, session_id):
+    return store.checkpointer.get_tuple(config(session_id)) is not None
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def checkpointer(request, tmp_path):
+    if request.param == "memory":
+        return MemorySaver()
+    return create_checkpointer(str(tmp_path / "sessions.db"))
+
+
+def test_issued_token_gives_back_its_session():
+    token = issue_session_token()
+    session_id = session_from_token(token)
+    assert session_id is not None and token.startswith(session_id + ".")
+
+
+@pytest.mark.parametrize("token", [None, "", "abc", "0" * 32, "0" * 32 + ".forged"])
+def test_unsigned_or_forged_tokens_are_refused(token):
+    assert session_from_token(token) is None
+
+
+def test_token_signed_for_another_session_is_refused():
+    first, second = issue_session_token(), issue_session_token()
+    assert session_from_token(first.split(".")[0] + "." + second.split(".")[1]) is None
+
+
+def test_touch_reports_new_sessions_only_once(checkpointer):
+    store = SessionStore(checkpointer, max_sessions=10, idle_ttl=60)
+    assert store.touch("a") is True
+    assert store.touch("a") is False
+
+
+def test_least_recently_used_sessions_beyond_the_cap_are_evicted(checkpointer):
+    store = SessionStore(checkpointer, max_sessions=2, idle_ttl=60)
+    for session_id in ("a", "b", "c"):
+        start_session(store, session_id)
+        time.sleep(0.01)
+    store.touch("a")
+    assert store.evict() == 1
+    assert not has_checkpoint(store, "b")
+    assert has_checkpoint(store, "a") and has_checkpoint(store, "c")
+    assert store.stats()["count"] == 2
+
+
+def test_idle_sessions_are_evicted_with_their_checkpoints(checkpointer):
+    store = SessionStore(checkpointer, max_sessions=10, idle_ttl=0.5)
+    start_session(store, "idle")
+    time.sleep(0.6)
+    start_session(store, "active")
+    assert store.evict() == 1
+    assert not has_checkpoint(store, "idle") and has_checkpoint(store, "active")
+    assert store.touch("idle") is True
+
+
+def test_stats_add_up_turns_and_tokens_without_listing_sessions(checkpointer):
+    store = SessionStore(checkpointer, max_sessions=10, idle_ttl=60)
+    first, second = (session_from_token(issue_session_token()) for _ in range(2))
+    start_session(store, first)
+    start_session(store, second)
+    store.record_turn(first, 100, 20)
+    store.record_turn(second, 50, 10)
+    stats = store.stats()
+    assert (stats["count"], stats["turns"], stats["input_tokens"], stats["output_tokens"]) == (2, 2, 150, 30)
+    assert stats["checkpoint_bytes"] > 0
+    assert first not in str(stats) and second not in str(stats)
@@ -0,0 +1,59 @@
+import threading
+import time
+
+import pytest
+
+from startup import Component
+
+
+def slow_loader(calls, seconds=0.1, fail=False):
+    def load():
+        calls.append(time.monotonic())
+        time.sleep(seconds)
+        if fail:
+            raise RuntimeError("no model")
+        return "loaded"
+
+    return load
+
+
+def test_burst_of_requests_starts_one_warm_up(wait_for):
+    calls = []
+    component = Component("test", slow_loader(calls))
+    threads = [threading.Thread(target=component.get_nowait) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert component.state == "loading"
+    assert wait_for(lambda: component.get_nowait() == "loaded")
+    assert len(calls) == 1
+
+
+def test_failed_load_is_retried_after_the_cooldown(wait_for):
+    calls = []
+    component = Component("test", slow_loader(calls, seconds=0, fail=True), retry_cooldown=0.2)
+    component.get_nowait()
+    assert wait_for(lambda: component.state == "failed")
+    for _ in range(10):
+        assert component.get_nowait() is None
+    assert len(calls) == 1
+    time.sleep(0.2)
+    component.get_nowait()
+    assert wait_for(lambda: len(calls) == 2)
+
+
+def test_get_waits_for_the_warm_up_thread():
+    calls = []
+    component = Component("test", slow_loader(calls))
+    assert component.get_nowait() is None
+    assert component.get() == "loaded"
+    assert len(calls) == 1
+    assert component.status()["state"] == "warm"
+
+
+def test_get_raises_the_load_error():
+    component = Component("test", slow_loader([], seconds=0, fail=True))
+    with pytest.raises(RuntimeError, match="no model"):
+        component.get()
+    assert component.status() == {"state": "failed", "load_seconds": None, "error": "no model"}
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain_core.tools import ToolException, tool
+
+from tool_limits import limit_tool
+
+
+@tool
+def slow_read(seconds: float) -> str:
+    """Sleep, then answer."""
+    time.sleep(seconds)
+    return "done"
+
+
+@tool
+def book_table(seconds: float) -> str:
+    """Sleep like a slow write, then answer."""
+    time.sleep(seconds)
+    return "booked"
+
+
+def test_read_tool_is_cut_after_timeout():
+    limited = limit_tool(slow_read, timeout=0.1)
+    start = time.perf_counter()
+    with pytest.raises(ToolException, match="slow_read timed out after 0.1s"):
+        limited.invoke({"seconds": 1})
+    assert time.perf_counter() - start < 0.5
+
+
+def test_read_tool_within_timeout_answers():
+    assert limit_tool(slow_read, timeout=1).invoke({"seconds": 0}) == "done"
+
+
+def test_write_tool_is_never_cut():
+    limited = limit_tool(book_table, timeout=0.05)
+    assert limited.invoke({"seconds": 0.2}) == "booked"
+    assert asyncio.run(limited.ainvoke({"seconds": 0.2})) == "booked"
+
+
+def test_async_read_tool_is_cut_after_timeout():
+    @tool
+    async def slow_async(seconds: float) -> str:
+        """Sleep, then answer."""
+        await asyncio.sleep(seconds)
+        return "done"
+
+    with pytest.raises(ToolException, match="timed out"):
+        asyncio.run(limit_tool(slow_async, timeout=0.05).ainvoke({"seconds": 1}))
+
+
+def test_async_calls_share_the_concurrency_cap_and_keep_their_order(monkeypatch):
+    monkeypatch.setenv("TOOL_MAX_CONCURRENCY", "2")
+    running = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    @tool
+    async def echo(value: int) -> int:
+        """Answer the value after a short wait."""
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.02 * (5 - value))
+        with lock:
+            running["now"] -= 1
+        return value
+
+    limited = limit_tool(echo, timeout=5)
+
+    async def step():
+        return await asyncio.gather(*[limited.ainvoke({"value": i}) for i in range(5)])
+
+    assert asyncio.run(step()) == [0, 1, 2, 3, 4]
+    assert running["max"] == 2
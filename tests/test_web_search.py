@@ -0,0 +1,115 @@
+import asyncio
+import contextvars
+import threading
+import time
+
+import pytest
+from langchain_core.tools import StructuredTool, ToolException
+
+from web_search import SearchCache, cached_search, normalize_query, start_search_turn
+
+
+def fake_search(delay=0.0):
+    calls = []
+
+    def search(query: str):
+        calls.append(query)
+        time.sleep(delay)
+        return [{"content": f"results for {query}"}]
+
+    async def asearch(query: str):
+        calls.append(query)
+        await asyncio.sleep(delay)
+        return [{"content": f"results for {query}"}]
+
+    tool = StructuredTool.from_function(func=search, coroutine=asearch, name="tavily_search_results_json", description="Search the web.")
+    return tool, calls
+
+
+def test_normalize_query_folds_case_accents_and_stopwords_but_keeps_word_order():
+    assert normalize_query("La météo au Mans ?") == normalize_query("météo Le Mans") == "meteo mans"
+    assert normalize_query("Paris Lyon") != normalize_query("Lyon Paris")
+    assert normalize_query("new new york") == "new new york"
+
+
+def test_entries_expire_after_ttl():
+    cache = SearchCache(ttl=0.05)
+    cache.put("meteo mans", "soleil")
+    assert cache.get("meteo mans") == "soleil"
+    time.sleep(0.06)
+    assert cache.get("meteo mans") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = SearchCache(ttl=60, max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_equivalent_queries_share_one_search():
+    tool, calls = fake_search()
+    cache = SearchCache(ttl=60)
+    search = cached_search(tool, cache)
+    search.invoke({"query": "la météo au Mans"})
+    search.invoke({"query": "Météo Le Mans"})
+    assert calls == ["la météo au Mans"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_turn_budget_caps_network_searches_not_cache_hits(monkeypatch):
+    monkeypatch.setenv("WEB_SEARCH_TURN_BUDGET", "2")
+    tool, calls = fake_search()
+    search = cached_search(tool, SearchCache(ttl=60))
+
+    def turn():
+        start_search_turn()
+        search.invoke({"query": "hotels"})
+        search.invoke({"query": "circuit"})
+        search.invoke({"query": "hotels"})
+        with pytest.raises(ToolException, match="search budget"):
+            search.invoke({"query": "restaurants"})
+
+    contextvars.copy_context().run(turn)
+    assert calls == ["hotels", "circuit"]
+
+
+def test_concurrent_sync_misses_share_one_search_and_free_their_lock():
+    tool, calls = fake_search(delay=0.05)
+    cache = SearchCache(ttl=60)
+    search = cached_search(tool, cache)
+    threads = [threading.Thread(target=search.invoke, args=({"query": "meteo"},)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == ["meteo"]
+    assert len(cache._key_locks) == 0
+
+
+def test_concurrent_async_misses_share_one_search():
+    tool, calls = fake_search(delay=0.05)
+    cache = SearchCache(ttl=60)
+    search = cached_search(tool, cache)
+
+    async def step():
+        return await asyncio.gather(*[search.ainvoke({"query": "meteo"}) for _ in range(5)])
+
+    results = asyncio.run(step())
+    assert calls == ["meteo"]
+    assert all(result == results[0] for result in results)
+    assert len(cache._key_locks) == 0
+
+
+def test_timed_out_search_is_not_cached(monkeypatch):
+    monkeypatch.setenv("WEB_SEARCH_TIMEOUT", "0.05")
+    tool, calls = fake_search(delay=0.2)
+    cache = SearchCache(ttl=60)
+    with pytest.raises(ToolException, match="timed out"):
+        cached_search(tool, cache).invoke({"query": "slow"})
+    assert cache.get("slow", count=False) is None
+    assert cache.stats()["timeouts"] == 1
@@ -0,0 +1,86 @@
+import asyncio
+import contextvars
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from langchain_core.tools import BaseTool, StructuredTool, ToolException, tool as create_tool
+
+
+def tool_timeout() -> float:
+    return float(os.getenv("TOOL_TIMEOUT") or "20")
+
+def max_concurrency() -> int:
+    return int(os.getenv("TOOL_MAX_CONCURRENCY") or "4")
+
+# Outils qui écrivent dans l'API : un appel coupé par le délai peut quand même aboutir,
+# et le modèle le relancerait (double réservation). Ils ne sont bornés que par API_READ_TIMEOUT.
+WRITE_TOOLS = frozenset({
+    "create_client", "update_client", "delete_client",
+    "create_reservation", "update_reservation", "update_reservation_with_patch", "delete_reservation",
+    "book_table",
+})
+
+# Les appels qui dépassent le délai continuent dans ce pool, la réponse ne les attend plus
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="tool")
+
+# Un sémaphore par boucle asyncio (un sémaphore est lié à sa boucle)
+_semaphores = weakref.WeakKeyDictionary()
+
+def _semaphore():
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(max_concurrency())
+    return semaphore
+
+
+def limit_tool(tool, timeout=None):
+    """
+    Same tool, but each call fails with a ToolException after `timeout` seconds
+    (TOOL_TIMEOUT) instead of holding up the whole agent step.
+
+    Write tools (WRITE_TOOLS) are never cut: their request may land after the
+    timeout, and the model would retry it. They wait for the API client's own
+    timeout instead.
+
+    Async calls also share a semaphore of TOOL_MAX_CONCURRENCY per event loop, since
+    the agent runs every tool call of a step at once; sync calls are capped by
+    the `max_concurrency` of the run config.
+    """
+    if not isinstance(tool, BaseTool):
+        # Fonction simple (comme get_reservations) : convertie comme le ferait ToolNode
+        tool = create_tool(tool)
+    writes = tool.name in WRITE_TOOLS
+
+    def func(callbacks=None, **kwargs):
+        if writes:
+            return tool.invoke(kwargs, {"callbacks": callbacks})
+        seconds = timeout or tool_timeout()
+        context = contextvars.copy_context()
+        future = _executor.submit(context.run, tool.invoke, kwargs, {"callbacks": callbacks})
+        try:
+            return future.result(timeout=seconds)
+        except TimeoutError:
+            raise ToolException(f"{tool.name} timed out after {seconds:g}s")
+
+    async def coroutine(callbacks=None, **kwargs):
+        async with _semaphore():
+            if writes:
+                return await tool.ainvoke(kwargs, {"callbacks": callbacks})
+            seconds = timeout or tool_timeout()
+            try:
+                return await asyncio.wait_for(tool.ainvoke(kwargs, {"callbacks": callbacks}), seconds)
+            except asyncio.TimeoutError:
+                raise ToolException(f"{tool.name} timed out after {seconds:g}s")
+
+    return StructuredTool.from_function(
+        func=func,
+        coroutine=coroutine,
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+    )
+
+def limit_tools(tools, timeout=None):
+    return [limit_tool(tool, timeout) for tool in tools]
@@ -1,18 +1,208 @@
-from kokoro import KPipeline
+import numpy as np
 import soundfile as sf
-import torch
+import io
+import os
+import struct
+import sys
+import threading
+import time
+
+from audio_cache import AudioCache, split_sentences
+from audio_store import audio_store
+from metrics import record_stage, tts_chars, tts_load_seconds, tts_synthesis_seconds
+
+# langue -> (lang_code Kokoro, voix)
+VOICES = {
+    "en": ("a", "am_michael"),
+    "fr": ("f", "im_nicola"),
+}
+
+SAMPLE_RATE = 24000
+
+# extension -> (format soundfile, sous-type, type MIME) des fichiers audio par réponse
+AUDIO_FORMATS = {
+    "wav": ("WAV", "PCM_16", "audio/wav"),
+    "ogg": ("OGG", "OPUS", "audio/ogg"),
+    "mp3": ("MP3", "MPEG_LAYER_III", "audio/mpeg"),
+}
+
+def audio_format():
+    """Extension of the per-reply audio files (TTS_AUDIO_FORMAT): Opus in Ogg by default, ~10x smaller than WAV."""
+    extension = (os.getenv("TTS_AUDIO_FORMAT") or "ogg").lower()
+    return extension if extension in AUDIO_FORMATS else "wav"
+
+WARMUP_TEXT = {
+    "en": "Hello, welcome.",
+    "fr": "Bonjour, bienvenue.",
+}
+
+class TTSEngine:
+    """
+    Keeps one Kokoro pipeline per language loaded for the life of the process.
+
+    Pipelines are built on first use (or by warmup) and reused for every reply;
+    synthesis on a given pipeline is serialized by its own lock.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self._pipelines = {}
+        self._pipeline_locks = {}
+        self._lock = threading.Lock()
+        self._torch_configured = False
+        self.load_seconds = {}
+        self.synth_seconds = 0.0
+        self.synth_chars = 0
+        self.first_audio_seconds = 0.0
+        self.streams = 0
+
+    def _configure_torch(self):
+        # torch et Kokoro ne sont importés qu'au chargement de la première pipeline
+        import torch
+        threads = os.getenv("TTS_TORCH_THREADS")
+        if threads:
+            torch.set_num_threads(int(threads))
+        self._torch_configured = True
+
+    def pipeline(self, langue):
+        with self._lock:
+            if langue not in self._pipelines:
+                if not self._torch_configured:
+                    self._configure_torch()
+                lang_code, _ = VOICES[langue]
+                start = time.perf_counter()
+                from kokoro import KPipeline
+                self._pipelines[langue] = KPipeline(lang_code=lang_code)
+                self._pipeline_locks[langue] = threading.Lock()
+                self.load_seconds[langue] = time.perf_counter() - start
+                tts_load_seconds.labels(language=langue).observe(self.load_seconds[langue])
+            return self._pipelines[langue], self._pipeline_locks[langue]
+
+    def synthesize(self, langue, text, speed, record=True):
+        """Yield the audio segments (24 kHz numpy arrays) of `text`."""
+        pipeline, lock = self.pipeline(langue)
+        _, voice = VOICES[langue]
+
+        text = text.replace("\n", " ")
+
+        with lock:
+            start = time.perf_counter()
+            for gs, ps, audio in pipeline(text, voice=voice, speed=speed):
+                yield audio
+            if record:
+                seconds = time.perf_counter() - start
+                self.synth_seconds += seconds
+                self.synth_chars += len(text)
+                tts_synthesis_seconds.labels(language=langue).observe(seconds)
+                tts_chars.labels(language=langue).inc(len(text))
+                record_stage("tts", seconds)
+
+    def speak(self, langue, text, speed):
+        """
+        Yield the audio of `text` sentence by sentence, reusing cached sentences
+        and only synthesizing (then caching) the new ones. Sentences without any
+        audio are skipped.
+        """
+        _, voice = VOICES[langue]
+        for sentence in split_sentences(text):
+            key = self.cache.key(langue, voice, speed, sentence) if self.cache else None
+            audio = self.cache.get(key) if key else None
+            if audio is None:
+                segments = list(self.synthesize(langue, sentence, speed))
+                # Phrase sans rien à prononcer (ponctuation seule) : mise en cache vide, pour ne pas la resynthétiser
+                audio = np.concatenate(segments) if segments else np.zeros(0, dtype=np.float32)
+                if key:
+                    self.cache.put(key, audio)
+            if audio.size:
+                yield audio
+
+    def preload(self, path=None, langue="fr", speeds=(1,)):
+        """Synthesize ahead of time every phrase of a file (one per line) into the cache."""
+        path = path or os.getenv("TTS_PRELOAD_PHRASES")
+        if not path or not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            phrases = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        start = time.perf_counter()
+        for phrase in phrases:
+            for speed in speeds:
+                for _ in self.speak(langue, phrase, speed):
+                    pass
+        print(f"TTS {langue}: {len(phrases)} phrases preloaded in {time.perf_counter() - start:.2f}s")
+
+    def warmup(self, langues=None):
+        """Load the pipelines and run a short dummy utterance through each of them."""
+        langues = langues or [l.strip() for l in (os.getenv("TTS_WARMUP_LANGUAGES") or "fr").split(",") if l.strip()]
+        for langue in langues:
+            # Le premier passage paie les initialisations paresseuses de torch,
+            # le second mesure le régime établi
+            for _ in self.synthesize(langue, WARMUP_TEXT[langue], 1, record=False):
+                pass
+            start = time.perf_counter()
+            for _ in self.synthesize(langue, WARMUP_TEXT[langue], 1):
+                pass
+            per_char = (time.perf_counter() - start) / len(WARMUP_TEXT[langue])
+            print(f"TTS {langue}: model loaded in {self.load_seconds[langue]:.2f}s, "
+                  f"synthesis {per_char * 1000:.1f} ms/char, torch threads {self.torch_threads()}")
+
+    @staticmethod
+    def torch_threads():
+        torch = sys.modules.get("torch")
+        return torch.get_num_threads() if torch else None
+
+    def report(self):
+        return {
+            "load_seconds": dict(self.load_seconds),
+            "synthesis_ms_per_char": round(self.synth_seconds / self.synth_chars * 1000, 2) if self.synth_chars else None,
+            "synthesized_chars": self.synth_chars,
+            "torch_threads": self.torch_threads(),
+            "time_to_first_audio_ms": round(self.first_audio_seconds / self.streams * 1000, 1) if self.streams else None,
+            "cache": self.cache.stats() if self.cache else None,
+        }
+
+tts_engine = TTSEngine(cache=AudioCache())
+
+def render_audio(audio, extension="wav") -> bytes:
+    file_format, subtype, _ = AUDIO_FORMATS[extension]
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, SAMPLE_RATE, format=file_format, subtype=subtype)
+    return buffer.getvalue()
+
+def generate_file(langue, text, speed, extension="wav"):
+    """Synthesize `text` into the bytes of an audio file, or None when there is nothing to say."""
+
+    segments = list(tts_engine.speak(langue, text, speed))
+    if not segments:
+        return None
+    return render_audio(np.concatenate(segments), extension)
 
 def generate_audio(langue, text, speed):
+    """Synthesize `text` into its own audio artifact and return its ID."""
+
+    extension = audio_format()
+    data = generate_file(langue, text, speed, extension)
+    return audio_store.save(data, extension) if data else None
 
-    if(langue == "en"):
-        pipeline = KPipeline(lang_code='a')
-        voice = 'am_michael'
-    elif(langue == "fr"):
-        pipeline = KPipeline(lang_code='f')
-        voice = 'im_nicola'
+def wav_stream_header(sample_rate=SAMPLE_RATE):
+    """WAV header for 16-bit mono PCM of unknown length, as used for streaming."""
+    unknown = 0xFFFFFFFF
+    return (
+        b"RIFF" + struct.pack("<I", unknown) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+        + b"data" + struct.pack("<I", unknown)
+    )
 
-    text = text.replace("\n", " ")
+def to_pcm16(audio):
+    return (np.clip(np.asarray(audio, dtype=np.float32), -1, 1) * 32767).astype("<i2").tobytes()
 
-    generator = pipeline(text, voice=voice, speed=speed)
-    for i, (gs, ps, audio) in enumerate(generator):
-        sf.write('static/audio/response.wav', audio, 24000)
\ No newline at end of file
+def stream_audio(langue, text, speed):
+    """Yield a WAV header then the PCM of each sentence as soon as it is synthesized."""
+    start = time.perf_counter()
+    yield wav_stream_header()
+    first = True
+    for audio in tts_engine.speak(langue, text, speed):
+        if first:
+            tts_engine.first_audio_seconds += time.perf_counter() - start
+            tts_engine.streams += 1
+            first = False
+        yield to_pcm16(audio)
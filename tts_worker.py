@@ -0,0 +1,170 @@
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from audio_store import audio_store
+from metrics import tts_synthesis_seconds
+
+
+class TTSQueueFull(Exception):
+    pass
+
+
+def _init_worker():
+    # Chaque processus charge ses propres pipelines une fois pour toutes
+    from tts import tts_engine
+    tts_engine.warmup()
+
+def _synthesize(langue, text, speed, extension):
+    from tts import generate_file
+    started_at = time.time()
+    data = generate_file(langue, text, speed, extension)
+    return data, started_at, time.time()
+
+
+class TTSWorkerPool:
+    """
+    Runs speech synthesis in a pool of dedicated processes, fed by a bounded queue.
+
+    `submit` returns a job ID right away; the audio is stored in audio_store under
+    that same ID once synthesized, so any web worker sharing the store can serve it.
+    When `workers + queue_size` jobs are already pending, `submit` raises TTSQueueFull.
+    A pool broken by a dead worker process is rebuilt on the next submission.
+    """
+
+    def __init__(self, workers=None, queue_size=None, keep_jobs=1000):
+        self._workers = workers
+        self._queue_size = queue_size
+        self.keep_jobs = keep_jobs
+        self._executor = None
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._pending = 0
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "restarts": 0}
+        self.timings = {"queue_wait": 0.0, "synthesis": 0.0, "total": 0.0}
+
+    @property
+    def workers(self):
+        if self._workers is None:
+            self._workers = int(os.getenv("TTS_WORKERS") or "2")
+        return self._workers
+
+    @property
+    def queue_size(self):
+        if self._queue_size is None:
+            self._queue_size = int(os.getenv("TTS_QUEUE_SIZE") or "8")
+        return self._queue_size
+
+    def _new_executor(self):
+        # spawn : pas de fork d'un processus où torch tourne déjà
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+        # Démarre les processus (et leur chargement du modèle) sans attendre un premier job
+        for _ in range(self.workers):
+            executor.submit(time.sleep, 0)
+        return executor
+
+    def start(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor()
+        return self
+
+    def _submit(self, *args):
+        """Submit a synthesis to the pool, rebuilding it once if a worker process died; must hold the lock."""
+        try:
+            return self._executor.submit(_synthesize, *args)
+        except BrokenProcessPool as e:
+            # Processus tué (mémoire...) : ses jobs ont échoué, les suivants partent sur un pool neuf
+            print(f"Error: TTS pool broken, restarting it: {e}")
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._new_executor()
+            self.counters["restarts"] += 1
+            return self._executor.submit(_synthesize, *args)
+
+    def submit(self, langue, text, speed, extension="wav") -> str:
+        self.start()
+        with self._lock:
+            if self._pending >= self.workers + self.queue_size:
+                self.counters["rejected"] += 1
+                raise TTSQueueFull(f"{self._pending} TTS jobs pending")
+            # Compté une fois le job accepté par le pool : une soumission qui échoue ne laisse rien en attente
+            future = self._submit(langue, text, speed, extension)
+            self._pending += 1
+            self.counters["submitted"] += 1
+
+            job_id = uuid.uuid4().hex
+            job = {"status": "queued", "submitted_at": time.time(), "language": langue, "chars": len(text),
+                   "extension": extension, "future": future}
+            self._jobs[job_id] = job
+            while len(self._jobs) > self.keep_jobs:
+                self._jobs.popitem(last=False)
+
+        # Hors du verrou : le callback s'exécute tout de suite si le job est déjà fini
+        future.add_done_callback(lambda f: self._finish(job_id, job, f))
+        return job_id
+
+    def _finish(self, job_id, job, future):
+        try:
+            data, started_at, finished_at = future.result()
+            if data:
+                audio_store.save(data, job["extension"], audio_id=job_id)
+                status, error = "done", None
+            else:
+                status, error = "empty", None
+        except Exception as e:
+            print(f"Error: TTS job {job_id} failed: {e}")
+            status, error, started_at, finished_at = "failed", str(e), None, time.time()
+
+        with self._lock:
+            self._pending -= 1
+            job.update(status=status, error=error, finished_at=finished_at)
+            if status != "failed":
+                job["queue_wait"] = started_at - job["submitted_at"]
+                job["synthesis"] = finished_at - started_at
+                self.counters["completed"] += 1
+                self.timings["queue_wait"] += job["queue_wait"]
+                self.timings["synthesis"] += job["synthesis"]
+                self.timings["total"] += finished_at - job["submitted_at"]
+                tts_synthesis_seconds.labels(language=job["language"]).observe(job["synthesis"])
+            else:
+                self.counters["failed"] += 1
+
+    def has_job(self, job_id):
+        with self._lock:
+            return job_id in self._jobs
+
+    def status(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            status = {k: v for k, v in job.items() if k != "future"}
+        if status["status"] == "queued" and job["future"].running():
+            status["status"] = "running"
+        return status
+
+    def stats(self):
+        with self._lock:
+            completed = self.counters["completed"]
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "pending": self._pending,
+                **self.counters,
+                **{
+                    f"avg_{name}_ms": round(seconds / completed * 1000, 1) if completed else None
+                    for name, seconds in self.timings.items()
+                },
+            }
+
+
+tts_pool = TTSWorkerPool()
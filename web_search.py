@@ -0,0 +1,226 @@
+import asyncio
+import contextvars
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from langchain_core.tools import StructuredTool, ToolException
+
+from keyed_locks import KeyedLocks
+from metrics import search_cache_lookups, search_seconds
+
+
+def search_timeout() -> float:
+    return float(os.getenv("WEB_SEARCH_TIMEOUT") or "5")
+
+def turn_budget() -> int:
+    return int(os.getenv("WEB_SEARCH_TURN_BUDGET") or "2")
+
+# Mots sans effet sur les résultats : "la météo au Mans" et "météo Le Mans" partagent une entrée
+# (l'ordre des autres mots est gardé : "Paris Lyon" et "Lyon Paris" restent deux recherches)
+STOPWORDS = {
+    "a", "au", "aux", "de", "des", "du", "en", "et", "l", "la", "le", "les", "un", "une", "pour", "sur",
+    "est", "ce", "il", "y", "quel", "quelle", "quels", "quelles",
+    "the", "an", "and", "in", "of", "for", "on", "at", "to", "is", "are", "what", "which",
+}
+
+def normalize_query(query: str) -> str:
+    text = unicodedata.normalize("NFKD", query or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join(word for word in re.findall(r"\w+", text) if word not in STOPWORDS)
+
+
+# Recherches réseau autorisées pendant le tour d'agent en cours (None hors d'un tour)
+_turn_searches = contextvars.ContextVar("turn_searches", default=None)
+_budget_lock = threading.Lock()
+
+def start_search_turn():
+    """Give the turn about to run its own search budget (shared by the tool calls it spawns)."""
+    _turn_searches.set({"remaining": turn_budget()})
+
+def _spend_budget():
+    budget = _turn_searches.get()
+    if budget is None:
+        return True
+    # Les appels d'une même étape tournent en parallèle
+    with _budget_lock:
+        if budget["remaining"] <= 0:
+            return False
+        budget["remaining"] -= 1
+        return True
+
+
+class SearchCache:
+    """
+    Web search results keyed by normalized query, kept `ttl` seconds (WEB_SEARCH_TTL),
+    at most `max_entries` of them (least recently used evicted first).
+
+    Failed searches are not cached. Concurrent misses on the same query, sync or
+    async, share one network call: the first one searches under the query's
+    lock, the others wait for it then read its result from the cache.
+    """
+
+    def __init__(self, ttl=None, max_entries=512):
+        self._ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._key_locks = KeyedLocks()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "searches": 0, "errors": 0, "timeouts": 0, "over_budget": 0}
+        self.search_seconds = 0.0
+        self.max_search_seconds = 0.0
+
+    @property
+    def ttl(self):
+        if self._ttl is None:
+            self._ttl = float(os.getenv("WEB_SEARCH_TTL") or "1800")
+        return self._ttl
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def get(self, key, count=True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] >= self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+            if count:
+                self.counters["hits" if entry else "misses"] += 1
+        if count:
+            search_cache_lookups.labels(result="hit" if entry else "miss").inc()
+        return entry[0] if entry else None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def key_lock(self, key):
+        return self._key_locks.hold(key)
+
+    def akey_lock(self, key):
+        # Même verrou que le chemin synchrone, attendu sans bloquer la boucle
+        return self._key_locks.ahold(key)
+
+    def record_search(self, seconds, status):
+        with self._lock:
+            self.counters["searches"] += 1
+            self.search_seconds += seconds
+            self.max_search_seconds = max(self.max_search_seconds, seconds)
+        search_seconds.labels(status=status).observe(seconds)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            searches = self.counters["searches"]
+            return {
+                "entries": len(self._entries),
+                "ttl": self.ttl,
+                **self.counters,
+                "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else None,
+                "avg_search_ms": round(self.search_seconds / searches * 1000, 1) if searches else None,
+                "max_search_ms": round(self.max_search_seconds * 1000, 1) if searches else None,
+            }
+
+
+search_cache = SearchCache()
+
+# Les recherches qui dépassent le délai continuent ici, le tour ne les attend plus
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="search")
+
+
+def _check(cache, result):
+    # TavilySearchResults renvoie l'erreur sous forme de texte au lieu de lever une exception
+    if isinstance(result, str):
+        cache.count("errors")
+        raise ToolException(result)
+    return result
+
+def _over_budget(cache, tool):
+    cache.count("over_budget")
+    raise ToolException(
+        f"{tool.name}: search budget of this turn spent ({turn_budget()} searches), answer with the results already found"
+    )
+
+def _timed_out(cache, tool, seconds):
+    cache.count("timeouts")
+    cache.record_search(seconds, "timeout")
+    raise ToolException(f"{tool.name} timed out after {seconds:g}s")
+
+
+def cached_search(tool, cache=search_cache):
+    """
+    Same search tool, answered from `cache` when the normalized query was searched
+    recently. Network searches are cut after WEB_SEARCH_TIMEOUT seconds and limited
+    to WEB_SEARCH_TURN_BUDGET per agent turn; both fail with a ToolException that
+    the model sees as the tool's answer.
+    """
+
+    def func(query: str, callbacks=None):
+        key = normalize_query(query)
+        found = cache.get(key)
+        if found is not None:
+            return found
+        # Une seule recherche réseau par requête, les appels identiques attendent son résultat
+        with cache.key_lock(key):
+            found = cache.get(key, count=False)
+            if found is not None:
+                return found
+            if not _spend_budget():
+                _over_budget(cache, tool)
+
+            seconds = search_timeout()
+            start = time.perf_counter()
+            context = contextvars.copy_context()
+            future = _executor.submit(context.run, tool.invoke, {"query": query}, {"callbacks": callbacks})
+            try:
+                result = future.result(timeout=seconds)
+            except TimeoutError:
+                _timed_out(cache, tool, seconds)
+            cache.record_search(time.perf_counter() - start, "ok" if not isinstance(result, str) else "error")
+            cache.put(key, _check(cache, result))
+            return result
+
+    async def coroutine(query: str, callbacks=None):
+        key = normalize_query(query)
+        found = cache.get(key)
+        if found is not None:
+            return found
+        async with cache.akey_lock(key):
+            found = cache.get(key, count=False)
+            if found is not None:
+                return found
+            if not _spend_budget():
+                _over_budget(cache, tool)
+
+            seconds = search_timeout()
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(tool.ainvoke({"query": query}, {"callbacks": callbacks}), seconds)
+            except asyncio.TimeoutError:
+                _timed_out(cache, tool, seconds)
+            cache.record_search(time.perf_counter() - start, "ok" if not isinstance(result, str) else "error")
+            cache.put(key, _check(cache, result))
+            return result
+
+    return StructuredTool.from_function(
+        func=func,
+        coroutine=coroutine,
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+    )